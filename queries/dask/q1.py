@@ -1,22 +1,26 @@
 from __future__ import annotations
 
 from datetime import date
+from typing import TYPE_CHECKING
 
 import pandas as pd
 
 from queries.dask import utils
 
+if TYPE_CHECKING:
+    from queries.common_utils import PartitionFilter
+
 Q_NUM = 1
 
 
 def q() -> None:
     line_item_ds = utils.get_line_item_ds
+    line_item_partitions: list[PartitionFilter] = [("l_shipyear", "<=", 1998)]
     # first call one time to cache in case we don't include the IO times
-    line_item_ds()
+    line_item_ds(line_item_partitions)
 
     def query() -> pd.DataFrame:
-        nonlocal line_item_ds
-        line_item_ds = line_item_ds()
+        line_item_ds = utils.get_line_item_ds(line_item_partitions)
 
         var1 = date(1998, 9, 2)
 
@@ -8,6 +8,8 @@ from queries.dask import utils
 if TYPE_CHECKING:
     import pandas as pd
 
+    from queries.common_utils import PartitionFilter
+
 Q_NUM = 5
 
 
@@ -17,6 +19,7 @@ def q() -> None:
     customer_ds = utils.get_customer_ds
     line_item_ds = utils.get_line_item_ds
     orders_ds = utils.get_orders_ds
+    orders_partitions: list[PartitionFilter] = [("o_orderyear", "=", 1994)]
     supplier_ds = utils.get_supplier_ds
 
     # first call one time to cache in case we don't include the IO times
@@ -24,22 +27,16 @@ def q() -> None:
     nation_ds()
     customer_ds()
     line_item_ds()
-    orders_ds()
+    orders_ds(orders_partitions)
     supplier_ds()
 
     def query() -> pd.DataFrame:
-        nonlocal region_ds
-        nonlocal nation_ds
-        nonlocal customer_ds
-        nonlocal line_item_ds
-        nonlocal orders_ds
-        nonlocal supplier_ds
-        region_ds = region_ds()
-        nation_ds = nation_ds()
-        customer_ds = customer_ds()
-        line_item_ds = line_item_ds()
-        orders_ds = orders_ds()
-        supplier_ds = supplier_ds()
+        region_ds = utils.get_region_ds()
+        nation_ds = utils.get_nation_ds()
+        customer_ds = utils.get_customer_ds()
+        line_item_ds = utils.get_line_item_ds()
+        orders_ds = utils.get_orders_ds(orders_partitions)
+        supplier_ds = utils.get_supplier_ds()
 
         var1 = "ASIA"
         var2 = date(1994, 1, 1)
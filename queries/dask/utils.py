@@ -4,26 +4,37 @@ from typing import TYPE_CHECKING, Any
 
 import dask
 import dask.dataframe as dd
+import pandas as pd
 
 from queries.common_utils import (
     check_query_result_pd,
+    get_partition_filters,
+    get_table_dtypes,
+    get_table_files,
     get_table_path,
+    is_hive_partitioned,
     on_second_call,
+    read_ipc_table,
     run_query_generic,
 )
 from settings import Settings
 
 if TYPE_CHECKING:
     from collections.abc import Callable
+    from pathlib import Path
 
     from dask.dataframe import DataFrame
 
+    from queries.common_utils import PartitionFilter
+
 settings = Settings()
 
-dask.config.set(scheduler="threads")
+dask.config.set(scheduler="threads", num_workers=settings.run.threads)
 
 
-def read_ds(table_name: str) -> DataFrame:
+def read_ds(
+    table_name: str, partition_filters: list[PartitionFilter] | None = None
+) -> DataFrame:
     if settings.run.io_type == "skip":
         # TODO: Load into memory before returning the Dask DataFrame.
         # Code below is tripped up by date types
@@ -32,29 +43,64 @@ def read_ds(table_name: str) -> DataFrame:
         msg = "cannot run Dask starting from an in-memory representation"
         raise RuntimeError(msg)
 
-    path = get_table_path(table_name)
-
+    # Every file of a partitioned table is a partition, read concurrently by the
+    # threads of the scheduler
+    path = [str(f) for f in get_table_files(table_name)]
+
+    if is_hive_partitioned(table_name):
+        # Discover the partitions, and skip those ruled out by the filters of the
+        # partition columns
+        filters = get_partition_filters(table_name, partition_filters)
+        return dd.read_parquet(  # type: ignore[no-any-return]
+            str(get_table_path(table_name)),
+            dtype_backend="pyarrow",
+            filters=filters or None,
+        )
     if settings.run.io_type == "parquet":
         return dd.read_parquet(path, dtype_backend="pyarrow")  # type: ignore[no-any-return]
     elif settings.run.io_type == "csv":
-        df = dd.read_csv(path, dtype_backend="pyarrow")
-        for c in df.columns:
-            if c.endswith("date"):
-                df[c] = df[c].astype("date32[day][pyarrow]")
-        return df  # type: ignore[no-any-return]
+        # The pyarrow engine of pandas parses the blocks of the files, and dates,
+        # into Arrow arrays, which already have the types of the schema
+        return dd.read_csv(  # type: ignore[no-any-return]
+            path,
+            engine="pyarrow",
+            dtype_backend="pyarrow",
+            dtype=get_table_dtypes(table_name),
+        )
+    elif settings.run.io_type == "feather":
+        # Dask has no reader of Arrow IPC files, so every file is a partition that
+        # the threads of the scheduler memory-map
+        files = get_table_files(table_name)
+        meta = _read_ipc_schema(files[0])
+        return dd.from_map(_read_ipc_file, files, meta=meta)  # type: ignore[no-any-return]
     else:
         msg = f"unsupported file type: {settings.run.io_type!r}"
         raise ValueError(msg)
 
 
+def _read_ipc_file(path: Path) -> pd.DataFrame:
+    return read_ipc_table(path).to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def _read_ipc_schema(path: Path) -> pd.DataFrame:
+    import pyarrow as pa
+
+    schema = pa.ipc.open_file(pa.memory_map(str(path))).schema
+    return schema.empty_table().to_pandas(types_mapper=pd.ArrowDtype)
+
+
 @on_second_call
-def get_line_item_ds() -> DataFrame:
-    return read_ds("lineitem")
+def get_line_item_ds(
+    partition_filters: list[PartitionFilter] | None = None,
+) -> DataFrame:
+    return read_ds("lineitem", partition_filters)
 
 
 @on_second_call
-def get_orders_ds() -> DataFrame:
-    return read_ds("orders")
+def get_orders_ds(
+    partition_filters: list[PartitionFilter] | None = None,
+) -> DataFrame:
+    return read_ds("orders", partition_filters)
 
 
 @on_second_call
@@ -6,7 +6,7 @@ Q_NUM = 1
 
 
 def q() -> None:
-    lineitem = utils.get_line_item_ds()
+    lineitem = utils.get_line_item_ds(partition_filters=[("l_shipyear", "<=", 1998)])
 
     query_str = f"""
     select
@@ -7,7 +7,7 @@ Q_NUM = 10
 
 def q() -> None:
     customer_ds = utils.get_customer_ds()
-    orders_ds = utils.get_orders_ds()
+    orders_ds = utils.get_orders_ds(partition_filters=[("o_orderyear", "=", 1993)])
     line_item_ds = utils.get_line_item_ds()
     nation_ds = utils.get_nation_ds()
 
@@ -6,7 +6,9 @@ Q_NUM = 12
 
 
 def q() -> None:
-    line_item_ds = utils.get_line_item_ds()
+    line_item_ds = utils.get_line_item_ds(
+        partition_filters=[("l_shipyear", "<=", 1994)]
+    )
     orders_ds = utils.get_orders_ds()
 
     query_str = f"""
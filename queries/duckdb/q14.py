@@ -7,7 +7,9 @@ Q_NUM = 14
 
 def q() -> None:
     part_ds = utils.get_part_ds()
-    line_item_ds = utils.get_line_item_ds()
+    line_item_ds = utils.get_line_item_ds(
+        partition_filters=[("l_shipyear", "=", 1995), ("l_shipmonth", "=", 9)]
+    )
 
     query_str = f"""
     select
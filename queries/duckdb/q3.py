@@ -7,8 +7,10 @@ Q_NUM = 3
 
 def q() -> None:
     customer_ds = utils.get_customer_ds()
-    line_item_ds = utils.get_line_item_ds()
-    orders_ds = utils.get_orders_ds()
+    line_item_ds = utils.get_line_item_ds(
+        partition_filters=[("l_shipyear", ">=", 1995)]
+    )
+    orders_ds = utils.get_orders_ds(partition_filters=[("o_orderyear", "<=", 1995)])
 
     query_str = f"""
     select
@@ -7,7 +7,7 @@ Q_NUM = 4
 
 def q() -> None:
     line_item_ds = utils.get_line_item_ds()
-    orders_ds = utils.get_orders_ds()
+    orders_ds = utils.get_orders_ds(partition_filters=[("o_orderyear", "=", 1993)])
 
     query_str = f"""
     select
@@ -10,7 +10,7 @@ def q() -> None:
     nation_ds = utils.get_nation_ds()
     customer_ds = utils.get_customer_ds()
     line_item_ds = utils.get_line_item_ds()
-    orders_ds = utils.get_orders_ds()
+    orders_ds = utils.get_orders_ds(partition_filters=[("o_orderyear", "=", 1994)])
     supplier_ds = utils.get_supplier_ds()
 
     query_str = f"""
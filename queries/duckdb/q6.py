@@ -6,7 +6,7 @@ Q_NUM = 6
 
 
 def q() -> None:
-    line_item_ds = utils.get_line_item_ds()
+    line_item_ds = utils.get_line_item_ds(partition_filters=[("l_shipyear", "=", 1994)])
 
     query_str = f"""
     select
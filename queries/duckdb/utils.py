@@ -1,44 +1,113 @@
+import datetime
+import functools
+import json
+import re
+import tempfile
+from pathlib import Path
+
 import duckdb
 from duckdb import DuckDBPyRelation
 from typing import Any
 
 from queries.common_utils import (
+    TABLE_NAMES,
+    PartitionFilter,
     check_query_result_pl,
+    get_partition_filters,
+    get_table_files,
     get_table_path,
+    get_table_schema,
+    is_hive_partitioned,
+    log_operator_profile,
+    log_scan_stats,
+    read_ipc_table,
     run_query_generic,
 )
 from settings import Settings
 
 settings = Settings()
 
+if settings.run.threads is not None:
+    duckdb.execute(f"SET threads = {settings.run.threads}")
+
 
-def _scan_ds(table_name: str) -> str:
+def _scan_ds(
+    table_name: str, partition_filters: list[PartitionFilter] | None = None
+) -> str:
     path = get_table_path(table_name)
     path_str = str(path)
+    # The files of partitioned tables are scanned concurrently
+    files = [str(f) for f in get_table_files(table_name)]
+    # Read the partition columns from the directories of Hive partitioned tables
+    hive = is_hive_partitioned(table_name)
 
-    if settings.run.io_type == "skip":
-        name = path_str.replace("/", "_").replace(".", "_").replace("-", "_")
+    name = path_str.replace("/", "_").replace(".", "_").replace("-", "_")
+    if settings.run.io_type == "skip" and settings.run.skip_format == "feather":
+        # Query the memory-mapped Arrow tables in place instead of copying them
+        _register_ipc_table(name, table_name)
+        scan = name
+    elif settings.run.io_type == "skip":
         duckdb.sql(
-            f"create temp table if not exists {name} as select * from read_parquet('{path_str}');"
+            f"create temp table if not exists {name} as select * from read_parquet({files}, hive_partitioning = {hive});"
         )
-        return name
+        scan = name
     elif settings.run.io_type == "parquet":
-        duckdb.read_parquet(path_str)
-        return f"'{path_str}'"
+        duckdb.read_parquet(files, hive_partitioning=hive)
+        scan = f"read_parquet({files}, hive_partitioning = {hive})"
+    elif settings.run.io_type == "feather":
+        # DuckDB has no reader of Arrow IPC files, so it scans them through a PyArrow
+        # dataset of the memory-mapped files, which reads the projected columns
+        # every time the query runs
+        _register_ipc_dataset(name, tuple(files))
+        scan = name
     elif settings.run.io_type == "csv":
-        duckdb.read_csv(path_str)
-        return f"'{path_str}'"
+        columns = {c: _DUCKDB_TYPES[t] for c, t in get_table_schema(table_name).items()}
+        duckdb.read_csv(files, header=True, columns=columns)
+        scan = f"read_csv({files}, header = true, columns = {columns})"
     else:
         msg = f"unsupported file type: {settings.run.io_type!r}"
         raise ValueError(msg)
 
+    # Filters of partition columns are pushed down to prune partitions
+    filters = get_partition_filters(table_name, partition_filters)
+    if filters:
+        where = " and ".join(f"{column} {op} {value}" for column, op, value in filters)
+        scan = f"(select * from {scan} where {where})"
+    return scan
+
+
+# Types of the columns of CSV files, see `get_table_schema`
+_DUCKDB_TYPES = {
+    "int64": "BIGINT",
+    "float64": "DOUBLE",
+    "string": "VARCHAR",
+    "date": "DATE",
+}
+
+
+@functools.cache
+def _register_ipc_table(name: str, table_name: str) -> None:
+    import pyarrow as pa
+
+    tables = [read_ipc_table(path) for path in get_table_files(table_name)]
+    duckdb.register(name, pa.concat_tables(tables))
 
-def get_line_item_ds() -> str:
-    return _scan_ds("lineitem")
 
+@functools.cache
+def _register_ipc_dataset(name: str, files: tuple[str, ...]) -> None:
+    import pyarrow.dataset as ds
+    import pyarrow.fs
 
-def get_orders_ds() -> str:
-    return _scan_ds("orders")
+    filesystem = pyarrow.fs.LocalFileSystem(use_mmap=True)
+    duckdb.register(name, ds.dataset(list(files), format="ipc", filesystem=filesystem))
+
+
+def get_line_item_ds(partition_filters: list[PartitionFilter] | None = None) -> str:
+    return _scan_ds("lineitem", partition_filters)
+
+
+def get_orders_ds(partition_filters: list[PartitionFilter] | None = None) -> str:
+    return _scan_ds("orders", partition_filters)
 
 
 def get_customer_ds() -> str:
@@ -68,7 +137,11 @@ def get_part_supp_ds() -> str:
 def run_query(query_number: int, context: DuckDBPyRelation) -> None:
     # Always materialize query results via execute().fetchall() by default;
     # only return a DataFrame for result-checking or display.
-    if not (settings.run.show_results or settings.run.check_results):
+    if not (
+        settings.run.show_results
+        or settings.run.check_results
+        or settings.run.write_answers
+    ):
         def execute() -> None:
             result = context.execute()
             try:
@@ -83,3 +156,243 @@ def run_query(query_number: int, context: DuckDBPyRelation) -> None:
     run_query_generic(
         execute, query_number, "duckdb", query_checker=check_query_result_pl
     )
+    if settings.run.duckdb_profile or settings.run.track_io:
+        nodes = _flatten_operator_tree(_profile_query(context))
+        if settings.run.duckdb_profile:
+            _report_profile(query_number, nodes)
+        if settings.run.track_io:
+            _report_scan_stats(query_number, nodes)
+
+
+def _profile_query(context: DuckDBPyRelation) -> dict[str, Any]:
+    """Run the query once more with JSON profiling and return the profile."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "profile.json"
+        duckdb.execute("SET enable_profiling = 'json'")
+        duckdb.execute(f"SET profiling_output = '{path}'")
+        try:
+            context.execute().fetchall()
+        finally:
+            duckdb.execute("RESET enable_profiling")
+            duckdb.execute("RESET profiling_output")
+        return json.loads(path.read_text())  # type: ignore[no-any-return]
+
+
+def _report_profile(query_number: int, nodes: list[dict[str, Any]]) -> None:
+    """Report the time spent per operator."""
+    total = sum(node["duration"] for node in nodes)
+    shares: dict[str, float] = {}
+    for node in nodes:
+        shares[node["operator"]] = shares.get(node["operator"], 0.0) + node["duration"]
+    summary = ", ".join(
+        f"{op} {time / total:.1%}"
+        for op, time in sorted(shares.items(), key=lambda x: x[1], reverse=True)
+    )
+    print(f"Profile of duckdb query {query_number}: {summary}")
+
+    if settings.run.log_timings:
+        log_operator_profile("duckdb", duckdb.__version__, query_number, nodes)
+
+
+def _flatten_operator_tree(profile: dict[str, Any]) -> list[dict[str, Any]]:
+    """Flatten the operator tree of a JSON profile into a list of nodes in pre-order.
+
+    The parent of every node is referenced by its `node_id`, so the tree, and with
+    it the join order, can be reconstructed.
+    """
+    nodes: list[dict[str, Any]] = []
+
+    def visit(operator: dict[str, Any], parent_id: int | None, depth: int) -> None:
+        node_id = len(nodes)
+        nodes.append(
+            {
+                "node_id": node_id,
+                "parent_id": parent_id,
+                "depth": depth,
+                "node": operator["operator_name"].strip(),
+                "operator": operator["operator_type"].lower(),
+                "duration": operator["operator_timing"],
+                "cardinality": operator["operator_cardinality"],
+                "rows_scanned": operator["operator_rows_scanned"],
+                # DuckDB does not report the bytes read from storage, only the size
+                # of the output of every operator, which for scans is the size of
+                # the data scanned
+                "bytes": operator["result_set_size"],
+                "extra_info": json.dumps(operator["extra_info"]),
+            }
+        )
+        for child in operator["children"]:
+            visit(child, node_id, depth + 1)
+
+    # The root only holds metrics of the query as a whole
+    for child in profile["children"]:
+        visit(child, None, 0)
+    return nodes
+
+
+def _report_scan_stats(query_number: int, nodes: list[dict[str, Any]]) -> None:
+    """Report the files, columns and row groups read by the Parquet scans of the query.
+
+    DuckDB does not report the row groups it reads, and counts the rows of skipped
+    row groups as scanned. The columns read by a scan are those it projects, and
+    those its pushed down filters refer to. The row groups read by a filtered scan
+    are estimated as those whose statistics do not rule out its filters, which is
+    how DuckDB skips them, and logged as `row_groups_estimated` rather than
+    `row_groups_read`.
+    """
+    stats = {
+        "scans": 0,
+        "files": 0,
+        "columns_read": 0,
+        "columns_total": 0,
+        "filtered_scans": 0,
+        "row_groups_estimated": 0,
+        "row_groups_total": 0,
+    }
+    for node in nodes:
+        extra_info = json.loads(node["extra_info"])
+        # Scans of a file name and of `read_parquet` are named differently
+        if extra_info.get("Function") not in ("PARQUET_SCAN", "READ_PARQUET"):
+            continue
+
+        referenced: set[str] = set()
+        for key in ("Projections", "Filters"):
+            value = extra_info.get(key, [])
+            for expr in [value] if isinstance(value, str) else value:
+                referenced.update(re.findall(r"[A-Za-z_][A-Za-z0-9_]*", expr))
+        # The profile does not name the file, so find the table by its columns
+        table_name = next(
+            (t for t, c in _get_table_columns().items() if referenced & c), None
+        )
+        columns = _get_table_columns().get(table_name, set())
+
+        stats["scans"] += 1
+        stats["files"] += int(extra_info.get("Total Files Read", 1))
+        stats["columns_read"] += len(referenced & columns)
+        stats["columns_total"] += len(columns)
+        filters = extra_info.get("Filters", [])
+        if filters and table_name is not None:
+            row_groups = _get_row_group_statistics()[table_name]
+            conditions = [
+                condition
+                for expr in ([filters] if isinstance(filters, str) else filters)
+                for condition in _parse_filter(expr)
+            ]
+            stats["filtered_scans"] += 1
+            stats["row_groups_estimated"] += sum(
+                not _skips_row_group(conditions, rg) for rg in row_groups
+            )
+            stats["row_groups_total"] += len(row_groups)
+
+    print(
+        f"Scans of duckdb query {query_number}: {stats['files']} files, "
+        f"{stats['columns_read']}/{stats['columns_total']} columns, "
+        f"~{stats['row_groups_estimated']}/{stats['row_groups_total']} row groups "
+        f"(estimated) of {stats['filtered_scans']} filtered scans"
+    )
+    if settings.run.log_timings:
+        log_scan_stats("duckdb", duckdb.__version__, query_number, stats)
+
+
+@functools.cache
+def _get_table_columns() -> dict[str, set[str]]:
+    import pyarrow.parquet as pq
+
+    return {t: set(pq.read_schema(get_table_files(t)[0]).names) for t in TABLE_NAMES}
+
+
+# Comparisons of a pushed down filter, and whether a row group with the given minimum
+# and maximum of the column can contain rows satisfying them
+_FILTER_COMPARISONS = {
+    "=": lambda lo, hi, v: lo <= v <= hi,
+    "<": lambda lo, hi, v: lo < v,
+    "<=": lambda lo, hi, v: lo <= v,
+    ">": lambda lo, hi, v: hi > v,
+    ">=": lambda lo, hi, v: hi >= v,
+}
+
+
+# Constants of pushed down filters, e.g. 24, 0.05, 'BUILDING' or '1994-01-01'::DATE,
+# with an optional cast
+_FILTER_LITERAL = re.compile(
+    r"(?:'(?P<string>(?:[^']|'')*)'|(?P<number>-?\d+(?:\.\d+)?))"
+    r"(?:::(?P<type>[A-Z]+)(?:\([\d, ]+\))?)?"
+)
+
+
+def _parse_filter(expr: str) -> list[tuple[str, str, Any]]:
+    """Parse the comparisons of a column with a constant of a pushed down filter.
+
+    Other parts of the filter, such as optional filters or IN lists, are ignored,
+    as they never rule out row groups by their statistics here, and so are
+    comparisons with constants of other types than numbers, strings and dates.
+    """
+    conditions = []
+    for part in expr.split(" AND "):
+        match = re.fullmatch(r"(\w+)(<=|>=|=|<|>)(.+)", part.strip())
+        if match is None:
+            continue
+        column, op, literal = match.groups()
+        value = _parse_literal(literal)
+        if value is not None:
+            conditions.append((column, op, value))
+    return conditions
+
+
+def _parse_literal(literal: str) -> Any:
+    """Return the Python value of a constant of a pushed down filter, if supported."""
+    match = _FILTER_LITERAL.fullmatch(literal)
+    if match is None:
+        return None
+    string, number, type_ = match.group("string", "number", "type")
+    if string is not None:
+        string = string.replace("''", "'")
+        if type_ is None or type_ == "VARCHAR":
+            return string
+        if type_ == "DATE":
+            return datetime.date.fromisoformat(string)
+        if type_ == "TIMESTAMP":
+            return datetime.datetime.fromisoformat(string)
+        return None
+    return float(number) if "." in number else int(number)
+
+
+def _skips_row_group(
+    conditions: list[tuple[str, str, Any]],
+    statistics: dict[str, tuple[Any, Any]],
+) -> bool:
+    """Whether the statistics of a row group rule out one of the conditions."""
+    for column, op, value in conditions:
+        if column not in statistics:
+            continue
+        lo, hi = statistics[column]
+        try:
+            if not _FILTER_COMPARISONS[op](lo, hi, value):
+                return True
+        except TypeError:
+            continue
+    return False
+
+
+@functools.cache
+def _get_row_group_statistics() -> dict[str, list[dict[str, tuple[Any, Any]]]]:
+    """Return the minimum and maximum of the columns of the row groups of the tables."""
+    import pyarrow.parquet as pq
+
+    statistics: dict[str, list[dict[str, tuple[Any, Any]]]] = {}
+    for table_name in TABLE_NAMES:
+        statistics[table_name] = []
+        for path in get_table_files(table_name):
+            metadata = pq.read_metadata(path)
+            for i in range(metadata.num_row_groups):
+                row_group = metadata.row_group(i)
+                columns = {}
+                for j in range(row_group.num_columns):
+                    column = row_group.column(j)
+                    if column.statistics is not None and column.statistics.has_min_max:
+                        columns[column.path_in_schema] = (
+                            column.statistics.min,
+                            column.statistics.max,
+                        )
+                statistics[table_name].append(columns)
+    return statistics
@@ -0,0 +1,116 @@
+"""Cheap comparison of query results by fingerprint.
+
+A fingerprint summarizes a result by its number of rows and, for every column, a hash
+of its values in row order and a rounded sum of numeric columns. Comparing the
+fingerprints of a result and of the expected answer is much cheaper than comparing
+the frames themselves, and the fingerprint of the answer is only computed once.
+
+Values are normalized before hashing like the full comparison normalizes them, so
+that results of different engines compare equal: NaN is treated as null, and floats
+with only integral values as integers. Other floats are rounded to
+`SIGNIFICANT_DIGITS` significant digits, so fingerprints tolerate the differences
+between floating point and decimal arithmetic of engines. Lenient fingerprints, for
+the comparison of pandas results, also lowercase column names, strip strings and
+truncate datetimes to dates, as that comparison does.
+
+Equal fingerprints of the same leniency imply results equal up to about the
+relative tolerance (1e-5) of the full comparison. Results that are equal within
+that tolerance may still differ in their fingerprint, e.g. when rounding a float
+crosses a boundary, so a mismatch must be confirmed by comparing the frames.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from typing import Any
+
+import polars as pl
+
+SIGNIFICANT_DIGITS = 6
+
+
+@dataclass(frozen=True)
+class ColumnFingerprint:
+    name: str
+    # Hash of the normalized values of the column in row order
+    hash: str
+    # Sum of numeric columns, rounded like the values, None for other columns
+    total: float | None
+    null_count: int
+
+
+@dataclass(frozen=True)
+class ResultFingerprint:
+    n_rows: int
+    columns: tuple[ColumnFingerprint, ...]
+
+    def diff(self, other: ResultFingerprint) -> list[str]:
+        """Return a description of every difference to the other fingerprint."""
+        if self.n_rows != other.n_rows:
+            return [f"{self.n_rows} rows instead of {other.n_rows}"]
+        names = [c.name for c in self.columns]
+        other_names = [c.name for c in other.columns]
+        if names != other_names:
+            return [f"columns {names} instead of {other_names}"]
+        return [
+            f"column {c.name!r} differs"
+            for c, other_c in zip(self.columns, other.columns, strict=True)
+            if c != other_c
+        ]
+
+
+def result_fingerprint(result: Any, *, lenient: bool = False) -> ResultFingerprint:
+    """Compute the fingerprint of a Polars or pandas query result.
+
+    Parameters
+    ----------
+    result
+        The result of the query.
+    lenient
+        Lowercase the column names, strip strings and truncate datetimes to dates,
+        like the comparison of pandas results, see `check_query_result_pd`.
+    """
+    df = result if isinstance(result, pl.DataFrame) else pl.from_pandas(result)
+    return ResultFingerprint(
+        n_rows=df.height,
+        columns=tuple(
+            _column_fingerprint(s, lenient=lenient) for s in df.get_columns()
+        ),
+    )
+
+
+def _column_fingerprint(s: pl.Series, *, lenient: bool) -> ColumnFingerprint:
+    s = _normalize(s, lenient=lenient)
+    total = None
+    if s.dtype.is_numeric():
+        total = _round(pl.Series([s.sum()], dtype=pl.Float64))[0]
+    digest = hashlib.sha256(s.hash(seed=0).to_numpy().tobytes()).hexdigest()
+    return ColumnFingerprint(
+        name=s.name.lower() if lenient else s.name,
+        hash=digest,
+        total=total,
+        null_count=s.null_count(),
+    )
+
+
+def _normalize(s: pl.Series, *, lenient: bool) -> pl.Series:
+    if isinstance(s.dtype, pl.Categorical | pl.Enum):
+        s = s.cast(pl.String)
+    if s.dtype == pl.String:
+        return s.str.strip_chars() if lenient else s
+    if isinstance(s.dtype, pl.Datetime):
+        return s.dt.date() if lenient else s
+    if s.dtype.is_integer():
+        return s.cast(pl.Int64)
+    if isinstance(s.dtype, pl.Decimal) or s.dtype.is_float():
+        s = s.cast(pl.Float64).fill_nan(None)
+        if (s.drop_nulls() % 1 == 0).all():
+            # Values out of the range of integers become null, and do not match
+            return s.cast(pl.Int64, strict=False)
+        return _round(s)
+    return s
+
+
+def _round(s: pl.Series) -> pl.Series:
+    return s.round_sig_figs(SIGNIFICANT_DIGITS)
@@ -0,0 +1,235 @@
+"""Accounting of the I/O of the benchmark process and its children."""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import sys
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import psutil
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from types import TracebackType
+
+
+@dataclass
+class IOCounters:
+    # Bytes returned by read syscalls, including reads served from the page cache
+    rchar: int = 0
+    # Bytes fetched from the storage layer
+    read_bytes: int = 0
+    # Number of read syscalls
+    syscr: int = 0
+
+    def __sub__(self, other: IOCounters) -> IOCounters:
+        return IOCounters(
+            rchar=self.rchar - other.rchar,
+            read_bytes=self.read_bytes - other.read_bytes,
+            syscr=self.syscr - other.syscr,
+        )
+
+
+def get_io_counters() -> IOCounters:
+    """Return the I/O counters of this process and all its children.
+
+    These are the counters of `/proc/<pid>/io`, so they are only available on
+    Linux. Children include e.g. the Spark JVM and Ray worker processes.
+    """
+    process = psutil.Process()
+    counters = _read_counters(process)
+    for child in process.children(recursive=True):
+        try:
+            child_counters = _read_counters(child)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            # The child exited or is not ours to inspect
+            continue
+        counters.rchar += child_counters.rchar
+        counters.read_bytes += child_counters.read_bytes
+        counters.syscr += child_counters.syscr
+    return counters
+
+
+def _read_counters(process: psutil.Process) -> IOCounters:
+    io = process.io_counters()
+    return IOCounters(
+        rchar=io.read_chars,  # type: ignore[attr-defined]
+        read_bytes=io.read_bytes,
+        syscr=io.read_count,
+    )
+
+
+class IOCounter:
+    """Count the I/O of the process and its children while the context is active.
+
+    Children that exit while the context is active are not accounted for.
+    """
+
+    def __init__(self) -> None:
+        self.delta = IOCounters()
+        self._start = IOCounters()
+
+    def __enter__(self) -> IOCounter:
+        self._start = get_io_counters()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.delta = get_io_counters() - self._start
+
+
+class OpenFileSampler:
+    """Sample the files the process and its children open while the context is active.
+
+    A file counts as open while a file descriptor refers to it or it is memory-mapped,
+    as e.g. Polars maps files instead of reading them. Files that are opened and
+    closed between two samples are missed, so the counts are lower bounds. Files are
+    sampled when the context is entered, every `interval` seconds and when it exits,
+    and the counts are None if fewer than two samples were taken after entering,
+    e.g. for code that runs for less than `interval`, so that 0 means that no file
+    was seen open. Every sample walks `/proc` on a background thread, which slows
+    down the code that runs meanwhile, so the interval trades missed files for
+    perturbed timings. Like the I/O counters, this is only available on Linux.
+
+    Parameters
+    ----------
+    directory
+        Only files below this directory, e.g. the tables of the dataset, are counted.
+    interval
+        Time in seconds between two samples.
+    """
+
+    def __init__(self, directory: Path, interval: float = 0.1):
+        self.directory = directory
+        self.interval = interval
+
+        # Every file seen open, the most files open at once, and the number of
+        # samples taken after entering the context
+        self.files: set[str] = set()
+        self.peak = 0
+        self.samples = 0
+
+        self._prefix = f"{directory.resolve()}/"
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self) -> OpenFileSampler:
+        self._sample()
+        self._thread.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        self.samples += 1
+
+    @property
+    def opened(self) -> int | None:
+        """The number of files seen open, None if too few samples were taken."""
+        return len(self.files) if self.samples >= 2 else None
+
+    @property
+    def concurrent(self) -> int | None:
+        """The most files open at once, None if too few samples were taken."""
+        return self.peak if self.samples >= 2 else None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+            self.samples += 1
+
+    def _sample(self) -> None:
+        process = psutil.Process()
+        pids = [process.pid] + [c.pid for c in process.children(recursive=True)]
+        open_files: set[str] = set()
+        for pid in pids:
+            with contextlib.suppress(OSError):
+                open_files.update(self._open_files(pid))
+        self.files.update(open_files)
+        self.peak = max(self.peak, len(open_files))
+
+    def _open_files(self, pid: int) -> Iterator[str]:
+        proc = Path(f"/proc/{pid}")
+        for fd in (proc / "fd").iterdir():
+            try:
+                target = str(fd.readlink())
+            except OSError:
+                # The file descriptor was closed in the meantime
+                continue
+            if target.startswith(self._prefix):
+                yield target
+        with (proc / "maps").open() as f:
+            for line in f:
+                start = line.find("/")
+                if start >= 0 and line.startswith(self._prefix, start):
+                    yield line[start:].rstrip("\n")
+
+
+@dataclass
+class IpcReadTimes:
+    """Time spent reading Arrow IPC (Feather) files, see `read_ipc_table`."""
+
+    files: int = 0
+    # Seconds spent memory-mapping the files and reading their footers
+    map_time: float = 0.0
+    # Seconds spent reading the record batches, which only references the mapped
+    # buffers of uncompressed files, and decompresses those of compressed files
+    decode_time: float = 0.0
+
+
+_ipc_read_times = IpcReadTimes()
+_ipc_read_lock = threading.Lock()
+
+
+def record_ipc_read(map_time: float, decode_time: float) -> None:
+    """Add the read of an Arrow IPC file, which may happen on any thread."""
+    with _ipc_read_lock:
+        _ipc_read_times.files += 1
+        _ipc_read_times.map_time += map_time
+        _ipc_read_times.decode_time += decode_time
+
+
+def pop_ipc_read_times() -> IpcReadTimes:
+    """Return the time spent reading Arrow IPC files since the last call."""
+    global _ipc_read_times
+    with _ipc_read_lock:
+        times, _ipc_read_times = _ipc_read_times, IpcReadTimes()
+    return times
+
+
+@contextlib.contextmanager
+def capture_stderr() -> Iterator[list[str]]:
+    """Capture everything written to the standard error file descriptor.
+
+    Unlike redirecting `sys.stderr`, this also captures the output of native code,
+    such as the Rust core of Polars. The captured lines are available after the
+    context exits.
+    """
+    lines: list[str] = []
+    sys.stderr.flush()
+    saved_fd = os.dup(2)
+    with tempfile.TemporaryFile(mode="w+") as f:
+        os.dup2(f.fileno(), 2)
+        try:
+            yield lines
+        finally:
+            sys.stderr.flush()
+            os.dup2(saved_fd, 2)
+            os.close(saved_fd)
+            f.seek(0)
+            lines.extend(f.read().splitlines())
@@ -0,0 +1,84 @@
+"""Sampling of the resident memory of the benchmark process and its children."""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import TYPE_CHECKING
+
+import psutil
+
+if TYPE_CHECKING:
+    from types import TracebackType
+
+
+def get_rss() -> int:
+    """Return the resident set size in bytes of this process and all its children.
+
+    Children include e.g. the Spark JVM and Ray worker processes.
+    """
+    process = psutil.Process()
+    rss = process.memory_info().rss
+    for child in process.children(recursive=True):
+        try:
+            rss += child.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            # The child exited or is not ours to inspect
+            continue
+    return rss
+
+
+class MemorySampler:
+    """Sample the resident memory on a background thread while the context is active.
+
+    Parameters
+    ----------
+    interval
+        Time in seconds between two samples.
+    keep_timeline
+        Keep all samples, instead of only the peak.
+    """
+
+    def __init__(self, interval: float = 0.01, *, keep_timeline: bool = False):
+        self.interval = interval
+        self.keep_timeline = keep_timeline
+
+        self.baseline = 0
+        self.peak = 0
+        self.timeline: list[tuple[float, int]] = []
+
+        self._start = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @property
+    def delta(self) -> int:
+        """Peak memory in bytes allocated on top of the memory in use at the start."""
+        return self.peak - self.baseline
+
+    def __enter__(self) -> MemorySampler:
+        self._start = time.perf_counter()
+        self.baseline = self.peak = self._sample()
+        self._thread.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self) -> int:
+        rss = get_rss()
+        self.peak = max(self.peak, rss)
+        if self.keep_timeline:
+            self.timeline.append((time.perf_counter() - self._start, rss))
+        return rss
@@ -7,6 +7,10 @@ import modin.pandas as pd
 
 from queries.common_utils import (
     check_query_result_pd,
+    get_partition_filters,
+    get_table_dtypes,
+    get_table_files,
+    get_table_format,
     get_table_path,
     on_second_call,
     run_query_generic,
@@ -15,27 +19,51 @@ from settings import Settings
 
 if TYPE_CHECKING:
     from collections.abc import Callable
+    from pathlib import Path
+
+    from queries.common_utils import PartitionFilter
 
 settings = Settings()
 
 pd.options.mode.copy_on_write = True
 
 os.environ["MODIN_MEMORY"] = str(settings.run.modin_memory)
-
-
-def _read_ds(table_name: str) -> pd.DataFrame:
-    path = get_table_path(table_name)
-
-    if settings.run.io_type in ("parquet", "skip"):
-        return pd.read_parquet(path, dtype_backend="pyarrow")
-    elif settings.run.io_type == "csv":
-        df = pd.read_csv(path, dtype_backend="pyarrow")
-        # TODO: This is slow - we should use the known schema to read dates directly
-        for c in df.columns:
-            if c.endswith("date"):
-                df[c] = df[c].astype("date32[day][pyarrow]")
-        return df
-    elif settings.run.io_type == "feather":
+if settings.run.threads is not None:
+    os.environ["MODIN_CPUS"] = str(settings.run.threads)
+
+
+def _read_ds(
+    table_name: str, partition_filters: list[PartitionFilter] | None = None
+) -> pd.DataFrame:
+    if get_table_format() == "parquet":
+        # Modin distributes the files of partitioned tables over its workers, and
+        # skips the Hive partitions ruled out by the filters of partition columns
+        filters = get_partition_filters(table_name, partition_filters)
+        return pd.read_parquet(
+            get_table_path(table_name), dtype_backend="pyarrow", filters=filters or None
+        )
+
+    # Modin splits every file into partitions that its workers read concurrently
+    frames = [_read_file(table_name, path) for path in get_table_files(table_name)]
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, ignore_index=True)
+
+
+def _read_file(table_name: str, path: Path) -> pd.DataFrame:
+    table_format = get_table_format()
+    if table_format == "csv":
+        # The pyarrow engine parses the values, and dates, into Arrow arrays, which
+        # already have the types of the schema
+        return pd.read_csv(
+            path,
+            engine="pyarrow",
+            dtype_backend="pyarrow",
+            dtype=get_table_dtypes(table_name),
+        )
+    elif table_format == "feather":
+        # The workers of Modin read the files into their own memory, so they are not
+        # memory-mapped by the benchmark process
         return pd.read_feather(path, dtype_backend="pyarrow")
     else:
         msg = f"unsupported file type: {settings.run.io_type!r}"
@@ -43,13 +71,17 @@ def _read_ds(table_name: str) -> pd.DataFrame:
 
 
 @on_second_call
-def get_line_item_ds() -> pd.DataFrame:
-    return _read_ds("lineitem")
+def get_line_item_ds(
+    partition_filters: list[PartitionFilter] | None = None,
+) -> pd.DataFrame:
+    return _read_ds("lineitem", partition_filters)
 
 
 @on_second_call
-def get_orders_ds() -> pd.DataFrame:
-    return _read_ds("orders")
+def get_orders_ds(
+    partition_filters: list[PartitionFilter] | None = None,
+) -> pd.DataFrame:
+    return _read_ds("orders", partition_filters)
 
 
 @on_second_call
@@ -0,0 +1,57 @@
+"""Control of the OS page cache for the table files read by the queries."""
+
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+    from pathlib import Path
+
+# Size of the reads used to load files into the page cache
+_CHUNK_SIZE = 16 * 2**20
+
+
+def evict(paths: Iterable[Path]) -> int:
+    """Drop the given files from the page cache and return their total size in bytes.
+
+    Directories are evicted recursively, and paths that do not exist are ignored.
+    The kernel only drops clean pages, which is all pages of files that are read,
+    but not written, by the benchmarks.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        msg = "evicting files from the page cache is not supported on this platform"
+        raise RuntimeError(msg)
+
+    size = 0
+    for file in _iter_files(paths):
+        fd = os.open(file, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            size += os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+    return size
+
+
+def load(paths: Iterable[Path]) -> int:
+    """Read the given files into the page cache and return their total size in bytes.
+
+    Directories are loaded recursively, and paths that do not exist are ignored.
+    """
+    size = 0
+    buffer = bytearray(_CHUNK_SIZE)
+    for file in _iter_files(paths):
+        with file.open("rb", buffering=0) as f:
+            while n := f.readinto(buffer):  # type: ignore[attr-defined]
+                size += n
+    return size
+
+
+def _iter_files(paths: Iterable[Path]) -> Iterator[Path]:
+    for path in paths:
+        if path.is_dir():
+            yield from sorted(p for p in path.rglob("*") if p.is_file())
+        elif path.is_file():
+            yield path
@@ -8,26 +8,27 @@ from queries.pandas import utils
 if TYPE_CHECKING:
     import pandas as pd
 
+    from queries.common_utils import PartitionFilter
+
 Q_NUM = 3
 
 
 def q() -> None:
     customer_ds = utils.get_customer_ds
     line_item_ds = utils.get_line_item_ds
+    line_item_partitions: list[PartitionFilter] = [("l_shipyear", ">=", 1995)]
     orders_ds = utils.get_orders_ds
+    orders_partitions: list[PartitionFilter] = [("o_orderyear", "<=", 1995)]
 
     # first call one time to cache in case we don't include the IO times
     customer_ds()
-    line_item_ds()
-    orders_ds()
+    line_item_ds(line_item_partitions)
+    orders_ds(orders_partitions)
 
     def query() -> pd.DataFrame:
-        nonlocal customer_ds
-        nonlocal line_item_ds
-        nonlocal orders_ds
-        customer_ds = customer_ds()
-        line_item_ds = line_item_ds()
-        orders_ds = orders_ds()
+        customer_ds = utils.get_customer_ds()
+        line_item_ds = utils.get_line_item_ds(line_item_partitions)
+        orders_ds = utils.get_orders_ds(orders_partitions)
 
         var1 = "BUILDING"
         var2 = date(1995, 3, 15)
@@ -1,27 +1,30 @@
 from __future__ import annotations
 
 from datetime import date
+from typing import TYPE_CHECKING
 
 import pandas as pd
 
 from queries.pandas import utils
 
+if TYPE_CHECKING:
+    from queries.common_utils import PartitionFilter
+
 Q_NUM = 4
 
 
 def q() -> None:
     line_item_ds = utils.get_line_item_ds
     orders_ds = utils.get_orders_ds
+    orders_partitions: list[PartitionFilter] = [("o_orderyear", "=", 1993)]
 
     # first call one time to cache in case we don't include the IO times
     line_item_ds()
-    orders_ds()
+    orders_ds(orders_partitions)
 
     def query() -> pd.DataFrame:
-        nonlocal line_item_ds
-        nonlocal orders_ds
-        line_item_ds = line_item_ds()
-        orders_ds = orders_ds()
+        line_item_ds = utils.get_line_item_ds()
+        orders_ds = utils.get_orders_ds(orders_partitions)
 
         var1 = date(1993, 7, 1)
         var2 = date(1993, 10, 1)
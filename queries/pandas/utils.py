@@ -1,52 +1,96 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import TYPE_CHECKING, Any
 
 import pandas as pd
+import pyarrow as pa
 
 from queries.common_utils import (
     check_query_result_pd,
+    get_partition_filters,
+    get_table_dtypes,
+    get_table_files,
+    get_table_format,
     get_table_path,
+    is_hive_partitioned,
     on_second_call,
+    read_ipc_table,
     run_query_generic,
 )
 from settings import Settings
 
 if TYPE_CHECKING:
     from collections.abc import Callable
+    from pathlib import Path
+
+    from queries.common_utils import PartitionFilter
 
 settings = Settings()
 
 pd.options.mode.copy_on_write = True
 
+if settings.run.threads is not None:
+    # pandas computes single-threaded, only reading through PyArrow is parallel
+    pa.set_cpu_count(settings.run.threads)
+
+
+def _read_ds(
+    table_name: str, partition_filters: list[PartitionFilter] | None = None
+) -> pd.DataFrame:
+    if is_hive_partitioned(table_name):
+        # PyArrow discovers the partitions, skips those ruled out by the filters of
+        # the partition columns, and reads the files of the others concurrently
+        filters = get_partition_filters(table_name, partition_filters)
+        return pd.read_parquet(
+            get_table_path(table_name), dtype_backend="pyarrow", filters=filters or None
+        )
+
+    files = get_table_files(table_name)
+    if len(files) == 1:
+        return _read_file(table_name, files[0])
+
+    # Read the files of partitioned tables concurrently, PyArrow releases the GIL
+    with ThreadPoolExecutor(pa.cpu_count()) as executor:
+        frames = list(executor.map(partial(_read_file, table_name), files))
+    return pd.concat(frames, ignore_index=True)
 
-def _read_ds(table_name: str) -> pd.DataFrame:
-    path = get_table_path(table_name)
 
-    if settings.run.io_type in ("parquet", "skip"):
+def _read_file(table_name: str, path: Path) -> pd.DataFrame:
+    table_format = get_table_format()
+    if table_format == "parquet":
         return pd.read_parquet(path, dtype_backend="pyarrow")
-    elif settings.run.io_type == "csv":
-        df = pd.read_csv(path, dtype_backend="pyarrow")
-        # TODO: This is slow - we should use the known schema to read dates directly
-        for c in df.columns:
-            if c.endswith("date"):
-                df[c] = df[c].astype("date32[day][pyarrow]")  # type: ignore[call-overload]
-        return df
-    elif settings.run.io_type == "feather":
-        return pd.read_feather(path, dtype_backend="pyarrow")
+    elif table_format == "csv":
+        # The pyarrow engine parses the values, and dates, into Arrow arrays, which
+        # already have the types of the schema
+        return pd.read_csv(
+            path,
+            engine="pyarrow",
+            dtype_backend="pyarrow",
+            dtype=get_table_dtypes(table_name),
+        )
+    elif table_format == "feather":
+        # The columns wrap the Arrow arrays, which reference the mapped buffers of
+        # uncompressed files
+        return read_ipc_table(path).to_pandas(types_mapper=pd.ArrowDtype)
     else:
         msg = f"unsupported file type: {settings.run.io_type!r}"
         raise ValueError(msg)
 
 
 @on_second_call
-def get_line_item_ds() -> pd.DataFrame:
-    return _read_ds("lineitem")
+def get_line_item_ds(
+    partition_filters: list[PartitionFilter] | None = None,
+) -> pd.DataFrame:
+    return _read_ds("lineitem", partition_filters)
 
 
 @on_second_call
-def get_orders_ds() -> pd.DataFrame:
-    return _read_ds("orders")
+def get_orders_ds(
+    partition_filters: list[PartitionFilter] | None = None,
+) -> pd.DataFrame:
+    return _read_ds("orders", partition_filters)
 
 
 @on_second_call
@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from types import ModuleType
+
+
+def run_module(module: ModuleType) -> None:
+    """Run the query defined in the given Polars query module."""
+    # Imported lazily so that importing the package does not import Polars
+    from queries.polars import utils
+
+    utils.run_query(module.Q_NUM, module.q())
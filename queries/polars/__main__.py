@@ -1,4 +1,5 @@
 from queries.common_utils import execute_all
+from queries.polars import run_module
 
 if __name__ == "__main__":
-    execute_all("polars")
+    execute_all("polars", run_module=run_module)
@@ -10,7 +10,9 @@ Q_NUM = 1
 
 def q(lineitem: None | pl.LazyFrame = None, **kwargs: Any) -> pl.LazyFrame:
     if lineitem is None:
-        lineitem = utils.get_line_item_ds()
+        lineitem = utils.get_line_item_ds(
+            partition_filters=[("l_shipyear", "<=", 1998)]
+        )
 
     var1 = date(1998, 9, 2)
 
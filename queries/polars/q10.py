@@ -19,7 +19,7 @@ def q(
         customer = utils.get_customer_ds()
         lineitem = utils.get_line_item_ds()
         nation = utils.get_nation_ds()
-        orders = utils.get_orders_ds()
+        orders = utils.get_orders_ds(partition_filters=[("o_orderyear", "=", 1993)])
 
     assert customer is not None
     assert lineitem is not None
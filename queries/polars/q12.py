@@ -14,7 +14,9 @@ def q(
     **kwargs: Any,
 ) -> pl.LazyFrame:
     if lineitem is None:
-        lineitem = utils.get_line_item_ds()
+        lineitem = utils.get_line_item_ds(
+            partition_filters=[("l_shipyear", "<=", 1994)]
+        )
         orders = utils.get_orders_ds()
 
     assert lineitem is not None
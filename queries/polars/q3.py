@@ -16,8 +16,10 @@ def q(
 ) -> pl.LazyFrame:
     if customer is None:
         customer = utils.get_customer_ds()
-        lineitem = utils.get_line_item_ds()
-        orders = utils.get_orders_ds()
+        lineitem = utils.get_line_item_ds(
+            partition_filters=[("l_shipyear", ">=", 1995)]
+        )
+        orders = utils.get_orders_ds(partition_filters=[("o_orderyear", "<=", 1995)])
 
     assert customer is not None
     assert lineitem is not None
@@ -15,7 +15,7 @@ def q(
 ) -> pl.LazyFrame:
     if lineitem is None:
         lineitem = utils.get_line_item_ds()
-        orders = utils.get_orders_ds()
+        orders = utils.get_orders_ds(partition_filters=[("o_orderyear", "=", 1993)])
 
     assert lineitem is not None
     assert orders is not None
@@ -23,7 +23,7 @@ def q(
         customer = utils.get_customer_ds()
         lineitem = utils.get_line_item_ds()
         nation = utils.get_nation_ds()
-        orders = utils.get_orders_ds()
+        orders = utils.get_orders_ds(partition_filters=[("o_orderyear", "=", 1994)])
         region = utils.get_region_ds()
         supplier = utils.get_supplier_ds()
 
@@ -13,7 +13,7 @@ def q(
     **kwargs: Any,
 ) -> pl.LazyFrame:
     if lineitem is None:
-        lineitem = utils.get_line_item_ds()
+        lineitem = utils.get_line_item_ds(partition_filters=[("l_shipyear", "=", 1994)])
 
     var1 = date(1994, 1, 1)
     var2 = date(1995, 1, 1)
@@ -1,41 +1,103 @@
+import operator
+import os
 import pathlib
+import re
 import tempfile
+import warnings
 from typing import Literal
 
 import polars as pl
 
 from queries.common_utils import (
+    PartitionFilter,
     check_query_result_pl,
+    get_partition_filters,
+    get_table_files,
     get_table_path,
+    get_table_schema,
+    is_hive_partitioned,
+    log_operator_profile,
+    log_scan_stats,
+    read_ipc_table,
     run_query_generic,
 )
 from settings import Settings
 
 settings = Settings()
 
+if settings.run.threads is not None:
+    # Polars reads this when its thread pool starts, which happens on first use
+    os.environ["POLARS_MAX_THREADS"] = str(settings.run.threads)
+    if pl.thread_pool_size() != settings.run.threads:
+        warnings.warn(
+            "the Polars thread pool was started before RUN_THREADS could be applied",
+            stacklevel=1,
+        )
 
-def _scan_ds(table_name: str) -> pl.LazyFrame:
-    path = get_table_path(table_name)
 
-    if settings.run.io_type == "skip":
-        return pl.read_parquet(path, rechunk=True).lazy()
-    if settings.run.io_type == "parquet":
-        return pl.scan_parquet(path)
+def _scan_ds(
+    table_name: str, partition_filters: list[PartitionFilter] | None = None
+) -> pl.LazyFrame:
+    # The files of partitioned tables are scanned concurrently
+    path: pathlib.Path | list[pathlib.Path] = get_table_files(table_name)
+    hive = is_hive_partitioned(table_name)
+    if hive:
+        # Discover the partition columns from the directories of the table
+        path = get_table_path(table_name)
+
+    if settings.run.io_type == "skip" and settings.run.skip_format == "feather":
+        # The buffers of uncompressed files stay memory-mapped, only string columns
+        # are copied to the string views of Polars
+        lf = pl.concat(
+            [pl.DataFrame(read_ipc_table(f)) for f in get_table_files(table_name)]
+        ).lazy()
+    elif settings.run.io_type == "skip":
+        lf = pl.read_parquet(path, rechunk=True, hive_partitioning=hive).lazy()
+    elif settings.run.io_type == "parquet":
+        lf = pl.scan_parquet(path, hive_partitioning=hive)
     elif settings.run.io_type == "feather":
-        return pl.scan_ipc(path)
+        # Polars memory-maps uncompressed files, and only reads projected columns
+        lf = pl.scan_ipc(path, memory_map=True)
     elif settings.run.io_type == "csv":
-        return pl.scan_csv(path, try_parse_dates=True)
+        schema = {c: _POLARS_TYPES[t] for c, t in get_table_schema(table_name).items()}
+        lf = pl.scan_csv(path, schema=schema)
     else:
         msg = f"unsupported file type: {settings.run.io_type!r}"
         raise ValueError(msg)
 
+    # Filters of partition columns are pushed down to prune partitions
+    for column, op, value in get_partition_filters(table_name, partition_filters):
+        lf = lf.filter(_PARTITION_OPERATORS[op](pl.col(column), value))
+    return lf
+
+
+# Types of the columns of CSV files, see `get_table_schema`
+_POLARS_TYPES = {
+    "int64": pl.Int64,
+    "float64": pl.Float64,
+    "string": pl.String,
+    "date": pl.Date,
+}
 
-def get_line_item_ds() -> pl.LazyFrame:
-    return _scan_ds("lineitem")
+_PARTITION_OPERATORS = {
+    "=": operator.eq,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
 
 
-def get_orders_ds() -> pl.LazyFrame:
-    return _scan_ds("orders")
+def get_line_item_ds(
+    partition_filters: list[PartitionFilter] | None = None,
+) -> pl.LazyFrame:
+    return _scan_ds("lineitem", partition_filters)
+
+
+def get_orders_ds(
+    partition_filters: list[PartitionFilter] | None = None,
+) -> pl.LazyFrame:
+    return _scan_ds("orders", partition_filters)
 
 
 def get_customer_ds() -> pl.LazyFrame:
@@ -159,7 +221,11 @@ def run_query(query_number: int, lf: pl.LazyFrame) -> None:
 
     # Define the timed query function.  By default we collect and discard the DataFrame;
     # only build/return a DataFrame when showing or checking results.
-    if not (settings.run.show_results or settings.run.check_results):
+    if not (
+        settings.run.show_results
+        or settings.run.check_results
+        or settings.run.write_answers
+    ):
         if cloud:
             import os
             import polars_cloud as pc
@@ -235,13 +301,109 @@ def run_query(query_number: int, lf: pl.LazyFrame) -> None:
     else:
         library_name = "polars"
 
-    try:
-        run_query_generic(
-            query,
-            query_number,
-            library_name,
-            library_version=pl.__version__,
-            query_checker=check_query_result_pl,
-        )
-    except Exception as e:
-        print(f"q{query_number} FAILED\n{e}")
+    # Failures reach the caller, which reports them, e.g. as a failed query of a
+    # throughput stream
+    run_query_generic(
+        query,
+        query_number,
+        library_name,
+        library_version=pl.__version__,
+        query_checker=check_query_result_pl,
+    )
+    if settings.run.polars_profile:
+        _profile_query(lf, query_number, library_name, engine, eager=eager)
+    if settings.run.track_io and not cloud:
+        _report_scan_stats(lf, query_number, library_name, engine, eager=eager)
+
+
+def _profile_query(
+    lf: pl.LazyFrame,
+    query_number: int,
+    library_name: str,
+    engine: pl.GPUEngine | Literal["in-memory", "streaming", "old-streaming"],
+    *,
+    eager: bool,
+) -> None:
+    """Run the query once more through the profiler and report the time per operator."""
+    if settings.run.polars_cloud:
+        msg = "cannot profile queries running on Polars Cloud"
+        raise ValueError(msg)
+
+    _, profile = lf.profile(no_optimization=eager, engine=engine)  # type: ignore[arg-type]
+
+    # Nodes of the plan may run in parallel, so their times can add up to more than
+    # the duration of the query. Shares are relative to the total time of all nodes.
+    shares = (
+        profile.group_by(operator=pl.col("node").str.extract(r"^([^(]*)"))
+        .agg((pl.col("end") - pl.col("start")).sum().alias("share"))
+        .with_columns(pl.col("share") / pl.col("share").sum())
+        .sort("share", descending=True)
+    )
+    summary = ", ".join(f"{op} {share:.1%}" for op, share in shares.iter_rows())
+    print(f"Profile of {library_name} query {query_number}: {summary}")
+
+    if settings.run.log_timings:
+        nodes = [
+            {
+                "node_id": node_id,
+                "node": node,
+                # Name of the node without its arguments, e.g. `join` for `join(a)`
+                "operator": node.split("(", 1)[0],
+                # The profiler reports microseconds
+                "start": start / 1e6,
+                "end": end / 1e6,
+                "duration": (end - start) / 1e6,
+            }
+            for node_id, (node, start, end) in enumerate(profile.rows())
+        ]
+        log_operator_profile(library_name, pl.__version__, query_number, nodes)
+
+
+_PROJECTION_LOG = re.compile(r"\[ParquetFileReader\]: project: (\d+) / (\d+)")
+_ROW_GROUPS_LOG = re.compile(r"Predicate pushdown: reading (\d+) / (\d+) row groups")
+
+
+def _report_scan_stats(
+    lf: pl.LazyFrame,
+    query_number: int,
+    library_name: str,
+    engine: pl.GPUEngine | Literal["in-memory", "streaming", "old-streaming"],
+    *,
+    eager: bool,
+) -> None:
+    """Run the query once more and report the columns and row groups it read.
+
+    Polars only reports these in its verbose log of the Parquet reader. Row groups
+    are reported for the scans with a predicate pushed down to the reader.
+    """
+    from queries.io_stats import capture_stderr
+
+    with capture_stderr() as lines, pl.Config(verbose=True):
+        lf.collect(no_optimization=eager, engine=engine)  # type: ignore[arg-type]
+
+    stats = {
+        "scans": 0,
+        "columns_read": 0,
+        "columns_total": 0,
+        "filtered_scans": 0,
+        "row_groups_read": 0,
+        "row_groups_total": 0,
+    }
+    for line in lines:
+        if (match := _PROJECTION_LOG.search(line)) is not None:
+            stats["scans"] += 1
+            stats["columns_read"] += int(match.group(1))
+            stats["columns_total"] += int(match.group(2))
+        elif (match := _ROW_GROUPS_LOG.search(line)) is not None:
+            stats["filtered_scans"] += 1
+            stats["row_groups_read"] += int(match.group(1))
+            stats["row_groups_total"] += int(match.group(2))
+
+    print(
+        f"Scans of {library_name} query {query_number}: {stats['scans']} files, "
+        f"{stats['columns_read']}/{stats['columns_total']} columns, "
+        f"{stats['row_groups_read']}/{stats['row_groups_total']} row groups "
+        f"of {stats['filtered_scans']} filtered scans"
+    )
+    if settings.run.log_timings:
+        log_scan_stats(library_name, pl.__version__, query_number, stats)
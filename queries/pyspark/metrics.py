@@ -0,0 +1,158 @@
+"""Collection of task metrics of the queries run on the local Spark session.
+
+Every run of a query is assigned its own job group, named after the suite iteration,
+page cache state and iteration of the run. After the query, the metrics of all stages
+of the jobs in that group are read from the REST API of the Spark UI and summed up.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+import urllib.request
+from typing import TYPE_CHECKING, Any
+
+from queries.common_utils import get_timed_run, settings
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from pyspark.sql import SparkSession
+
+    from queries.common_utils import TimedRun
+
+# Jobs are reported by the REST API once the listener bus has processed their
+# events, which happens asynchronously
+_POLL_INTERVAL = 0.05
+_POLL_TIMEOUT = 10.0
+
+
+class SparkMetricsCollector:
+    """Collect the task metrics of every run of a query.
+
+    Parameters
+    ----------
+    spark
+        The Spark session running the query.
+    query_number
+        The number of the query, used to name its job groups.
+    """
+
+    def __init__(self, spark: SparkSession, query_number: int):
+        self.spark = spark
+        self.query_number = query_number
+        # The job groups of the timed runs of the query, the warmup runs are not
+        # reported
+        self.timed_runs: list[tuple[str, TimedRun]] = []
+        self._warmups = 0
+
+        sc = spark.sparkContext
+        if sc.uiWebUrl is None:
+            msg = "cannot collect Spark metrics with the Spark UI disabled"
+            raise RuntimeError(msg)
+        self._api_url = f"{sc.uiWebUrl}/api/v1/applications/{sc.applicationId}"
+
+    def wrap(self, query: Callable[[], Any]) -> Callable[[], Any]:
+        """Return the query, running every call in a new job group."""
+
+        def run() -> Any:
+            job_group = f"q{self.query_number}-s{settings.run.suite_iteration}"
+            timed_run = get_timed_run()
+            if timed_run is None:
+                self._warmups += 1
+                job_group += f"-warmup-{self._warmups}"
+            else:
+                job_group += f"-{timed_run.cache or 'os'}-{timed_run.iteration}"
+                self.timed_runs.append((job_group, timed_run))
+            self.spark.sparkContext.setJobGroup(job_group, job_group)
+            try:
+                return query()
+            finally:
+                # Unset the job group, so later jobs are not attributed to the query
+                self.spark.sparkContext.setLocalProperty(
+                    "spark.jobGroup.id",
+                    None,  # type: ignore[arg-type]
+                )
+
+        return run
+
+    def collect(self, job_group: str) -> dict[str, Any]:
+        """Sum up the metrics of all stages run by the jobs of the job group.
+
+        See `sum_stage_metrics`, stages are skipped if their output was reused from
+        an earlier job.
+        """
+        jobs = self._wait_for_jobs(job_group)
+        stage_ids = sorted({stage_id for job in jobs for stage_id in job["stageIds"]})
+        # One entry per attempt of every stage
+        stages = [stage for i in stage_ids for stage in self._get(f"stages/{i}")]
+        return sum_stage_metrics(jobs, stages)
+
+    def _wait_for_jobs(self, job_group: str) -> list[dict[str, Any]]:
+        deadline = time.monotonic() + _POLL_TIMEOUT
+        while True:
+            jobs = [j for j in self._get("jobs") if j.get("jobGroup") == job_group]
+            if jobs and all(j["status"] != "RUNNING" for j in jobs):
+                return jobs
+            if time.monotonic() > deadline:
+                msg = f"timed out waiting for the jobs of job group {job_group!r}"
+                raise TimeoutError(msg)
+            time.sleep(_POLL_INTERVAL)
+
+    def _get(self, endpoint: str) -> Any:
+        with urllib.request.urlopen(f"{self._api_url}/{endpoint}") as response:
+            return json.load(response)
+
+
+def sum_stage_metrics(
+    jobs: list[dict[str, Any]], stages: list[dict[str, Any]]
+) -> dict[str, Any]:
+    """Sum up the metrics of stages, as returned by the REST API of the Spark UI.
+
+    Parameters
+    ----------
+    jobs
+        The jobs that ran the stages, as returned by the `jobs` endpoint.
+    stages
+        Every attempt of the stages, as returned by the `stages/<id>` endpoints.
+
+    Returns
+    -------
+    dict
+        The number of jobs, stages and tasks and the sums of the task metrics, times
+        in seconds and sizes in bytes, except the peak execution memory, which is
+        the maximum over the stages. Skipped stages are not counted.
+    """
+    metrics = {
+        "jobs": len(jobs),
+        "stages": 0,
+        "tasks": 0,
+        "failed_tasks": 0,
+        "task_time": 0.0,
+        "cpu_time": 0.0,
+        "gc_time": 0.0,
+        "input_bytes": 0,
+        "shuffle_read_bytes": 0,
+        "shuffle_write_bytes": 0,
+        "memory_spilled_bytes": 0,
+        "disk_spilled_bytes": 0,
+        "peak_execution_memory": 0,
+    }
+    for stage in stages:
+        if stage["status"] == "SKIPPED":
+            continue
+        metrics["stages"] += 1
+        metrics["tasks"] += stage["numCompleteTasks"]
+        metrics["failed_tasks"] += stage["numFailedTasks"]
+        metrics["task_time"] += stage["executorRunTime"] / 1e3
+        metrics["cpu_time"] += stage["executorCpuTime"] / 1e9
+        metrics["gc_time"] += stage.get("jvmGcTime", 0) / 1e3
+        metrics["input_bytes"] += stage["inputBytes"]
+        metrics["shuffle_read_bytes"] += stage["shuffleReadBytes"]
+        metrics["shuffle_write_bytes"] += stage["shuffleWriteBytes"]
+        metrics["memory_spilled_bytes"] += stage["memoryBytesSpilled"]
+        metrics["disk_spilled_bytes"] += stage["diskBytesSpilled"]
+        metrics["peak_execution_memory"] = max(
+            metrics["peak_execution_memory"], stage.get("peakExecutionMemory", 0)
+        )
+    return metrics
@@ -28,7 +28,7 @@ def q() -> None:
         l_linestatus
     """
 
-    utils.get_line_item_ds()
+    utils.get_line_item_ds(partition_filters=[("l_shipyear", "<=", 1998)])
 
     q_final = utils.get_or_create_spark().sql(query_str)
 
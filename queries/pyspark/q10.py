@@ -40,7 +40,7 @@ def q() -> None:
 	"""
 
     utils.get_customer_ds()
-    utils.get_orders_ds()
+    utils.get_orders_ds(partition_filters=[("o_orderyear", "=", 1993)])
     utils.get_line_item_ds()
     utils.get_nation_ds()
 
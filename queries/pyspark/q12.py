@@ -35,7 +35,7 @@ def q() -> None:
         l_shipmode
 	"""
 
-    utils.get_line_item_ds()
+    utils.get_line_item_ds(partition_filters=[("l_shipyear", "<=", 1994)])
     utils.get_orders_ds()
 
     q_final = utils.get_or_create_spark().sql(query_str)
@@ -20,7 +20,9 @@ def q() -> None:
         and l_shipdate < date '1995-09-01' + interval '1' month
 	"""
 
-    utils.get_line_item_ds()
+    utils.get_line_item_ds(
+        partition_filters=[("l_shipyear", "=", 1995), ("l_shipmonth", "=", 9)]
+    )
     utils.get_part_ds()
 
     q_final = utils.get_or_create_spark().sql(query_str)
@@ -31,8 +31,8 @@ def q() -> None:
     """
 
     utils.get_customer_ds()
-    utils.get_orders_ds()
-    utils.get_line_item_ds()
+    utils.get_orders_ds(partition_filters=[("o_orderyear", "<=", 1995)])
+    utils.get_line_item_ds(partition_filters=[("l_shipyear", ">=", 1995)])
 
     q_final = utils.get_or_create_spark().sql(query_str)
 
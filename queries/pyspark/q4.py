@@ -28,7 +28,7 @@ def q() -> None:
         o_orderpriority
     """
 
-    utils.get_orders_ds()
+    utils.get_orders_ds(partition_filters=[("o_orderyear", "=", 1993)])
     utils.get_line_item_ds()
 
     q_final = utils.get_or_create_spark().sql(query_str)
@@ -16,7 +16,7 @@ def q() -> None:
         and l_quantity < 24
     """
 
-    utils.get_line_item_ds()
+    utils.get_line_item_ds(partition_filters=[("l_shipyear", "=", 1994)])
 
     q_final = utils.get_or_create_spark().sql(query_str)
 
@@ -6,7 +6,13 @@ from pyspark.sql import SparkSession
 
 from queries.common_utils import (
     check_query_result_pd,
+    get_partition_filters,
+    get_table_files,
     get_table_path,
+    get_table_schema,
+    is_hive_partitioned,
+    log_engine_metrics,
+    read_ipc_table,
     run_query_generic,
 )
 from settings import Settings
@@ -14,13 +20,16 @@ from settings import Settings
 if TYPE_CHECKING:
     from pyspark.sql import DataFrame
 
+    from queries.common_utils import PartitionFilter
+    from queries.pyspark.metrics import SparkMetricsCollector
+
 settings = Settings()
 
 
 def get_or_create_spark() -> SparkSession:
     spark = (
         SparkSession.builder.appName("spark_queries")
-        .master("local[*]")
+        .master(f"local[{settings.run.threads or '*'}]")
         .config("spark.driver.memory", settings.run.spark_driver_memory)
         .config("spark.executor.memory", settings.run.spark_executor_memory)
         .config("spark.log.level", settings.run.spark_log_level)
@@ -29,32 +38,68 @@ def get_or_create_spark() -> SparkSession:
     return spark
 
 
-def _read_ds(table_name: str) -> DataFrame:
+def _read_ds(
+    table_name: str, partition_filters: list[PartitionFilter] | None = None
+) -> DataFrame:
     if settings.run.io_type == "skip":
         # TODO: Persist data in memory before query
         msg = "cannot run PySpark starting from an in-memory representation"
         raise RuntimeError(msg)
 
-    path = get_table_path(table_name)
+    # Spark splits the files of partitioned tables into tasks that run concurrently
+    paths = [str(f) for f in get_table_files(table_name)]
+    if is_hive_partitioned(table_name):
+        # Discover the partition columns from the directories of the table
+        paths = [str(get_table_path(table_name))]
 
     if settings.run.io_type == "parquet":
-        df = get_or_create_spark().read.parquet(str(path))
+        df = get_or_create_spark().read.parquet(*paths)
     elif settings.run.io_type == "csv":
-        df = get_or_create_spark().read.csv(str(path), header=True, inferSchema=True)
+        # Parse the values, and dates, into the types of the schema, instead of
+        # reading the files once more to infer them
+        schema = ", ".join(
+            f"{c} {_SPARK_TYPES[t]}" for c, t in get_table_schema(table_name).items()
+        )
+        df = get_or_create_spark().read.csv(paths, header=True, schema=schema)
+    elif settings.run.io_type == "feather":
+        import pyarrow as pa
+
+        # Spark has no reader of Arrow IPC files, so the memory-mapped tables are
+        # sent to the JVM when the table is loaded, before the query is timed
+        tables = [read_ipc_table(path) for path in get_table_files(table_name)]
+        df = get_or_create_spark().createDataFrame(pa.concat_tables(tables))
     else:
         msg = f"unsupported file type: {settings.run.io_type!r}"
         raise ValueError(msg)
 
+    # Filters of partition columns are pushed down to prune partitions
+    filters = get_partition_filters(table_name, partition_filters)
+    if filters:
+        df = df.filter(" and ".join(f"{c} {op} {v}" for c, op, v in filters))
+
     df.createOrReplaceTempView(table_name)
     return df
 
 
-def get_line_item_ds() -> DataFrame:
-    return _read_ds("lineitem")
+# Types of the columns of CSV files, see `get_table_schema`
+_SPARK_TYPES = {
+    "int64": "BIGINT",
+    "float64": "DOUBLE",
+    "string": "STRING",
+    "date": "DATE",
+}
+
+
+def get_line_item_ds(
+    partition_filters: list[PartitionFilter] | None = None,
+) -> DataFrame:
+    return _read_ds("lineitem", partition_filters)
 
 
-def get_orders_ds() -> DataFrame:
-    return _read_ds("orders")
+def get_orders_ds(
+    partition_filters: list[PartitionFilter] | None = None,
+) -> DataFrame:
+    return _read_ds("orders", partition_filters)
 
 
 def get_customer_ds() -> DataFrame:
@@ -83,6 +128,42 @@ def get_part_supp_ds() -> DataFrame:
 
 def run_query(query_number: int, df: DataFrame) -> None:
     query = df.toPandas
+    collector = None
+    if settings.run.spark_metrics:
+        from queries.pyspark.metrics import SparkMetricsCollector
+
+        collector = SparkMetricsCollector(get_or_create_spark(), query_number)
+        query = collector.wrap(query)
+
     run_query_generic(
         query, query_number, "pyspark", query_checker=check_query_result_pd
     )
+
+    if collector is not None:
+        _report_metrics(collector)
+
+
+def _report_metrics(collector: SparkMetricsCollector) -> None:
+    """Report the Spark metrics of every timed run of the query."""
+    for job_group, run in collector.timed_runs:
+        m = collector.collect(job_group)
+        label = f"[iter {run.iteration}]"
+        if run.cache is not None:
+            label = f"[{run.cache} cache] {label}"
+        print(
+            f"Spark metrics of query {collector.query_number} {label}: "
+            f"{m['stages']} stages, {m['tasks']} tasks, "
+            f"task time {m['task_time']:.2f} s, GC {m['gc_time']:.2f} s, "
+            f"shuffle read {m['shuffle_read_bytes'] / 2**20:.1f} MiB, "
+            f"shuffle write {m['shuffle_write_bytes'] / 2**20:.1f} MiB, "
+            f"spilled {m['disk_spilled_bytes'] / 2**20:.1f} MiB to disk"
+        )
+        if settings.run.log_timings:
+            log_engine_metrics(
+                solution="pyspark",
+                version=collector.spark.version,
+                query_number=collector.query_number,
+                iteration=run.iteration,
+                metrics=m,
+                cache=run.cache,
+            )
@@ -0,0 +1,172 @@
+"""Structured store of benchmark measurements.
+
+Every measurement is appended as one JSON record to
+`<paths.timings>/<paths.results_dirname>/<run id>/<process id>.jsonl`. Records are
+flat: besides the fields of the measurement itself, each record holds a snapshot of
+the settings (`settings.<group>.<name>`) and a fingerprint of the host
+(`host.<name>`), so results of different runs and machines can be compared later.
+
+Durations are in seconds and memory sizes in bytes.
+
+Read all records into a Polars DataFrame with:
+
+```python
+from queries.results import read_results
+
+df = read_results()
+df.filter(kind="query").group_by("solution", "query_number").agg(
+    pl.col("duration").median()
+)
+```
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+import os
+import platform
+import socket
+import subprocess
+import uuid
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import polars as pl
+
+    from settings import Settings
+
+REPO_ROOT = Path(__file__).parent.parent
+
+
+def get_run_id(settings: Settings) -> str:
+    """Return the identifier of the current benchmark run.
+
+    The identifier is generated on first use and exported as `RUN_RUN_ID`, so that
+    the processes started for the same run report under the same identifier.
+    """
+    if not settings.run.run_id:
+        now = datetime.now(UTC)
+        settings.run.run_id = f"{now:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        os.environ["RUN_RUN_ID"] = settings.run.run_id
+    return settings.run.run_id
+
+
+def log_result(settings: Settings, kind: str, **fields: Any) -> None:
+    """Append a measurement of the given kind to the results store."""
+    record = {
+        "run_id": get_run_id(settings),
+        "timestamp": datetime.now(UTC).isoformat(),
+        "kind": kind,
+        "suite_iteration": settings.run.suite_iteration,
+        "io_type": settings.run.io_type,
+        "include_io": settings.run.include_io,
+        "layout": settings.run.layout,
+        "scale_factor": settings.scale_factor,
+        **fields,
+        **_flatten("settings", _settings_snapshot(settings)),
+        **_flatten("host", get_host_info()),
+    }
+
+    path = (
+        settings.paths.timings
+        / settings.paths.results_dirname
+        / settings.run.run_id
+        / f"{os.getpid()}.jsonl"
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def read_results(path: Path | None = None) -> pl.DataFrame:
+    """Read all records below the given path into a DataFrame.
+
+    Parameters
+    ----------
+    path
+        A results file, or a directory that is searched recursively for results
+        files. Defaults to the results store of the current settings.
+    """
+    import polars as pl
+
+    if path is None:
+        from settings import Settings
+
+        settings = Settings()
+        path = settings.paths.timings / settings.paths.results_dirname
+
+    files = [path] if path.is_file() else sorted(path.glob("**/*.jsonl"))
+    if not files:
+        return pl.DataFrame()
+
+    # Records of different kinds and versions of the store have different fields
+    frames = [pl.read_ndjson(f, infer_schema_length=None) for f in files]
+    return pl.concat(frames, how="diagonal_relaxed")
+
+
+@functools.cache
+def get_host_info() -> dict[str, Any]:
+    """Describe the machine and the code revision the benchmarks run on."""
+    info = {
+        "hostname": socket.gethostname(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_model": _get_cpu_model(),
+        "cpu_count": os.cpu_count(),
+        "memory_total": _get_memory_total(),
+        "python_version": platform.python_version(),
+    }
+    # Identifies the hardware, independent of the software installed on it
+    hardware = [info[k] for k in ("hostname", "machine", "cpu_model", "cpu_count")]
+    info["fingerprint"] = hashlib.sha1(
+        json.dumps([*hardware, info["memory_total"]]).encode()
+    ).hexdigest()[:12]
+
+    info["git_revision"] = _git("rev-parse", "HEAD")
+    status = _git("status", "--porcelain", "--untracked-files=no")
+    info["git_dirty"] = None if status is None else bool(status)
+    return info
+
+
+def _settings_snapshot(settings: Settings) -> dict[str, Any]:
+    return settings.model_dump(mode="json", exclude={"exasol": {"password"}})
+
+
+def _flatten(prefix: str, value: Any) -> dict[str, Any]:
+    if not isinstance(value, dict):
+        return {prefix: value}
+    flat = {}
+    for k, v in value.items():
+        flat.update(_flatten(f"{prefix}.{k}", v))
+    return flat
+
+
+def _get_cpu_model() -> str:
+    cpuinfo = Path("/proc/cpuinfo")
+    if cpuinfo.exists():
+        for line in cpuinfo.read_text().splitlines():
+            if line.startswith("model name"):
+                return line.split(":", 1)[1].strip()
+    return platform.processor()
+
+
+def _get_memory_total() -> int | None:
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        # Not available on this platform
+        return None
+
+
+def _git(*args: str) -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", *args], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
@@ -0,0 +1,226 @@
+"""Startup benchmark, measuring the cost of starting to query with a library.
+
+Every repetition starts a fresh interpreter, which runs the first query of the
+library and times every step it takes to get there:
+
+- `interpreter`: starting the interpreter, until it runs the benchmark code
+- `import`: importing the library itself, e.g. `polars` or `pyspark.sql`
+- `import_harness`: importing the query helpers of the benchmarks
+- `engine_init`: initializing the engine, e.g. the Spark session or Ray
+- `first_query`: building, running and checking the first query
+- `total`: all of the above, from launching the interpreter
+
+Separately, the import of the library is broken down by top-level package with
+`python -X importtime`.
+"""
+
+from __future__ import annotations
+
+# Only the standard library is imported at the top, so the worker can time the
+# imports of everything else
+import importlib
+import re
+import statistics
+import subprocess
+import sys
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from types import ModuleType
+
+COMPONENTS = [
+    "interpreter",
+    "import",
+    "import_harness",
+    "engine_init",
+    "first_query",
+    "total",
+]
+
+# Module imported by the query helpers of every library
+ENGINE_MODULES = {
+    "polars": "polars",
+    "duckdb": "duckdb",
+    "pandas": "pandas",
+    "modin": "modin.pandas",
+    "dask": "dask.dataframe",
+    "pyspark": "pyspark.sql",
+    "exasol": "pyexasol",
+}
+
+# Self and cumulative time in microseconds, and the name of an imported module
+_IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|\s+(\S+)")
+
+
+def execute_startup(library_name: str, query_numbers: list[int]) -> None:
+    """Run the startup benchmark of the given library.
+
+    Each of `RUN_ITERATIONS` repetitions runs the first implemented query in a
+    fresh interpreter.
+    """
+    from queries.common_utils import log_result, settings
+
+    query_number = query_numbers[0]
+    n = settings.run.iterations
+
+    runs = []
+    for iteration in range(1, n + 1):
+        timings = _run_worker_process(library_name, query_number)
+        runs.append(timings)
+        print(
+            f"Startup of {library_name} [iter {iteration}/{n}]: "
+            + ", ".join(f"{c} {timings[c]:.3f} s" for c in COMPONENTS)
+        )
+        if settings.run.log_timings:
+            for component in COMPONENTS:
+                log_result(
+                    settings,
+                    "cold_start",
+                    solution=library_name,
+                    query_number=query_number,
+                    iteration=iteration,
+                    component=component,
+                    duration=timings[component],
+                )
+
+    if n > 1:
+        print(
+            f"Startup of {library_name} median over {n} runs: "
+            + ", ".join(
+                f"{c} {statistics.median(r[c] for r in runs):.3f} s" for c in COMPONENTS
+            )
+        )
+
+    packages = get_import_times(ENGINE_MODULES[library_name])
+    top = sorted(packages.items(), key=lambda x: x[1], reverse=True)[:10]
+    print(
+        f"Import of {ENGINE_MODULES[library_name]} by package: "
+        + ", ".join(f"{p} {t:.3f} s" for p, t in top)
+    )
+    if settings.run.log_timings:
+        for package, duration in packages.items():
+            log_result(
+                settings,
+                "import_time",
+                solution=library_name,
+                module=ENGINE_MODULES[library_name],
+                package=package,
+                duration=duration,
+            )
+
+
+def get_import_times(module: str) -> dict[str, float]:
+    """Return the import time of the module in seconds, per top-level package.
+
+    Modules that the interpreter imports at startup anyway are not counted.
+    """
+    baseline = {name for name, _ in _import_times("pass")}
+    times: dict[str, float] = {}
+    for name, self_time in _import_times(f"import {module}"):
+        if name in baseline:
+            continue
+        package = name.split(".", 1)[0]
+        times[package] = times.get(package, 0.0) + self_time
+    return times
+
+
+def _import_times(code: str) -> list[tuple[str, float]]:
+    """Return the self time in seconds of every module imported by the code."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = []
+    for line in out.stderr.splitlines():
+        match = _IMPORT_TIME_LINE.match(line)
+        if match is not None:
+            times.append((match.group(3), int(match.group(1)) / 1e6))
+    return times
+
+
+def _run_worker_process(library_name: str, query_number: int) -> dict[str, float]:
+    launched_at = time.time()
+    out = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "queries.startup",
+            library_name,
+            str(query_number),
+            str(launched_at),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # The worker reports its timings on the last line of its output
+    *_, last_line = out.stdout.splitlines()
+    return dict(zip(COMPONENTS, map(float, last_line.split()), strict=True))
+
+
+def _run_worker(library_name: str, query_number: int, launched_at: float) -> None:
+    """Run the first query in this fresh interpreter, timing every step."""
+    timings = {"interpreter": time.time() - launched_at}
+
+    start = time.perf_counter()
+    importlib.import_module(ENGINE_MODULES[library_name])
+    timings["import"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    package = importlib.import_module(f"queries.{library_name}")
+    importlib.import_module(f"queries.{library_name}.utils")
+    timings["import_harness"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _init_engine(library_name)
+    timings["engine_init"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    module = importlib.import_module(f"queries.{library_name}.q{query_number}")
+    run_module: Callable[[ModuleType], None] | None = getattr(
+        package, "run_module", None
+    )
+    if run_module is not None:
+        run_module(module)
+    else:
+        module.q()
+    timings["first_query"] = time.perf_counter() - start
+
+    timings["total"] = time.time() - launched_at
+    print(" ".join(str(timings[c]) for c in COMPONENTS))
+
+
+def _init_engine(library_name: str) -> None:
+    """Initialize the engine of the library, as the first query would."""
+    if library_name == "polars":
+        from queries.polars import utils as pl_utils
+
+        pl_utils._preload_engine(pl_utils.obtain_engine_config())
+    elif library_name == "pyspark":
+        from queries.pyspark import utils as spark_utils
+
+        spark_utils.get_or_create_spark()
+    elif library_name == "modin":
+        from modin.core.execution.dispatching.factories.dispatcher import (
+            FactoryDispatcher,
+        )
+
+        # Starts the execution engine, e.g. Ray, with the settings of Modin
+        FactoryDispatcher.get_factory()
+    elif library_name == "duckdb":
+        import duckdb
+
+        duckdb.sql("select 1").fetchall()
+    elif library_name == "exasol":
+        from queries.exasol import utils as exasol_utils
+
+        exasol_utils.get_connection()
+    # pandas and the threaded scheduler of Dask have no engine to initialize
+
+
+if __name__ == "__main__":
+    _run_worker(sys.argv[1], int(sys.argv[2]), float(sys.argv[3]))
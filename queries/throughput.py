@@ -0,0 +1,272 @@
+"""Multi-stream throughput test, modelled after the TPC-H throughput test.
+
+A number of query streams run concurrently against the same dataset. Every stream
+runs all implemented queries once, in the order given by the TPC-H query stream
+permutations bundled with `tpch-dbgen`. Every query of a stream runs once, without
+warmups, page cache control or profiles, and its latency is the duration of that
+run.
+"""
+
+from __future__ import annotations
+
+import importlib
+import multiprocessing
+import queue
+import re
+import statistics
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from linetimer import CodeTimer
+
+from queries.common_utils import (
+    _reset_second_call_helpers,
+    _second_call_helpers,
+    pop_timed_durations,
+    run_query_module,
+    settings,
+)
+from queries.results import log_result
+from queries.timing import percentile
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from types import ModuleType
+
+PERMUTATIONS_PATH = Path(__file__).parent.parent / "tpch-dbgen" / "permute.h"
+
+# Settings of the power test that streams override, so that every query of a stream
+# runs once and only that run is timed
+STREAM_SETTINGS: dict[str, Any] = {
+    "iterations": 1,
+    "warmup_iterations": 0,
+    "target_ci_width": 0.0,
+    "page_cache": "os",
+    # The latencies are measured in the process or thread of the stream
+    "isolate_queries": False,
+    # Timings of the queries of concurrent streams must not mix with those of the
+    # power test
+    "log_timings": False,
+    # Profiles and scan statistics run the queries once more
+    "polars_profile": False,
+    "duckdb_profile": False,
+    "track_io": False,
+}
+
+# Libraries whose queries share state within a process, so their streams cannot
+# run as threads: DuckDB runs all queries on its default connection, PySpark
+# attributes its job groups to the timed run in progress and Exasol runs all
+# queries on one connection
+PROCESS_STREAM_LIBRARIES = ("duckdb", "pyspark", "exasol")
+
+
+@dataclass
+class QueryLatency:
+    stream: int
+    position: int
+    query_number: int
+    latency: float
+    success: bool
+
+
+@dataclass
+class StreamResult:
+    stream: int
+    duration: float
+    latencies: list[QueryLatency]
+
+
+def load_stream_permutations() -> list[list[int]]:
+    """Parse the query stream permutations from the bundled `permute.h` file."""
+    text = PERMUTATIONS_PATH.read_text()
+    table = text[text.index("{", text.index("permutation[")) :]
+    rows = re.findall(r"\{([\d,\s]+)\}", table)
+    return [[int(n) for n in row.split(",")] for row in rows]
+
+
+def get_stream_order(stream: int, query_numbers: list[int]) -> list[int]:
+    """Return the order in which the given stream runs the given queries.
+
+    Stream 0 is the power test stream in TPC-H, so throughput streams start at 1.
+    Queries that are not implemented are skipped.
+    """
+    permutations = load_stream_permutations()
+    permutation = permutations[stream % len(permutations)]
+    return [i for i in permutation if i in query_numbers]
+
+
+def execute_throughput(
+    library_name: str,
+    query_numbers: list[int],
+    run_module: Callable[[ModuleType], None] | None = None,
+) -> None:
+    """Run the throughput test for the given library and report the results."""
+    n_streams = settings.run.throughput_streams
+    executor = settings.run.throughput_executor
+    orders = {s: get_stream_order(s, query_numbers) for s in range(1, n_streams + 1)}
+
+    # Streams override settings of the power test, which changes the settings of
+    # this process when they run as threads
+    saved = {key: getattr(settings.run, key) for key in STREAM_SETTINGS}
+    name = f"Throughput test of {library_name} with {n_streams} {executor} streams"
+    try:
+        with CodeTimer(name=name, unit="s") as timer:
+            if executor == "thread":
+                results = _run_streams_in_threads(library_name, orders, run_module)
+            else:
+                results = _run_streams_in_processes(library_name, orders, run_module)
+    finally:
+        for key, value in saved.items():
+            setattr(settings.run, key, value)
+
+    # Measure from the start of the first stream to the end of the last one
+    elapsed = max(r.duration for r in results) if results else timer.took
+    _report(library_name, results, elapsed)
+
+
+def _run_streams_in_threads(
+    library_name: str,
+    orders: dict[int, list[int]],
+    run_module: Callable[[ModuleType], None] | None,
+) -> list[StreamResult]:
+    msg = f"cannot run {library_name} throughput streams as threads, use RUN_THROUGHPUT_EXECUTOR=process"
+    if library_name in PROCESS_STREAM_LIBRARIES:
+        raise ValueError(msg)
+    # Import up front so that the import lock does not serialize the streams
+    for i in next(iter(orders.values()), []):
+        importlib.import_module(f"queries.{library_name}.q{i}")
+    if _second_call_helpers:
+        raise ValueError(msg)
+
+    barrier = threading.Barrier(len(orders))
+    results: queue.Queue[StreamResult] = queue.Queue()
+    threads = [
+        threading.Thread(
+            target=_run_stream,
+            args=(library_name, stream, order, run_module, barrier, results),
+        )
+        for stream, order in orders.items()
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    return sorted((results.get() for _ in threads), key=lambda r: r.stream)
+
+
+def _run_streams_in_processes(
+    library_name: str,
+    orders: dict[int, list[int]],
+    run_module: Callable[[ModuleType], None] | None,
+) -> list[StreamResult]:
+    # Forking a process that already runs a multithreaded engine is unsafe
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(len(orders))
+    results: Any = ctx.Queue()
+    processes = [
+        ctx.Process(
+            target=_run_stream,
+            args=(library_name, stream, order, run_module, barrier, results),
+        )
+        for stream, order in orders.items()
+    ]
+    for p in processes:
+        p.start()
+
+    collected: list[StreamResult] = []
+    while len(collected) < len(processes):
+        try:
+            collected.append(results.get(timeout=1))
+        except queue.Empty:
+            if not any(p.is_alive() for p in processes) and results.empty():
+                print("Some throughput streams exited without reporting results")
+                break
+    for p in processes:
+        p.join()
+
+    return sorted(collected, key=lambda r: r.stream)
+
+
+def _run_stream(
+    library_name: str,
+    stream: int,
+    order: list[int],
+    run_module: Callable[[ModuleType], None] | None,
+    barrier: Any,
+    results: Any,
+) -> None:
+    for key, value in STREAM_SETTINGS.items():
+        setattr(settings.run, key, value)
+
+    # Load the engine and query modules before all streams start together
+    for i in order:
+        importlib.import_module(f"queries.{library_name}.q{i}")
+    barrier.wait()
+
+    latencies = []
+    stream_start = time.perf_counter()
+    for position, i in enumerate(order):
+        _reset_second_call_helpers()
+        pop_timed_durations()
+        start = time.perf_counter()
+        try:
+            run_query_module(library_name, i, run_module)
+            # The timed run, without loading the engine or checking the result
+            latency = sum(pop_timed_durations())
+            success = True
+        except Exception as e:
+            print(f"Stream {stream} q{i} FAILED\n{e}")
+            latency = time.perf_counter() - start
+            success = False
+        latencies.append(QueryLatency(stream, position, i, latency, success))
+
+    results.put(StreamResult(stream, time.perf_counter() - stream_start, latencies))
+
+
+def _report(library_name: str, results: list[StreamResult], elapsed: float) -> None:
+    latencies = [q for r in results for q in r.latencies]
+    n_success = sum(q.success for q in latencies)
+    queries_per_hour = n_success * 3600 / elapsed if elapsed > 0 else 0.0
+
+    print(f"Throughput of {library_name}: {queries_per_hour:.1f} queries/hour")
+    for r in results:
+        print(f"Stream {r.stream} took: {r.duration:.5f} s")
+
+    by_query: dict[int, list[float]] = {}
+    for q in latencies:
+        if q.success:
+            by_query.setdefault(q.query_number, []).append(q.latency)
+    print("query,n,min[s],median[s],p95[s],max[s]")
+    for i, values in sorted(by_query.items()):
+        print(
+            f"{i},{len(values)},{min(values):.5f},{statistics.median(values):.5f},"
+            f"{percentile(values, 95):.5f},{max(values):.5f}"
+        )
+
+    if settings.run.log_timings:
+        _log_latencies(library_name, results, queries_per_hour)
+
+
+def _log_latencies(
+    library_name: str, results: list[StreamResult], queries_per_hour: float
+) -> None:
+    for r in results:
+        for q in r.latencies:
+            log_result(
+                settings,
+                "throughput",
+                solution=library_name,
+                query_number=q.query_number,
+                success=q.success,
+                duration=q.latency,
+                streams=settings.run.throughput_streams,
+                executor=settings.run.throughput_executor,
+                stream=r.stream,
+                stream_duration=r.duration,
+                position=q.position,
+                queries_per_hour=queries_per_hour,
+            )
@@ -0,0 +1,139 @@
+"""Summary statistics of repeated query timings."""
+
+from __future__ import annotations
+
+import math
+import statistics
+from dataclasses import dataclass
+
+
+@dataclass
+class TimingStats:
+    n: int
+    min: float
+    median: float
+    p95: float
+    stddev: float
+    # Distribution-free confidence interval of the median, None if there are too
+    # few timings for the requested confidence level
+    ci_low: float | None
+    ci_high: float | None
+
+    @property
+    def ci_width(self) -> float:
+        """Width of the confidence interval relative to the median."""
+        if self.ci_low is None or self.ci_high is None or self.median == 0:
+            return math.inf
+        return (self.ci_high - self.ci_low) / self.median
+
+
+def summarize_timings(durations: list[float], confidence: float) -> TimingStats:
+    """Compute summary statistics of the given durations."""
+    ci_low, ci_high = median_confidence_interval(durations, confidence)
+    return TimingStats(
+        n=len(durations),
+        min=min(durations),
+        median=statistics.median(durations),
+        p95=percentile(durations, 95),
+        stddev=statistics.stdev(durations) if len(durations) > 1 else 0.0,
+        ci_low=ci_low,
+        ci_high=ci_high,
+    )
+
+
+def percentile(values: list[float], p: int) -> float:
+    """Return the p-th percentile of the given values."""
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[p - 1]
+
+
+def median_confidence_interval(
+    values: list[float], confidence: float
+) -> tuple[float | None, float | None]:
+    """Return a confidence interval of the median of the given values.
+
+    The interval is bounded by order statistics, so it makes no assumption about the
+    distribution of the values. Timings are typically skewed by outliers, which
+    makes a t-interval of the mean unreliable. At least 6 values are needed for a
+    95% interval.
+    """
+    n = len(values)
+    alpha = 1 - confidence
+
+    # Largest k for which P(Binomial(n, 0.5) < k) <= alpha / 2
+    k = 0
+    cdf = 0.0
+    while k < n // 2:
+        cdf += math.comb(n, k) / 2**n
+        if cdf > alpha / 2:
+            break
+        k += 1
+
+    if k == 0:
+        return None, None
+
+    ordered = sorted(values)
+    return ordered[k - 1], ordered[n - k]
+
+
+def mann_whitney_u(x: list[float], y: list[float]) -> float:
+    """Return the two-sided p-value of the Mann-Whitney U test of the given samples.
+
+    The p-value is exact for small samples without ties, and otherwise based on the
+    normal approximation with tie and continuity corrections.
+    """
+    n1, n2 = len(x), len(y)
+    ranks = _rank([*x, *y])
+    u1 = sum(ranks[:n1]) - n1 * (n1 + 1) / 2
+    u = min(u1, n1 * n2 - u1)
+
+    has_ties = len(set(x) | set(y)) < n1 + n2
+    if not has_ties and n1 + n2 <= 20:
+        counts = _u_distribution(n1, n2)
+        p = 2 * sum(counts[: int(u) + 1]) / math.comb(n1 + n2, n1)
+        return min(p, 1.0)
+
+    n = n1 + n2
+    tie_sizes: dict[float, int] = {}
+    for v in [*x, *y]:
+        tie_sizes[v] = tie_sizes.get(v, 0) + 1
+    tie_term = sum(t**3 - t for t in tie_sizes.values()) / (n * (n - 1))
+    sigma = math.sqrt(n1 * n2 / 12 * (n + 1 - tie_term))
+    if sigma == 0:
+        return 1.0
+    z = (n1 * n2 / 2 - u - 0.5) / sigma
+    return min(2 * (1 - statistics.NormalDist().cdf(max(z, 0.0))), 1.0)
+
+
+def _rank(values: list[float]) -> list[float]:
+    """Rank the values, assigning tied values the mean of their ranks."""
+    order = sorted(range(len(values)), key=lambda i: values[i])
+    ranks = [0.0] * len(values)
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = (i + j) / 2 + 1
+        i = j + 1
+    return ranks
+
+
+def _u_distribution(n1: int, n2: int) -> list[int]:
+    """Return the number of rank orderings for every value of U."""
+    # counts[a][b][u]: orderings of a values of x and b values of y with U == u
+    counts = [[[1] for _ in range(n2 + 1)] for _ in range(n1 + 1)]
+    for a in range(1, n1 + 1):
+        for b in range(1, n2 + 1):
+            size = a * b + 1
+            dist = [0] * size
+            # The largest value is either from y (adds nothing to U of x) ...
+            for u, c in enumerate(counts[a][b - 1]):
+                dist[u] += c
+            # ... or from x, which then exceeds all b values of y
+            for u, c in enumerate(counts[a - 1][b]):
+                dist[u + b] += c
+            counts[a][b] = dist
+    return counts[n1][n2]
@@ -0,0 +1,221 @@
+"""Detect performance regressions between two benchmark runs.
+
+The timed query runs of a baseline and a candidate run are read from the results
+store. For every solution and query, the durations of both runs are compared with
+a Mann-Whitney U test. A query is flagged as a regression if the candidate is
+significantly slower than the baseline by more than the threshold. Queries that
+failed in a run, or are missing from it, are flagged as such instead of compared.
+
+To use this script, run:
+
+```shell
+.venv/bin/python -m scripts.compare_runs --baseline <run id> --candidate <run id>
+```
+
+The script exits with a non-zero status code if any query regressed, failed in the
+candidate run or is missing from it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+import polars as pl
+
+from queries.results import read_results
+from queries.timing import mann_whitney_u
+
+KEYS = ["solution", "query_number", "io_type", "scale_factor", "cache"]
+
+# Statuses of queries that the candidate run made worse
+REGRESSIONS = ["regression", "failed", "missing"]
+
+
+def compare_runs(
+    results: pl.DataFrame,
+    baseline: str,
+    candidate: str,
+    threshold: float,
+    alpha: float,
+) -> pl.DataFrame:
+    """Compare the query durations of the candidate run with those of the baseline.
+
+    Parameters
+    ----------
+    results
+        Records of the results store.
+    baseline
+        Run identifier of the baseline run.
+    candidate
+        Run identifier of the candidate run.
+    threshold
+        Minimum relative slowdown of the median duration to flag a regression.
+    alpha
+        Significance level of the Mann-Whitney U test.
+
+    Queries with a failed timed run in the candidate get the status `failed`, and
+    queries of the baseline that the candidate did not run get the status
+    `missing`. Those that failed in the baseline, or are missing from it, get the
+    status `failed_in_baseline` or `missing_in_baseline`, unless the candidate
+    failed as well.
+    """
+    timings = results.filter(pl.col("kind") == "query")
+    if "cache" not in timings.columns:
+        # Older results, or no run controlled the page cache
+        timings = timings.with_columns(pl.lit(None, dtype=pl.String).alias("cache"))
+    base = _collect_durations(timings, baseline)
+    cand = _collect_durations(timings, candidate)
+
+    # Keep the queries of either run, which the other run may have failed or missed
+    report = base.join(
+        cand, on=KEYS, how="full", coalesce=True, suffix="_candidate", nulls_equal=True
+    ).rename(
+        {
+            "version": "version_baseline",
+            "durations": "durations_baseline",
+            "n_failed": "n_failed_baseline",
+        }
+    )
+
+    # Only queries with successful runs in both runs are compared
+    p_values = [
+        mann_whitney_u(b, c) if b and c else None
+        for b, c in zip(
+            report.get_column("durations_baseline").to_list(),
+            report.get_column("durations_candidate").to_list(),
+            strict=True,
+        )
+    ]
+
+    median_base = pl.col("durations_baseline").list.median()
+    median_cand = pl.col("durations_candidate").list.median()
+    significant = pl.col("p_value") < alpha
+
+    return (
+        report.with_columns(
+            pl.Series("p_value", p_values, dtype=pl.Float64),
+            median_base.alias("median_baseline"),
+            median_cand.alias("median_candidate"),
+            # > 1 means the candidate is faster
+            (median_base / median_cand).alias("speedup"),
+        )
+        .with_columns(
+            pl.when(pl.col("durations_candidate").is_null())
+            .then(pl.lit("missing"))
+            .when(pl.col("n_failed_candidate") > 0)
+            .then(pl.lit("failed"))
+            .when(pl.col("durations_baseline").is_null())
+            .then(pl.lit("missing_in_baseline"))
+            .when(pl.col("n_failed_baseline") > 0)
+            .then(pl.lit("failed_in_baseline"))
+            .when(significant & (1 / pl.col("speedup") > 1 + threshold))
+            .then(pl.lit("regression"))
+            .when(significant & (pl.col("speedup") > 1 + threshold))
+            .then(pl.lit("improvement"))
+            .otherwise(pl.lit("unchanged"))
+            .alias("status")
+        )
+        .select(
+            *KEYS,
+            "version_baseline",
+            "version_candidate",
+            pl.col("durations_baseline").list.len().alias("n_baseline"),
+            pl.col("durations_candidate").list.len().alias("n_candidate"),
+            "n_failed_baseline",
+            "n_failed_candidate",
+            "median_baseline",
+            "median_candidate",
+            "speedup",
+            "p_value",
+            "status",
+        )
+        .sort(KEYS)
+    )
+
+
+def _collect_durations(timings: pl.DataFrame, run_id: str) -> pl.DataFrame:
+    run = timings.filter(pl.col("run_id") == run_id)
+    if run.is_empty():
+        msg = f"no query timings found for run {run_id!r}"
+        raise ValueError(msg)
+    return run.group_by(KEYS).agg(
+        pl.col("version").first(),
+        pl.col("duration").filter(pl.col("success")).alias("durations"),
+        (~pl.col("success")).sum().alias("n_failed"),
+    )
+
+
+def _latest_run_id(results: pl.DataFrame, exclude: str) -> str:
+    runs = (
+        results.filter(pl.col("run_id") != exclude)
+        .group_by("run_id")
+        .agg(pl.col("timestamp").max())
+        .sort("timestamp")
+    )
+    if runs.is_empty():
+        msg = "no candidate run found in the results store"
+        raise ValueError(msg)
+    return runs.get_column("run_id")[-1]  # type: ignore[no-any-return]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Detect performance regressions between two benchmark runs.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--baseline", required=True, help="Run identifier of the baseline run"
+    )
+    parser.add_argument(
+        "--candidate",
+        help="Run identifier of the candidate run (defaults to the latest other run)",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.05,
+        help="Minimum relative slowdown of the median duration to flag a regression",
+    )
+    parser.add_argument(
+        "--alpha",
+        type=float,
+        default=0.05,
+        help="Significance level of the Mann-Whitney U test",
+    )
+    parser.add_argument(
+        "--results",
+        type=Path,
+        help="Results file or directory to read (defaults to the results store)",
+    )
+    parser.add_argument(
+        "--output", type=Path, help="Write the regression report to this CSV file"
+    )
+    args = parser.parse_args()
+
+    results = read_results(args.results)
+    candidate = args.candidate or _latest_run_id(results, exclude=args.baseline)
+
+    report = compare_runs(results, args.baseline, candidate, args.threshold, args.alpha)
+
+    print(f"Comparing run {candidate} against baseline {args.baseline}")
+    with pl.Config(tbl_rows=-1, tbl_cols=-1, tbl_width_chars=250):
+        print(report)
+    if args.output is not None:
+        report.write_csv(args.output)
+
+    regressions = report.filter(pl.col("status").is_in(REGRESSIONS))
+    if not regressions.is_empty():
+        queries = ", ".join(
+            f"{s} q{q} ({status})"
+            for s, q, status in regressions.select(
+                "solution", "query_number", "status"
+            ).iter_rows()
+        )
+        print(f"Regressions detected: {queries}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,926 @@
+"""Disclaimer.
+
+Certain portions of the contents of this file are derived from TPC-H version 3.0.1
+(retrieved from
+http://www.tpc.org/tpc_documents_current_versions/current_specifications5.asp).
+Such portions are subject to copyrights held by Transaction Processing
+Performance Council (“TPC”) and licensed under the TPC EULA is available at
+http://www.tpc.org/tpc_documents_current_versions/current_specifications5.asp)
+(the “TPC EULA”).
+
+You may not use this file except in compliance with the TPC EULA.
+DISCLAIMER: Portions of this file is derived from the TPC-H benchmark and as
+such any result obtained using this file are not comparable to published TPC-H
+Benchmark results, as the results obtained from using this file do not comply with
+the TPC-H Benchmark.
+
+Vectorized port of the TPC-H data generator `dbgen` in `tpch-dbgen/`.
+
+The tables are built as Arrow record batches with NumPy and written straight to
+Parquet or Arrow IPC files, producing the same data as `dbgen` and `tpchgen-cli`.
+
+Every column of `dbgen` draws from its own stream of the Park & Miller random number
+generator, and every row advances each stream by a fixed number of draws (its
+boundary). Draw `k` of row `i` of a stream is thus `seed * A^(i * boundary + k + 1)
+mod M`, which is computed for a whole chunk of rows at once, so chunks of a table
+are generated independently and in parallel.
+
+Comments are substrings of a 300 MiB pool of text generated from the grammar in
+`dists.dss`. The pool is generated once and cached next to the tables.
+"""
+
+from __future__ import annotations
+
+import functools
+import logging
+import os
+from dataclasses import dataclass
+from datetime import date
+from multiprocessing import Pool
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+DISTS_PATH = Path(__file__).parent.parent / "tpch-dbgen" / "dists.dss"
+
+FileFormat = Literal["parquet", "ipc"]
+
+# Park & Miller "minimal standard" generator
+_MULTIPLIER = 16807
+_MODULUS = 2147483647
+
+# Seed and number of draws per row (boundary) of every random number stream, by
+# stream number (rnd.h)
+_STREAMS = [
+    (1, 1),  # P_MFG_SD
+    (46831694, 1),  # P_BRND_SD
+    (1841581359, 1),  # P_TYPE_SD
+    (1193163244, 1),  # P_SIZE_SD
+    (727633698, 1),  # P_CNTR_SD
+    (933588178, 1),  # text pool
+    (804159733, 2),  # P_CMNT_SD
+    (1671059989, 4),  # PS_QTY_SD
+    (1051288424, 4),  # PS_SCST_SD
+    (1961692154, 8),  # PS_CMNT_SD
+    (1227283347, 1),  # O_SUPP_SD
+    (1171034773, 1),  # O_CLRK_SD
+    (276090261, 2),  # O_CMNT_SD
+    (1066728069, 1),  # O_ODATE_SD
+    (209208115, 7),  # L_QTY_SD
+    (554590007, 7),  # L_DCNT_SD
+    (721958466, 7),  # L_TAX_SD
+    (1371272478, 7),  # L_SHIP_SD
+    (675466456, 7),  # L_SMODE_SD
+    (1808217256, 7),  # L_PKEY_SD
+    (2095021727, 7),  # L_SKEY_SD
+    (1769349045, 7),  # L_SDTE_SD
+    (904914315, 7),  # L_CDTE_SD
+    (373135028, 7),  # L_RDTE_SD
+    (717419739, 7),  # L_RFLG_SD
+    (1095462486, 14),  # L_CMNT_SD
+    (881155353, 9),  # C_ADDR_SD
+    (1489529863, 1),  # C_NTRG_SD
+    (1521138112, 3),  # C_PHNE_SD
+    (298370230, 1),  # C_ABAL_SD
+    (1140279430, 1),  # C_MSEG_SD
+    (1335826707, 2),  # C_CMNT_SD
+    (706178559, 9),  # S_ADDR_SD
+    (110356601, 1),  # S_NTRG_SD
+    (884434366, 3),  # S_PHNE_SD
+    (962338209, 1),  # S_ABAL_SD
+    (1341315363, 2),  # S_CMNT_SD
+    (709314158, 92),  # P_NAME_SD
+    (591449447, 1),  # O_PRIO_SD
+    (431918286, 1),  # HVAR_SD
+    (851767375, 1),  # O_CKEY_SD
+    (606179079, 2),  # N_CMNT_SD
+    (1500869201, 2),  # R_CMNT_SD
+    (1434868289, 1),  # O_LCNT_SD
+    (263032577, 1),  # BBB_JNK_SD
+    (753643799, 1),  # BBB_TYPE_SD
+    (202794285, 1),  # BBB_CMNT_SD
+    (715851524, 1),  # BBB_OFFSET_SD
+]
+P_MFG_SD, P_BRND_SD, P_TYPE_SD, P_SIZE_SD, P_CNTR_SD, TEXT_SD, P_CMNT_SD = range(7)
+PS_QTY_SD, PS_SCST_SD, PS_CMNT_SD = 7, 8, 9
+O_CLRK_SD, O_CMNT_SD, O_ODATE_SD = 11, 12, 13
+L_QTY_SD, L_DCNT_SD, L_TAX_SD, L_SHIP_SD, L_SMODE_SD, L_PKEY_SD = range(14, 20)
+L_SKEY_SD, L_SDTE_SD, L_CDTE_SD, L_RDTE_SD, L_RFLG_SD, L_CMNT_SD = range(20, 26)
+C_ADDR_SD, C_NTRG_SD, C_PHNE_SD, C_ABAL_SD, C_MSEG_SD, C_CMNT_SD = range(26, 32)
+S_ADDR_SD, S_NTRG_SD, S_PHNE_SD, S_ABAL_SD, S_CMNT_SD = range(32, 37)
+P_NAME_SD, O_PRIO_SD = 37, 38
+O_CKEY_SD, N_CMNT_SD, R_CMNT_SD, O_LCNT_SD = range(40, 44)
+BBB_JNK_SD, BBB_TYPE_SD, BBB_CMNT_SD, BBB_OFFSET_SD = range(44, 48)
+
+# Rows per scale factor of the tables generated row by row (driver.c)
+_BASE_ROWS = {
+    "part": 200_000,
+    "supplier": 10_000,
+    "customer": 150_000,
+    "orders": 1_500_000,
+}
+SUPP_PER_PART = 4
+MAX_LINES_PER_ORDER = 7
+
+# Dates are drawn as days since the start date
+_START_DATE = date(1992, 1, 1)
+_EPOCH_OFFSET = (_START_DATE - date(1970, 1, 1)).days
+_CURRENT_DATE = (date(1995, 6, 17) - _START_DATE).days
+_ORDER_DATE_MAX = 2557 - (121 + 30) - 1
+
+_ALPHA_NUM = np.frombuffer(
+    b"0123456789abcdefghijklmnopqrstuvwxyz ABCDEFGHIJKLMNOPQRSTUVWXYZ,", np.uint8
+)
+
+TEXT_POOL_SIZE = 300 * 1024 * 1024
+TEXT_POOL_FILE = ".dbgen_text_pool"
+# Upper bound of the number of draws of a sentence of the text pool (dss.h)
+_DRAWS_PER_SENTENCE = 27
+
+
+def table_row_counts(scale_factor: float) -> dict[str, int]:
+    """Return the number of rows of the tables generated row by row.
+
+    Partsupp has `SUPP_PER_PART` rows per part, and lineitem between 1 and
+    `MAX_LINES_PER_ORDER` rows per order.
+    """
+    if scale_factor < 1:
+        # Scale factors below 1 scale the number of rows in steps of 0.001
+        int_scale = int(1000 * scale_factor)
+        counts = {t: max(int_scale * n // 1000, 1) for t, n in _BASE_ROWS.items()}
+    elif scale_factor >= 30_000:
+        # dbgen switches to 64-bit random numbers for these scale factors
+        msg = f"scale factors of 30000 and above are not supported, got {scale_factor}"
+        raise ValueError(msg)
+    elif scale_factor == int(scale_factor):
+        counts = {t: int(scale_factor) * n for t, n in _BASE_ROWS.items()}
+    else:
+        msg = f"scale factors above 1 must be integers, got {scale_factor}"
+        raise ValueError(msg)
+    return {**counts, "nation": 25, "region": 5}
+
+
+# Random numbers
+
+
+def _powers(base: int, n: int) -> np.ndarray:
+    """Return `base^i mod M` for all `i` in `range(n)`."""
+    out = np.ones(n, dtype=np.int64)
+    filled, mult = 1, base % _MODULUS
+    while filled < n:
+        k = min(filled, n - filled)
+        out[filled : filled + k] = out[:k] * mult % _MODULUS
+        filled += k
+        mult = mult * mult % _MODULUS
+    return out
+
+
+def _draws(stream: int, first_row: int, n_rows: int, n_draws: int = 1) -> np.ndarray:
+    """Return the first draws of a stream for consecutive rows, as (rows, draws)."""
+    seed, boundary = _STREAMS[stream]
+    start = seed * pow(_MULTIPLIER, first_row * boundary + 1, _MODULUS) % _MODULUS
+    rows = start * _powers(pow(_MULTIPLIER, boundary, _MODULUS), n_rows) % _MODULUS
+    return rows[:, None] * _powers(_MULTIPLIER, n_draws)[None, :] % _MODULUS
+
+
+def _uniform(
+    values: np.ndarray, low: int | np.ndarray, high: int | np.ndarray
+) -> np.ndarray:
+    """Map draws to integers uniformly distributed in [low, high], like `UnifInt`."""
+    return low + (values / float(_MODULUS) * (high - low + 1)).astype(np.int64)
+
+
+def _uniform_int32_range(values: np.ndarray) -> np.ndarray:
+    # `UnifInt(0, MAX_LONG)` computes the size of its range in 32 bits, which wraps
+    # around to -2^31, so the result is negative
+    return (values / float(_MODULUS) * -2147483648.0).astype(np.int64)
+
+
+# Distributions
+
+
+@dataclass(frozen=True)
+class Distribution:
+    texts: list[str]
+    # Cumulative weights of the members
+    weights: np.ndarray
+
+    def pick(self, values: np.ndarray) -> np.ndarray:
+        """Pick members by their weight, like `pick_str`, returning their indices."""
+        j = _uniform(values, 1, int(self.weights[-1]))
+        return np.searchsorted(self.weights, j)
+
+    def arrow(self, indices: np.ndarray) -> pa.Array:
+        """Return the texts of the members with the given indices."""
+        return _choose(self.texts, indices)
+
+
+def _choose(texts: list[str], indices: np.ndarray) -> pa.Array:
+    """Return the texts with the given indices."""
+    dictionary = pa.array(texts, pa.large_string())
+    return pa.DictionaryArray.from_arrays(
+        pa.array(np.asarray(indices, dtype=np.int32)), dictionary
+    ).cast(pa.large_string())
+
+
+@functools.cache
+def load_distributions(path: Path = DISTS_PATH) -> dict[str, Distribution]:
+    """Read all distributions of a `dists.dss` file, like `read_dist`."""
+    dists: dict[str, Distribution] = {}
+    name = None
+    texts: list[str] = []
+    weights: list[int] = []
+    for raw_line in path.read_text().splitlines():
+        line = raw_line.split("#", 1)[0]
+        if not line:
+            continue
+        if name is None:
+            tokens = line.split()
+            if len(tokens) >= 2 and tokens[0].lower() == "begin":
+                name = tokens[1].lower()
+                texts, weights = [], []
+            continue
+        if line[:3].lower() == "end":
+            dists[name] = Distribution(texts, np.cumsum(weights))
+            name = None
+            continue
+        text, sep, weight = line.partition("|")
+        if not sep or text.lower() == "count":
+            continue
+        texts.append(text)
+        weights.append(int(weight.split()[0]))
+    return dists
+
+
+# Text
+
+
+def _text_pool_draws(first: int, n: int) -> np.ndarray:
+    seed, _ = _STREAMS[TEXT_SD]
+    start = seed * pow(_MULTIPLIER, first + 1, _MODULUS) % _MODULUS
+    return start * _powers(_MULTIPLIER, n) % _MODULUS
+
+
+# Codes of the tokens of sentence templates
+_SENTENCE_TOKENS = {"N": 1, "V": 2, "P": 3, "T": 4}
+# Word distributions of the parts of speech of phrase templates
+_PHRASE_WORDS = {
+    "A": "articles",
+    "J": "adjectives",
+    "D": "adverbs",
+    "N": "nouns",
+    "V": "verbs",
+    "X": "auxillaries",
+}
+
+
+class _Grammar:
+    """Vectorized sentence generator of the text pool, like `txt_sentence`.
+
+    A sentence is generated by a template of the `grammar` distribution, made of
+    noun phrases (N), verb phrases (V), prepositional phrases (P) and a terminator
+    (T). Phrases are generated by templates of the `np` and `vp` distributions, and
+    every template and every word is picked by one draw of the text stream.
+    """
+
+    def __init__(self, dists: dict[str, Distribution]) -> None:
+        self.dists = dists
+        self.sentences = self._parse_templates(dists["grammar"], _SENTENCE_TOKENS)
+        self.np = self._parse_phrases(dists["np"])
+        self.vp = self._parse_phrases(dists["vp"])
+
+        # Every piece of text is a word followed by a suffix, a preposition
+        # followed by " the ", or a terminator followed by a space
+        self.pieces: list[bytes] = []
+        self.word_ids: dict[tuple[str, str], int] = {}
+        for dist_name in _PHRASE_WORDS.values():
+            for suffix in (" ", ", ", ""):
+                self.word_ids[dist_name, suffix] = len(self.pieces)
+                self.pieces.extend(
+                    (t + suffix).encode() for t in dists[dist_name].texts
+                )
+        self.preposition_id = len(self.pieces)
+        self.pieces.extend(f"{t} the ".encode() for t in dists["prepositions"].texts)
+        self.terminator_id = len(self.pieces)
+        self.pieces.extend(f"{t} ".encode() for t in dists["terminators"].texts)
+        # A terminator abuts the last word of the sentence
+        self.no_space = np.arange(len(self.pieces))
+        for dist_name in _PHRASE_WORDS.values():
+            with_space = self.word_ids[dist_name, " "]
+            without = self.word_ids[dist_name, ""]
+            n = len(dists[dist_name].texts)
+            self.no_space[with_space : with_space + n] = np.arange(without, without + n)
+
+    @staticmethod
+    def _parse_templates(dist: Distribution, codes: dict[str, int]) -> np.ndarray:
+        tokens = [t.split() for t in dist.texts]
+        out = np.zeros((len(tokens), max(map(len, tokens))), dtype=np.int64)
+        for i, template in enumerate(tokens):
+            out[i, : len(template)] = [codes[t[0]] for t in template]
+        return out
+
+    @staticmethod
+    def _parse_phrases(dist: Distribution) -> list[list[tuple[str, str]]]:
+        # Every word of a phrase is followed by its punctuation, if any, and a space
+        return [
+            [(_PHRASE_WORDS[t[0]], t[1:] + " ") for t in template.split()]
+            for template in dist.texts
+        ]
+
+    def sentence_draws(self, u: np.ndarray, n: int) -> np.ndarray:
+        """Return the number of draws of a sentence starting at each of `u[:n]`."""
+        np_draws = 1 + np.array([len(p) for p in self.np])[self.dists["np"].pick(u)]
+        vp_draws = 1 + np.array([len(p) for p in self.vp])[self.dists["vp"].pick(u)]
+        starts = np.arange(n)
+        templates = self.sentences[self.dists["grammar"].pick(u[:n])]
+        pos = starts + 1
+        for slot in range(templates.shape[1]):
+            token = templates[:, slot]
+            pos += np.select(
+                [token == 1, token == 2, token == 3, token == 4],
+                [
+                    np_draws[pos],
+                    vp_draws[pos],
+                    1 + np_draws[np.minimum(pos + 1, len(u) - 1)],
+                    1,
+                ],
+                0,
+            )
+        return pos - starts
+
+    def sentence_pieces(self, u: np.ndarray, starts: np.ndarray) -> np.ndarray:
+        """Return the pieces of text of the sentences starting at the given draws."""
+        n = len(starts)
+        templates = self.sentences[self.dists["grammar"].pick(u[starts])]
+        max_pieces = templates.shape[1] * 4
+        pieces = np.full((n, max_pieces), -1, dtype=np.int64)
+        column = np.zeros(n, dtype=np.int64)
+        last_word = np.zeros(n, dtype=np.int64)
+        rows = np.arange(n)
+        pos = starts + 1
+
+        def emit(mask: np.ndarray, ids: np.ndarray, *, word: bool) -> None:
+            pieces[rows[mask], column[mask]] = ids
+            if word:
+                last_word[mask] = column[mask]
+            column[mask] += 1
+
+        def phrase(
+            mask: np.ndarray, dist_name: str, phrases: list[list[tuple[str, str]]]
+        ) -> None:
+            template = self.dists[dist_name].pick(u[pos[mask]])
+            selected = np.flatnonzero(mask)
+            pos[mask] += 1
+            for w in range(max(map(len, phrases))):
+                for t, words in enumerate(phrases):
+                    if w >= len(words):
+                        continue
+                    word_dist, suffix = words[w]
+                    sub = selected[template == t]
+                    m = np.zeros(n, dtype=bool)
+                    m[sub] = True
+                    idx = self.dists[word_dist].pick(u[pos[m] + w])
+                    emit(m, self.word_ids[word_dist, suffix] + idx, word=True)
+            lengths = np.array([len(p) for p in phrases])[template]
+            pos[mask] += lengths
+
+        for slot in range(templates.shape[1]):
+            token = templates[:, slot]
+            if (mask := token == 1).any():
+                phrase(mask, "np", self.np)
+            if (mask := token == 2).any():
+                phrase(mask, "vp", self.vp)
+            if (mask := token == 3).any():
+                idx = self.dists["prepositions"].pick(u[pos[mask]])
+                emit(mask, self.preposition_id + idx, word=False)
+                pos[mask] += 1
+                phrase(mask, "np", self.np)
+            if (mask := token == 4).any():
+                last = pieces[rows[mask], last_word[mask]]
+                pieces[rows[mask], last_word[mask]] = self.no_space[last]
+                idx = self.dists["terminators"].pick(u[pos[mask]])
+                emit(mask, self.terminator_id + idx, word=False)
+                pos[mask] += 1
+        return pieces
+
+
+def generate_text_pool(
+    size: int = TEXT_POOL_SIZE, chunk_size: int = 1 << 22
+) -> Iterator[bytes]:
+    """Generate the pool of text that comments are taken from, like `dbg_text`.
+
+    The pool consists of sentences separated by spaces, cut off at `size` bytes.
+    It is generated in parts of the sentences starting in `chunk_size` draws.
+    """
+    grammar = _Grammar(load_distributions())
+    remaining = size
+    next_start = 0
+    first = 0
+    while remaining > 0:
+        # Draws for all sentences starting in this chunk, and enough to finish them
+        u = _text_pool_draws(first, chunk_size + _DRAWS_PER_SENTENCE)
+        draws = grammar.sentence_draws(u, chunk_size).tolist()
+        starts = []
+        s = next_start - first
+        while s < chunk_size:
+            starts.append(s)
+            s += draws[s]
+        next_start = first + s
+
+        pieces = grammar.sentence_pieces(u, np.array(starts, dtype=np.int64))
+        ids = pieces[pieces >= 0]
+        text = b"".join(map(grammar.pieces.__getitem__, ids.tolist()))[:remaining]
+        remaining -= len(text)
+        first += chunk_size
+        yield text
+
+
+def load_text_pool(cache_dir: Path) -> np.ndarray:
+    """Return the text pool, generating it once and caching it in the directory."""
+    path = cache_dir / TEXT_POOL_FILE
+    if not path.exists() or path.stat().st_size != TEXT_POOL_SIZE:
+        logger.info("Generating the text pool in %s", path)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with tmp_path.open("wb") as f:
+            for text in generate_text_pool():
+                f.write(text)
+        tmp_path.replace(path)
+    return np.memmap(path, dtype=np.uint8, mode="r")
+
+
+def _string_array(data: np.ndarray, lengths: np.ndarray) -> pa.Array:
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return pa.LargeStringArray.from_buffers(
+        len(lengths), pa.py_buffer(offsets), pa.py_buffer(np.ascontiguousarray(data))
+    )
+
+
+def _text(pool: np.ndarray, draws: np.ndarray, average_length: int) -> pa.Array:
+    """Take comments from the text pool by two draws each, like `TEXT`."""
+    low, high = int(average_length * 0.4), int(average_length * 1.6)
+    offsets = _uniform(draws[:, 0], 0, TEXT_POOL_SIZE - high)
+    lengths = _uniform(draws[:, 1], low, high)
+    starts = np.cumsum(lengths) - lengths
+    idx = np.repeat(offsets - starts, lengths) + np.arange(lengths.sum())
+    return _string_array(pool[idx], lengths)
+
+
+def _alpha_numeric(draws: np.ndarray, average_length: int) -> pa.Array:
+    """Generate random alphanumeric strings, like `V_STR`.
+
+    The first draw is the length, and every following draw gives 6 bits for each of
+    5 characters.
+    """
+    low, high = int(average_length * 0.4), int(average_length * 1.6)
+    lengths = _uniform(draws[:, 0], low, high)
+    char_ints = _uniform_int32_range(draws[:, 1:])
+    codes = (char_ints[:, :, None] >> (6 * np.arange(5))) & 0o77
+    codes = codes.reshape(len(draws), -1)
+    mask = np.arange(codes.shape[1]) < lengths[:, None]
+    return _string_array(_ALPHA_NUM[codes[mask]], lengths)
+
+
+# Formatting
+
+
+def _join(*parts: pa.Array | str, separator: str = "") -> pa.Array:
+    """Concatenate strings element-wise, with strings repeated for all elements."""
+    return pc.binary_join_element_wise(
+        *(pa.scalar(p, pa.large_string()) if isinstance(p, str) else p for p in parts),
+        pa.scalar(separator, pa.large_string()),
+    )
+
+
+def _zero_padded(values: np.ndarray, width: int) -> pa.Array:
+    return pc.utf8_lpad(pc.cast(pa.array(values), pa.large_string()), width, "0")
+
+
+def _format_key(tag: str, keys: np.ndarray, width: int) -> pa.Array:
+    """Format keys padded with zeros after a tag, e.g. "Customer#000000001"."""
+    return _join(tag, _zero_padded(keys, width))
+
+
+def _phone(nation: np.ndarray, draws: np.ndarray) -> pa.Array:
+    """Format phone numbers with the country code of the nation, like `gen_phone`."""
+    parts = [
+        (10 + nation, 2),
+        (_uniform(draws[:, 0], 100, 999), 3),
+        (_uniform(draws[:, 1], 100, 999), 3),
+        (_uniform(draws[:, 2], 1000, 9999), 4),
+    ]
+    return _join(*(_zero_padded(v, w) for v, w in parts), separator="-")
+
+
+def _money(cents: np.ndarray) -> pa.Array:
+    return pa.array(cents / 100)
+
+
+def _dates(days: np.ndarray) -> pa.Array:
+    return pa.array((days + _EPOCH_OFFSET).astype(np.int32), pa.date32())
+
+
+def _retail_price(partkey: np.ndarray) -> np.ndarray:
+    """Return the retail price of parts in cents, like `rpb_routine`."""
+    return 90000 + (partkey // 10) % 20001 + (partkey % 1000) * 100
+
+
+def _part_supp_bridge(
+    partkey: np.ndarray, i: np.ndarray | int, n_supp: int
+) -> np.ndarray:
+    """Return the key of the i-th supplier of parts, like `PART_SUPP_BRIDGE`."""
+    return (
+        partkey + i * (n_supp // SUPP_PER_PART + (partkey - 1) // n_supp)
+    ) % n_supp + 1
+
+
+# Tables
+
+
+@dataclass(frozen=True)
+class _Context:
+    scale: int
+    counts: dict[str, int]
+    pool: np.ndarray
+
+
+def _gen_nation(ctx: _Context, first_row: int, n: int) -> dict[str, pa.RecordBatch]:
+    nations = load_distributions()["nations"]
+    keys = np.arange(first_row, first_row + n)
+    batch = pa.record_batch(
+        {
+            "n_nationkey": pa.array(keys),
+            "n_name": nations.arrow(keys),
+            # The cumulative weights of nations are their region keys
+            "n_regionkey": pa.array(nations.weights[keys]),
+            "n_comment": _text(ctx.pool, _draws(N_CMNT_SD, first_row, n, 2), 72),
+        }
+    )
+    return {"nation": batch}
+
+
+def _gen_region(ctx: _Context, first_row: int, n: int) -> dict[str, pa.RecordBatch]:
+    regions = load_distributions()["regions"]
+    keys = np.arange(first_row, first_row + n)
+    batch = pa.record_batch(
+        {
+            "r_regionkey": pa.array(keys),
+            "r_name": regions.arrow(keys),
+            "r_comment": _text(ctx.pool, _draws(R_CMNT_SD, first_row, n, 2), 72),
+        }
+    )
+    return {"region": batch}
+
+
+def _gen_customer(ctx: _Context, first_row: int, n: int) -> dict[str, pa.RecordBatch]:
+    dists = load_distributions()
+    keys = np.arange(first_row + 1, first_row + n + 1)
+    nation = _uniform(_draws(C_NTRG_SD, first_row, n)[:, 0], 0, 24)
+    segment = dists["msegmnt"].pick(_draws(C_MSEG_SD, first_row, n)[:, 0])
+    batch = pa.record_batch(
+        {
+            "c_custkey": pa.array(keys),
+            "c_name": _format_key("Customer#", keys, 9),
+            "c_address": _alpha_numeric(_draws(C_ADDR_SD, first_row, n, 9), 25),
+            "c_nationkey": pa.array(nation),
+            "c_phone": _phone(nation, _draws(C_PHNE_SD, first_row, n, 3)),
+            "c_acctbal": _money(
+                _uniform(_draws(C_ABAL_SD, first_row, n)[:, 0], -99999, 999999)
+            ),
+            "c_mktsegment": dists["msegmnt"].arrow(segment),
+            "c_comment": _text(ctx.pool, _draws(C_CMNT_SD, first_row, n, 2), 73),
+        }
+    )
+    return {"customer": batch}
+
+
+def _gen_supplier(ctx: _Context, first_row: int, n: int) -> dict[str, pa.RecordBatch]:
+    keys = np.arange(first_row + 1, first_row + n + 1)
+    nation = _uniform(_draws(S_NTRG_SD, first_row, n)[:, 0], 0, 24)
+    comment = _text(ctx.pool, _draws(S_CMNT_SD, first_row, n, 2), 63)
+
+    # Some suppliers have a comment with "Customer ... Complaints" or "Customer
+    # ... Recommends" in it, at a random offset and with random noise in between
+    length = pc.utf8_length(comment).to_numpy().astype(np.int64)
+    bad_press = _uniform(_draws(BBB_CMNT_SD, first_row, n)[:, 0], 1, 10000)
+    kind = _uniform(_draws(BBB_TYPE_SD, first_row, n)[:, 0], 0, 100)
+    noise = _uniform(_draws(BBB_JNK_SD, first_row, n)[:, 0], 0, length - 19)
+    offset = _uniform(
+        _draws(BBB_OFFSET_SD, first_row, n)[:, 0], 0, length - (19 + noise)
+    )
+    texts = comment.to_pylist()
+    for i in np.flatnonzero(bad_press <= 10):
+        text = texts[i]
+        text = text[: offset[i]] + "Customer " + text[offset[i] + 9 :]
+        pos = offset[i] + 9 + noise[i]
+        text = (
+            text[:pos]
+            + ("Complaints" if kind[i] < 50 else "Recommends")
+            + text[pos + 10 :]
+        )
+        texts[i] = text
+
+    batch = pa.record_batch(
+        {
+            "s_suppkey": pa.array(keys),
+            "s_name": _format_key("Supplier#", keys, 9),
+            "s_address": _alpha_numeric(_draws(S_ADDR_SD, first_row, n, 9), 25),
+            "s_nationkey": pa.array(nation),
+            "s_phone": _phone(nation, _draws(S_PHNE_SD, first_row, n, 3)),
+            "s_acctbal": _money(
+                _uniform(_draws(S_ABAL_SD, first_row, n)[:, 0], -99999, 999999)
+            ),
+            "s_comment": pa.array(texts, pa.large_string()),
+        }
+    )
+    return {"supplier": batch}
+
+
+def _gen_part(ctx: _Context, first_row: int, n: int) -> dict[str, pa.RecordBatch]:
+    """Generate parts and their suppliers, like `mk_part`."""
+    dists = load_distributions()
+    keys = np.arange(first_row + 1, first_row + n + 1)
+
+    # The name consists of the first 5 colors of a random permutation of all colors,
+    # which are fixed after the first 5 swaps of the permutation
+    colors = dists["colors"]
+    n_colors = len(colors.texts)
+    name_draws = _draws(P_NAME_SD, first_row, n, 5)
+    perm = np.tile(np.arange(n_colors, dtype=np.int16), (n, 1))
+    rows = np.arange(n)
+    for i in range(5):
+        source = _uniform(name_draws[:, i], i, n_colors - 1)
+        tmp = perm[rows, source]
+        perm[rows, source] = perm[:, i]
+        perm[:, i] = tmp
+    name = _join(*(colors.arrow(perm[:, i]) for i in range(5)), separator=" ")
+
+    mfgr = _uniform(_draws(P_MFG_SD, first_row, n)[:, 0], 1, 5)
+    brand = mfgr * 10 + _uniform(_draws(P_BRND_SD, first_row, n)[:, 0], 1, 5)
+    part = pa.record_batch(
+        {
+            "p_partkey": pa.array(keys),
+            "p_name": name,
+            "p_mfgr": _format_key("Manufacturer#", mfgr, 1),
+            "p_brand": _format_key("Brand#", brand, 2),
+            "p_type": dists["p_types"].arrow(
+                dists["p_types"].pick(_draws(P_TYPE_SD, first_row, n)[:, 0])
+            ),
+            "p_size": pa.array(_uniform(_draws(P_SIZE_SD, first_row, n)[:, 0], 1, 50)),
+            "p_container": dists["p_cntr"].arrow(
+                dists["p_cntr"].pick(_draws(P_CNTR_SD, first_row, n)[:, 0])
+            ),
+            "p_retailprice": _money(_retail_price(keys)),
+            "p_comment": _text(ctx.pool, _draws(P_CMNT_SD, first_row, n, 2), 14),
+        }
+    )
+
+    # Suppliers of every part, in row-major order
+    supp = np.arange(SUPP_PER_PART)[None, :]
+    comment_draws = _draws(PS_CMNT_SD, first_row, n, 2 * SUPP_PER_PART)
+    partsupp = pa.record_batch(
+        {
+            "ps_partkey": pa.array(np.repeat(keys, SUPP_PER_PART)),
+            "ps_suppkey": pa.array(
+                _part_supp_bridge(keys[:, None], supp, ctx.counts["supplier"]).ravel()
+            ),
+            "ps_availqty": pa.array(
+                _uniform(
+                    _draws(PS_QTY_SD, first_row, n, SUPP_PER_PART), 1, 9999
+                ).ravel()
+            ),
+            "ps_supplycost": _money(
+                _uniform(
+                    _draws(PS_SCST_SD, first_row, n, SUPP_PER_PART), 100, 100000
+                ).ravel()
+            ),
+            "ps_comment": _text(ctx.pool, comment_draws.reshape(-1, 2), 124),
+        }
+    )
+    return {"part": part, "partsupp": partsupp}
+
+
+def _gen_orders(ctx: _Context, first_row: int, n: int) -> dict[str, pa.RecordBatch]:
+    """Generate orders and their line items, like `mk_order`."""
+    dists = load_distributions()
+    index = np.arange(first_row + 1, first_row + n + 1)
+    # Only 8 of every 32 keys are used
+    orderkey = ((index >> 3) << 5) + (index & 7)
+
+    n_cust = ctx.counts["customer"]
+    custkey = _uniform(_draws(O_CKEY_SD, first_row, n)[:, 0], 1, n_cust)
+    # Every third customer places no orders
+    mortal = custkey % 3 == 0
+    custkey[mortal] = np.where(
+        custkey[mortal] < n_cust, custkey[mortal] + 1, custkey[mortal] - 1
+    )
+    orderdate = _uniform(_draws(O_ODATE_SD, first_row, n)[:, 0], 0, _ORDER_DATE_MAX)
+    priority = dists["o_oprio"].pick(_draws(O_PRIO_SD, first_row, n)[:, 0])
+    clerk = _uniform(
+        _draws(O_CLRK_SD, first_row, n)[:, 0], 1, max(ctx.scale * 1000, 1000)
+    )
+    n_lines = _uniform(_draws(O_LCNT_SD, first_row, n)[:, 0], 1, MAX_LINES_PER_ORDER)
+
+    # Line items of all orders in row-major order, masking out missing lines
+    lines = np.arange(MAX_LINES_PER_ORDER)[None, :] < n_lines[:, None]
+
+    def line_draws(stream: int, low: int, high: int) -> np.ndarray:
+        draws = _draws(stream, first_row, n, MAX_LINES_PER_ORDER)
+        return _uniform(draws, low, high)[lines]
+
+    quantity = line_draws(L_QTY_SD, 1, 50)
+    discount = line_draws(L_DCNT_SD, 0, 10)
+    tax = line_draws(L_TAX_SD, 0, 8)
+    instruct_draws = _draws(L_SHIP_SD, first_row, n, MAX_LINES_PER_ORDER)[lines]
+    mode_draws = _draws(L_SMODE_SD, first_row, n, MAX_LINES_PER_ORDER)[lines]
+    comment_draws = _draws(L_CMNT_SD, first_row, n, 2 * MAX_LINES_PER_ORDER)
+    comment_draws = comment_draws.reshape(n, MAX_LINES_PER_ORDER, 2)[lines]
+    partkey = line_draws(L_PKEY_SD, 1, ctx.counts["part"])
+    supp_num = line_draws(L_SKEY_SD, 0, 3)
+    suppkey = _part_supp_bridge(partkey, supp_num, ctx.counts["supplier"])
+
+    line_orderdate = np.repeat(orderdate, n_lines)
+    shipdate = line_orderdate + line_draws(L_SDTE_SD, 1, 121)
+    commitdate = line_orderdate + line_draws(L_CDTE_SD, 30, 90)
+    receiptdate = shipdate + line_draws(L_RDTE_SD, 1, 30)
+
+    # Lines received by the current date draw their return flag, so the draw of a
+    # line is the number of earlier lines of its order that drew one
+    line_order = np.repeat(np.arange(n), n_lines)
+    returned = receiptdate <= _CURRENT_DATE
+    prior = np.cumsum(returned) - returned
+    flag_draw = prior - prior[np.repeat(np.cumsum(n_lines) - n_lines, n_lines)]
+    flag_draws = _draws(L_RFLG_SD, first_row, n, MAX_LINES_PER_ORDER)
+    rflag = dists["rflag"]
+    returnflag = np.where(
+        returned, rflag.pick(flag_draws[line_order, flag_draw]), len(rflag.texts)
+    )
+    shipped = shipdate <= _CURRENT_DATE
+
+    eprice = _retail_price(partkey) * quantity
+    charge = (eprice * (100 - discount)) // 100 * (100 + tax) // 100
+    totalprice = np.bincount(line_order, weights=charge, minlength=n).astype(np.int64)
+    n_shipped = np.bincount(line_order, weights=shipped, minlength=n).astype(np.int64)
+    # Orders are fulfilled (F) when all lines shipped, open (O) when none did, and
+    # partially fulfilled (P) otherwise
+    status = np.where(n_shipped == n_lines, 0, np.where(n_shipped > 0, 1, 2))
+
+    orders = pa.record_batch(
+        {
+            "o_orderkey": pa.array(orderkey),
+            "o_custkey": pa.array(custkey),
+            "o_orderstatus": _choose(["F", "P", "O"], status),
+            "o_totalprice": _money(totalprice),
+            "o_orderdate": _dates(orderdate),
+            "o_orderpriority": dists["o_oprio"].arrow(priority),
+            "o_clerk": _format_key("Clerk#", clerk, 9),
+            "o_shippriority": pa.array(np.zeros(n, dtype=np.int64)),
+            "o_comment": _text(ctx.pool, _draws(O_CMNT_SD, first_row, n, 2), 49),
+        }
+    )
+    lineitem = pa.record_batch(
+        {
+            "l_orderkey": pa.array(np.repeat(orderkey, n_lines)),
+            "l_partkey": pa.array(partkey),
+            "l_suppkey": pa.array(suppkey),
+            "l_linenumber": pa.array(np.nonzero(lines)[1].astype(np.int64) + 1),
+            "l_quantity": pa.array(quantity),
+            "l_extendedprice": _money(eprice),
+            "l_discount": _money(discount),
+            "l_tax": _money(tax),
+            "l_returnflag": _choose([*rflag.texts, "N"], returnflag),
+            "l_linestatus": _choose(["O", "F"], shipped),
+            "l_shipdate": _dates(shipdate),
+            "l_commitdate": _dates(commitdate),
+            "l_receiptdate": _dates(receiptdate),
+            "l_shipinstruct": dists["instruct"].arrow(
+                dists["instruct"].pick(instruct_draws)
+            ),
+            "l_shipmode": dists["smode"].arrow(dists["smode"].pick(mode_draws)),
+            "comments": _text(ctx.pool, comment_draws, 27),
+        }
+    )
+    return {"orders": orders, "lineitem": lineitem}
+
+
+# Generators of the tables, by the table whose rows they iterate over
+_GENERATORS: dict[str, Callable[[_Context, int, int], dict[str, pa.RecordBatch]]] = {
+    "nation": _gen_nation,
+    "region": _gen_region,
+    "part": _gen_part,
+    "supplier": _gen_supplier,
+    "customer": _gen_customer,
+    "orders": _gen_orders,
+}
+
+# Tables generated by the generators of other tables, with their rows
+_DERIVED_TABLES = {"part": "partsupp", "orders": "lineitem"}
+_TABLES = [*_GENERATORS, *_DERIVED_TABLES.values()]
+
+_worker_context: _Context | None = None
+
+
+def _init_worker(scale: int, counts: dict[str, int], pool_path: Path) -> None:
+    global _worker_context
+    pool = np.memmap(pool_path, dtype=np.uint8, mode="r")
+    _worker_context = _Context(scale, counts, pool)
+
+
+def _generate_chunk(args: tuple[str, int, int]) -> dict[str, pa.RecordBatch]:
+    table, first_row, n = args
+    if _worker_context is None:
+        msg = "chunks can only be generated by workers initialized with `_init_worker`"
+        raise RuntimeError(msg)
+    return _GENERATORS[table](_worker_context, first_row, n)
+
+
+def generate_tables(
+    scale_factor: float,
+    base_path: Path,
+    *,
+    file_format: FileFormat = "parquet",
+    processes: int | None = None,
+    rows_per_chunk: int = 100_000,
+    tables: Iterable[str] | None = None,
+    on_written: Callable[[str, Path], None] | None = None,
+) -> dict[str, Path]:
+    """Generate the TPC-H tables of the scale factor into the directory.
+
+    Every table is written to a single `<table>.parquet` or `<table>.feather` file,
+    with the same columns and types as converting the output of `dbgen`.
+    Chunks of `rows_per_chunk` rows (orders for lineitem and parts for partsupp)
+    are generated in `processes` worker processes.
+
+    Only the given `tables` are written, all tables by default. The file of a table
+    is closed once its last chunk is written, and `on_written` is then called with
+    the table and the path of the file, e.g. to record it in a manifest.
+
+    Returns the paths of the written files by table.
+    """
+    tables = set(_TABLES if tables is None else tables)
+    base_path.mkdir(parents=True, exist_ok=True)
+    # The text pool is shared by all scale factors
+    load_text_pool(base_path.parent)
+    pool_path = base_path.parent / TEXT_POOL_FILE
+
+    counts = table_row_counts(scale_factor)
+    scale = max(int(scale_factor), 1)
+    tasks = [
+        (table, first_row, min(rows_per_chunk, counts[table] - first_row))
+        for table in _GENERATORS
+        if table in tables or _DERIVED_TABLES.get(table) in tables
+        for first_row in range(0, counts[table], rows_per_chunk)
+    ]
+    # Index of the last chunk of every generator, after which its tables are complete
+    last_chunks = {table: i for i, (table, _, _) in enumerate(tasks)}
+    suffix = "parquet" if file_format == "parquet" else "feather"
+    paths: dict[str, Path] = {}
+    writers: dict[str, pq.ParquetWriter | pa.ipc.RecordBatchFileWriter] = {}
+
+    def results() -> Iterator[dict[str, pa.RecordBatch]]:
+        init_args = (scale, counts, pool_path)
+        if processes == 1:
+            _init_worker(*init_args)
+            yield from map(_generate_chunk, tasks)
+            return
+        with Pool(processes, initializer=_init_worker, initargs=init_args) as pool:
+            yield from pool.imap(_generate_chunk, tasks)
+
+    try:
+        for i, ((generator, _, _), batches) in enumerate(
+            zip(tasks, results(), strict=True)
+        ):
+            for table, batch in batches.items():
+                if table not in tables:
+                    continue
+                if table not in writers:
+                    paths[table] = base_path / f"{table}.{suffix}"
+                    logger.info("Writing %s", paths[table])
+                    if file_format == "parquet":
+                        writers[table] = pq.ParquetWriter(
+                            paths[table], batch.schema, compression="zstd"
+                        )
+                    else:
+                        writers[table] = pa.ipc.new_file(paths[table], batch.schema)
+                writers[table].write_batch(batch)
+            if i != last_chunks[generator]:
+                continue
+            for table in batches:
+                if table in writers:
+                    writers.pop(table).close()
+                    if on_written is not None:
+                        on_written(table, paths[table])
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return paths
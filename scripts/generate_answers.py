@@ -0,0 +1,104 @@
+"""Generate the answers to all queries for the dataset of a scale factor.
+
+The queries are run once with a reference engine, and their results are written to
+`<answers>/scale-<scale factor>/q<n>.parquet`. The checkers of all libraries
+(`RUN_CHECK_RESULTS=1`) read the answers of the current scale factor from there.
+Answers that were generated before are reused, unless `--force` is given.
+
+To generate the answers at scale factor 10 with DuckDB, run:
+
+```shell
+SCALE_FACTOR=10.0 .venv/bin/python -m scripts.generate_answers --engine duckdb
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+
+from settings import Settings
+
+settings = Settings()
+
+# Engines whose query results are trusted to be the answers
+REFERENCE_ENGINES = ["polars", "duckdb"]
+QUERY_NUMBERS = range(1, 23)
+
+
+def generate_answers(engine: str, *, force: bool = False) -> None:
+    """Generate the answers of the current scale factor with the reference engine."""
+    if engine not in REFERENCE_ENGINES:
+        msg = f"unsupported reference engine: {engine!r}"
+        raise ValueError(msg)
+
+    answers_dir = settings.answers_dir
+    missing = [q for q in QUERY_NUMBERS if not _answer_exists(q)]
+    if not missing and not force:
+        print(f"Answers of scale factor {settings.scale_factor} exist in {answers_dir}")
+        return
+
+    # Run every query once, without any of the measurement modes
+    env = {
+        **os.environ,
+        "SCALE_FACTOR": str(settings.scale_factor),
+        "RUN_WRITE_ANSWERS": "1",
+        "RUN_CHECK_RESULTS": "0",
+        "RUN_LOG_TIMINGS": "0",
+        "RUN_ITERATIONS": "1",
+        "RUN_WARMUP_ITERATIONS": "0",
+        "RUN_TARGET_CI_WIDTH": "0",
+        "RUN_SUITE_ITERATIONS": "1",
+        "RUN_PAGE_CACHE": "os",
+        "RUN_THROUGHPUT_STREAMS": "0",
+        "RUN_STARTUP_BENCHMARK": "0",
+        "RUN_ISOLATE_QUERIES": "0",
+        "RUN_TRACK_IO": "0",
+        "RUN_TRACK_MEMORY": "0",
+        "RUN_MEMORY_TIMELINE": "0",
+        "RUN_POLARS_PROFILE": "0",
+        "RUN_DUCKDB_PROFILE": "0",
+        "RUN_SPARK_METRICS": "0",
+    }
+    if force:
+        for q in QUERY_NUMBERS:
+            (answers_dir / f"q{q}.parquet").unlink(missing_ok=True)
+    subprocess.run([sys.executable, "-m", f"queries.{engine}"], env=env, check=True)
+
+    # Failing queries are reported by the engine but do not fail the run
+    missing = [q for q in QUERY_NUMBERS if not _answer_exists(q)]
+    if missing:
+        msg = f"{engine} did not produce the answers to queries {missing}"
+        raise RuntimeError(msg)
+    print(f"Wrote the answers of scale factor {settings.scale_factor} to {answers_dir}")
+
+
+def _answer_exists(query_number: int) -> bool:
+    return (settings.answers_dir / f"q{query_number}.parquet").exists()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Generate the answers to all queries for the current scale factor.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--engine",
+        choices=REFERENCE_ENGINES,
+        default="duckdb",
+        help="Reference engine computing the answers",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Regenerate the answers even if they exist",
+    )
+    args = parser.parse_args()
+
+    generate_answers(args.engine, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
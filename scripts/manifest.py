@@ -0,0 +1,276 @@
+"""Manifests of the generated tables, to skip tables that are still valid.
+
+Every directory of tables written by `scripts/prepare_data.py`, the dataset
+`scale-<sf>/` and its layouts `scale-<sf>/<layout>/`, holds a `manifest.json` with
+an entry for every table that was written completely:
+
+```json
+{
+  "tables": {
+    "lineitem": {
+      "params": {"generator": "tpchgen-cli", "scale_factor": 1.0, "format": "parquet"},
+      "rows": 6001215,
+      "bytes": 176297041,
+      "files": {
+        "lineitem.parquet": {"rows": 6001215, "bytes": 176297041, "sha256": "..."}
+      }
+    }
+  }
+}
+```
+
+The parameters are those of the generator, or of the layout and the checksum of
+the source table. A table is only regenerated if its parameters changed or its
+files no longer match the manifest, which is checked by their sizes, and their
+checksums on request. Tables generated in parts, by `dbgen` with `--num-parts`,
+record the parts that were written, so that an interrupted generation resumes with
+the first missing part.
+
+The manifest is rewritten after every table or part, so an interrupted generation
+only loses the tables and parts that were being written.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from typing import TYPE_CHECKING, Any
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from scripts import dbgen
+
+if TYPE_CHECKING:
+    import pathlib
+    from collections.abc import Iterable
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+
+# Tables generated with the rows of another table and their number of rows per row
+# of it, lineitem has between 1 and `MAX_LINES_PER_ORDER` rows per order
+_DERIVED_ROWS = {"partsupp": ("part", dbgen.SUPP_PER_PART)}
+
+
+class Manifest:
+    """Manifest of the tables in a directory, see the module docstring."""
+
+    def __init__(self, path: pathlib.Path) -> None:
+        self.path = path
+        self.tables: dict[str, dict[str, Any]] = {}
+        if (path / MANIFEST_FILE).exists():
+            self.tables = json.loads((path / MANIFEST_FILE).read_text())["tables"]
+
+    def exists(self) -> bool:
+        return (self.path / MANIFEST_FILE).exists()
+
+    def save(self) -> None:
+        """Write the manifest, replacing the previous one atomically."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path / f"{MANIFEST_FILE}.tmp"
+        tmp_path.write_text(json.dumps({"tables": self.tables}, indent=2))
+        tmp_path.replace(self.path / MANIFEST_FILE)
+
+    def record(
+        self,
+        table_name: str,
+        params: dict[str, Any],
+        files: Iterable[pathlib.Path],
+        *,
+        part: int | None = None,
+        parts: int | None = None,
+    ) -> None:
+        """Record the files of a table, or of one of its `parts` parts, and save.
+
+        Recording a whole table replaces its files. Recording a part adds its files
+        to those of the earlier parts, unless the parameters of the table changed.
+        """
+        entry = self.tables.get(table_name)
+        if entry is None or entry["params"] != params or part is None:
+            entry = {"params": params, "files": {}}
+        for path in files:
+            entry["files"][path.relative_to(self.path).as_posix()] = _describe(path)
+        # The summary of the table comes before its files, for readers of the manifest
+        summary = {
+            "params": params,
+            "rows": sum(f["rows"] for f in entry["files"].values()),
+            "bytes": sum(f["bytes"] for f in entry["files"].values()),
+        }
+        if part is not None:
+            summary["parts"] = sorted({*entry.get("parts", []), part})
+            summary["num_parts"] = parts
+            if "synced_to" in entry:
+                summary["synced_to"] = entry["synced_to"]
+        self.tables[table_name] = {**summary, "files": entry["files"]}
+        self.save()
+
+    def discard(self, table_name: str) -> None:
+        if self.tables.pop(table_name, None) is not None:
+            self.save()
+
+    def mark_synced(self, table_names: Iterable[str], location: str) -> None:
+        """Mark the files of the tables as moved to `location`, e.g. to AWS S3."""
+        for table_name in table_names:
+            if table_name in self.tables:
+                self.tables[table_name]["synced_to"] = location
+        self.save()
+
+    def is_valid(
+        self,
+        table_name: str,
+        params: dict[str, Any],
+        *,
+        part: int | None = None,
+        checksums: bool = False,
+    ) -> bool:
+        """Return whether the table, or one of its parts, was written with `params`.
+
+        The files of the table must match the manifest, see `problems`.
+        """
+        entry = self.tables.get(table_name)
+        if entry is None or entry["params"] != params:
+            return False
+        if part is not None and part not in entry.get("parts", []):
+            return False
+        return not self.problems(table_name, checksums=checksums)
+
+    def digest(self, table_name: str) -> str | None:
+        """Return a checksum of all files of the table, if it is in the manifest."""
+        if table_name not in self.tables:
+            return None
+        files = self.tables[table_name]["files"]
+        digest = hashlib.sha256()
+        for name in sorted(files):
+            digest.update(f"{name}:{files[name]['sha256']}\n".encode())
+        return digest.hexdigest()
+
+    def problems(self, table_name: str, *, checksums: bool = False) -> list[str]:
+        """Return how the files of the table differ from the manifest.
+
+        The sizes of the files are compared, and the numbers of rows of Parquet and
+        Arrow IPC files, which are read from their metadata. With `checksums`, the
+        files are read to compare their checksums, and the rows of CSV files.
+        Files that were moved to AWS S3 are not checked.
+        """
+        entry = self.tables[table_name]
+        if "synced_to" in entry:
+            return []
+
+        problems = []
+        for name, expected in entry["files"].items():
+            path = self.path / name
+            if not path.exists():
+                problems.append(f"{name} is missing")
+                continue
+            size = path.stat().st_size
+            if size != expected["bytes"]:
+                problems.append(
+                    f"{name} has {size} bytes, expected {expected['bytes']}"
+                )
+                continue
+            try:
+                actual = _describe(path) if checksums else {"rows": _count_rows(path)}
+            except (OSError, pa.ArrowInvalid):
+                # e.g. a file that was overwritten by an interrupted writer
+                problems.append(f"{name} has no readable footer")
+                continue
+            if actual["rows"] is not None and actual["rows"] != expected["rows"]:
+                problems.append(
+                    f"{name} has {actual['rows']} rows, expected {expected['rows']}"
+                )
+            if checksums and actual["sha256"] != expected["sha256"]:
+                problems.append(f"{name} has a different checksum")
+        return problems
+
+
+def verify(path: pathlib.Path, *, checksums: bool = False) -> list[str]:
+    """Verify the manifests of the directory and of its layouts.
+
+    Besides the files of every table, see `Manifest.problems`, the tables must be
+    complete: all of their parts must be written, and the tables of a scale factor
+    must have as many rows as its tables have in TPC-H.
+
+    Returns the problems, prefixed by the directory and table, which are also
+    logged.
+    """
+    manifest_paths = sorted(path.rglob(MANIFEST_FILE))
+    if not manifest_paths:
+        return [f"{path}: no {MANIFEST_FILE} found"]
+
+    problems = []
+    for manifest_path in manifest_paths:
+        manifest = Manifest(manifest_path.parent)
+        for table_name, entry in manifest.tables.items():
+            table_problems = manifest.problems(table_name, checksums=checksums)
+            if "parts" in entry and len(entry["parts"]) < entry["num_parts"]:
+                table_problems.append(
+                    f"{len(entry['parts'])} of {entry['num_parts']} parts written"
+                )
+            elif expected := _expected_rows(manifest, table_name):
+                if entry["rows"] != expected:
+                    table_problems.append(
+                        f"{entry['rows']} rows, expected {expected} rows"
+                    )
+            for problem in table_problems:
+                problems.append(f"{manifest.path}: {table_name}: {problem}")
+                logger.error(problems[-1])
+            if not table_problems:
+                logger.info(
+                    "%s: %s: %d rows, %.1f MB in %d files%s",
+                    manifest.path,
+                    table_name,
+                    entry["rows"],
+                    entry["bytes"] / 1e6,
+                    len(entry["files"]),
+                    f", synced to {entry['synced_to']}" if "synced_to" in entry else "",
+                )
+    return problems
+
+
+def _expected_rows(manifest: Manifest, table_name: str) -> int | None:
+    """Return the number of rows of the table in TPC-H, if it is known."""
+    params = manifest.tables[table_name]["params"]
+    if "source" in params:
+        return params["source"]["rows"]
+    if "scale_factor" not in params:
+        return None
+    try:
+        counts = dbgen.table_row_counts(params["scale_factor"])
+    except ValueError:
+        return None
+    if table_name in _DERIVED_ROWS:
+        source_table, rows_per_row = _DERIVED_ROWS[table_name]
+        return counts[source_table] * rows_per_row
+    return counts.get(table_name)
+
+
+def _describe(path: pathlib.Path) -> dict[str, Any]:
+    """Return the number of rows, size and checksum of a file."""
+    digest = hashlib.sha256()
+    lines = 0
+    with path.open("rb") as f:
+        while chunk := f.read(16 * 1024**2):
+            digest.update(chunk)
+            lines += chunk.count(b"\n")
+    rows = _count_rows(path)
+    if rows is None:
+        # CSV files have a header line and every row ends with a newline
+        rows = max(lines - 1, 0)
+    return {
+        "rows": rows,
+        "bytes": path.stat().st_size,
+        "sha256": digest.hexdigest(),
+    }
+
+
+def _count_rows(path: pathlib.Path) -> int | None:
+    """Return the number of rows of a Parquet or Arrow IPC file from its metadata."""
+    if path.suffix == ".parquet":
+        return pq.read_metadata(path).num_rows
+    if path.suffix == ".feather":
+        with pa.memory_map(str(path)) as source:
+            return pa.ipc.open_file(source).count_rows()
+    return None
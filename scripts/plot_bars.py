@@ -14,6 +14,7 @@ from typing import TYPE_CHECKING, Any
 import plotly.express as px
 import polars as pl
 
+from queries.results import read_results
 from settings import Settings
 
 if TYPE_CHECKING:
@@ -60,7 +61,19 @@ def main() -> None:
 
 
 def prep_data() -> pl.DataFrame:
-    lf = pl.scan_csv(settings.paths.timings / settings.paths.timings_filename)
+    lf = (
+        read_results()
+        .lazy()
+        .filter(pl.col("kind") == "query", pl.col("success"))
+        .select(
+            "solution",
+            "version",
+            "query_number",
+            pl.col("duration").alias("duration[s]"),
+            "io_type",
+            "scale_factor",
+        )
+    )
 
     # Scale factor not used at the moment
     lf = lf.drop("scale_factor")
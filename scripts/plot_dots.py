@@ -4,7 +4,9 @@ import argparse
 import sys
 import textwrap
 import warnings
+from pathlib import Path
 
+from queries.results import read_results
 from settings import Settings
 
 try:
@@ -45,12 +47,16 @@ def parse_queries(s: str) -> list[str]:
     return [f"q{x}" for x in sorted(query_numbers)]
 
 
-def read_csv(filename: str) -> pl.DataFrame:
-    if filename == "-":
-        df = pl.read_csv(settings.paths.timings / settings.paths.timings_filename)
-    else:
-        df = pl.read_csv(filename)
-    return df
+def read_timings(path: str) -> pl.DataFrame:
+    df = read_results(None if path == "-" else Path(path))
+    return df.filter(pl.col("kind") == "query").select(
+        "solution",
+        "version",
+        pl.format("q{}", "query_number").alias("query_no"),
+        "include_io",
+        "success",
+        pl.col("duration").alias("duration[s]"),
+    )
 
 
 def prepare_timings(
@@ -215,15 +221,15 @@ def create_plot(
 
 def main() -> None:
     parser = argparse.ArgumentParser(
-        description="Create dot plot from timings CSV file.",
+        description="Create dot plot from the benchmark results store.",
         formatter_class=argparse.ArgumentDefaultsHelpFormatter,
     )
     parser.add_argument(
-        "csv",
+        "results",
         nargs="?",
         default="-",
-        metavar="<csv file>",
-        help="CSV file to read (if not specified, reads from stdin)",
+        metavar="<results path>",
+        help="Results file or directory to read (if not specified, reads the results store)",
     )
     parser.add_argument(
         "-d",
@@ -311,7 +317,7 @@ def main() -> None:
     styles = get_styles(exclude_solutions)
     queries = parse_queries(args.queries)
     timings = prepare_timings(
-        read_csv(args.csv),
+        read_timings(args.results),
         styles,
         exclude_solutions,
         queries,
@@ -19,6 +19,7 @@ from __future__ import annotations
 
 import argparse
 import glob
+import json
 import logging
 import os
 import pathlib
@@ -26,13 +27,29 @@ import shlex
 import shutil
 import subprocess
 import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, fields, replace
 from multiprocessing import Pool
-from typing import no_type_check
+from typing import TYPE_CHECKING, Any, Literal, no_type_check
 
 import polars as pl
+import psutil
+import pyarrow as pa
+import pyarrow.csv as pcsv
+import pyarrow.parquet as pq
 
+from queries.common_utils import get_arrow_type
+from scripts import dbgen
+from scripts.manifest import MANIFEST_FILE, Manifest, verify
 from settings import Settings
 
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+    from concurrent.futures import Future
+
+    from queries.common_utils import ColumnType
+
 tpch_dbgen = pathlib.Path(__file__).parent.parent / "tpch-dbgen"
 
 
@@ -43,6 +60,11 @@ logger = logging.getLogger(__name__)
 
 STATIC_TABLES = ["nation", "region"]
 
+# Generators of the tables: the `tpchgen-cli` executable, whose `.tbl` files are
+# converted to Parquet, or the vectorized port of dbgen in `scripts/dbgen.py`
+Generator = Literal["tpchgen-cli", "native"]
+GENERATORS: list[Generator] = ["tpchgen-cli", "native"]
+
 
 @no_type_check
 def batch(iterable, n=1):
@@ -65,7 +87,16 @@ def pipelined_data_generation(
     aws_s3_sync_location: str,
     parallelism: int = 4,
     rows_per_file: int = 500_000,
+    memory_budget: int | None = None,
+    force: bool = False,
 ) -> None:
+    """Generate the tables in `num_parts` parts with `dbgen`, `parallelism` at a time.
+
+    The parts of every iteration are written to `<iteration>_<file>.parquet` files in
+    a directory of every table, and recorded in the manifest of the directory. An
+    interrupted generation resumes with the first iteration whose parts are not all
+    in the manifest, unless `force` is set.
+    """
     assert num_parts > 1, "script should only be used if num_parts > 1"
 
     # Ensure dbgen binary is available for partitioned generation
@@ -84,7 +115,41 @@ def pipelined_data_generation(
     base_path = pathlib.Path(scratch_dir) / str(num_parts)
     base_path.mkdir(parents=True, exist_ok=True)
 
-    for i, part_indices in enumerate(batch(range(1, num_parts + 1), n=parallelism)):
+    # The parts written by every iteration depend on all of these
+    params = {
+        "generator": "dbgen",
+        "scale_factor": scale_factor,
+        "num_parts": num_parts,
+        "parallelism": parallelism,
+        "rows_per_file": rows_per_file,
+    }
+    iterations = list(enumerate(batch(range(1, num_parts + 1), n=parallelism)))
+    manifest = Manifest(base_path)
+    for table_name in table_columns:
+        entry = manifest.tables.get(table_name)
+        if force or (entry is not None and entry["params"] != params):
+            manifest.discard(table_name)
+            shutil.rmtree(base_path / table_name, ignore_errors=True)
+
+    for i, part_indices in iterations:
+        # Every part contains the full static tables, only keep them once
+        tables = [
+            t
+            for t in table_columns
+            if (i == 0 or t not in STATIC_TABLES)
+            and not manifest.is_valid(t, params, part=i)
+        ]
+        if not tables:
+            logger.info("Partition %s: Skipping, all tables are valid", part_indices)
+            continue
+
+        # Remove the files of an interrupted run of this iteration
+        for table_name in tables:
+            for f in (base_path / table_name).glob(f"{i}_*.parquet"):
+                f.unlink()
+        for f in [*tpch_dbgen.glob("*.tbl*"), *base_path.glob("*.tbl*")]:
+            f.unlink()
+
         logger.info("Partition %s: Generating CSV files", part_indices)
         with Pool(parallelism) as process_pool:
             process_pool.starmap(
@@ -99,8 +164,18 @@ def pipelined_data_generation(
         for f in csv_files:
             shutil.move(f, base_path / pathlib.Path(f).name)
 
-        gen_parquet(base_path, rows_per_file, partitioned=True, iteration_offset=i)
-        parquet_files = glob.glob(f"{base_path}/*.parquet")  # noqa: PTH207
+        gen_parquet(
+            base_path,
+            rows_per_file,
+            partitioned=True,
+            iteration_offset=i,
+            parallelism=parallelism,
+            memory_budget=memory_budget,
+            tables=tables,
+        )
+        parquet_files = {
+            t: sorted((base_path / t).glob(f"{i}_*.parquet")) for t in tables
+        }
 
         # Exclude static tables except for first iteration
         exclude_static_tables = (
@@ -115,8 +190,20 @@ def pipelined_data_generation(
                     f'aws s3 sync {scratch_dir} {aws_s3_sync_location}/scale-factor-{scale_factor} --exclude "*" --include "*.parquet" {exclude_static_tables}'
                 )
             )
-            for parquet_file in parquet_files:
-                os.remove(parquet_file)  # noqa: PTH107
+        # Record the parts only once they are synced, so an interrupted sync is redone
+        for table_name, files in parquet_files.items():
+            manifest.record(
+                table_name,
+                params,
+                files,
+                part=i,
+                parts=1 if table_name in STATIC_TABLES else len(iterations),
+            )
+        if len(aws_s3_sync_location):
+            manifest.mark_synced(tables, aws_s3_sync_location)
+            for files in parquet_files.values():
+                for parquet_file in files:
+                    parquet_file.unlink()
         for table_file in glob.glob(f"{base_path}/*.tbl*"):  # noqa: PTH207
             os.remove(table_file)  # noqa: PTH107
 
@@ -203,34 +290,677 @@ table_columns = {
     ],
 }
 
+# Types of the columns by the suffix of their names: keys, counts and sizes are
+# integers, prices and rates are floats, dates are dates, and all others strings
+_COLUMN_TYPE_SUFFIXES: dict[ColumnType, tuple[str, ...]] = {
+    "int64": ("key", "linenumber", "quantity", "size", "availqty", "shippriority"),
+    "float64": ("price", "discount", "tax", "acctbal", "cost"),
+    "date": ("date",),
+}
+
+
+def _column_type(column: str) -> ColumnType:
+    for column_type, suffixes in _COLUMN_TYPE_SUFFIXES.items():
+        if column.endswith(suffixes):
+            return column_type
+    return "string"
+
+
+# Types of the columns of the tables, written with the CSV files as `schema.json`
+table_schemas = {
+    table_name: {column: _column_type(column) for column in columns}
+    for table_name, columns in table_columns.items()
+}
+
+
+# Memory of converting a table besides its memory-mapped `.tbl` files. The
+# streaming engine buffers a bounded number of morsels, which grows slowly with the
+# size of the table (about 130 MB for 75 MB and 220 MB for 760 MB of lineitem).
+CONVERSION_BASE_MEMORY = 128 * 1024**2
+CONVERSION_MEMORY_PER_BYTE = 1 / 8
+
+
+@dataclass
+class TableConversion:
+    table_name: str
+    # Size of the `.tbl` files in bytes
+    size: int
+    seconds: float = 0.0
+
+    @property
+    def estimated_memory(self) -> int:
+        return CONVERSION_BASE_MEMORY + int(self.size * CONVERSION_MEMORY_PER_BYTE)
+
+    @property
+    def throughput(self) -> float:
+        """Return the conversion throughput in MB of `.tbl` files per second."""
+        return self.size / 1e6 / self.seconds if self.seconds else 0.0
+
 
 def gen_parquet(
     base_path: pathlib.Path,
     rows_per_file: int = 500_000,
     partitioned: bool = False,
     iteration_offset: int = 0,
+    parallelism: int | None = None,
+    memory_budget: int | None = None,
+    tables: Iterable[str] | None = None,
+    on_converted: Callable[[TableConversion], None] | None = None,
+) -> list[TableConversion]:
+    """Convert the `.tbl` files of the tables in the directory to Parquet.
+
+    Tables are converted concurrently by `parallelism` threads (the number of CPUs
+    by default), from the largest to the smallest, so that the small tables overlap
+    with the large ones. A table only starts when the estimated memory of all running
+    conversions fits in `memory_budget` bytes (half of the available memory by
+    default), but at least one table is always converted.
+
+    Only the given `tables` are converted, all tables by default. `on_converted` is
+    called with every conversion once it is done, e.g. to record it in the manifest.
+
+    Returns the conversions with their throughput, which is also logged.
+    """
+    if tables is None:
+        tables = table_columns
+    if parallelism is None:
+        parallelism = os.cpu_count() or 1
+    if memory_budget is None:
+        memory_budget = psutil.virtual_memory().available // 2
+
+    conversions = sorted(
+        (
+            TableConversion(table_name, _tbl_size(base_path, table_name))
+            for table_name in tables
+        ),
+        key=lambda c: c.size,
+        reverse=True,
+    )
+    pending = list(conversions)
+    running: dict[Future[None], TableConversion] = {}
+    start = time.perf_counter()
+    with ThreadPoolExecutor(parallelism) as executor:
+        while pending or running:
+            # Start the largest pending tables that fit in the memory budget
+            in_use = sum(c.estimated_memory for c in running.values())
+            for conversion in list(pending):
+                if len(running) >= parallelism:
+                    break
+                if running and in_use + conversion.estimated_memory > memory_budget:
+                    continue
+                pending.remove(conversion)
+                future = executor.submit(
+                    _convert_table,
+                    base_path,
+                    conversion,
+                    rows_per_file,
+                    partitioned,
+                    iteration_offset,
+                )
+                running[future] = conversion
+                in_use += conversion.estimated_memory
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                conversion = running.pop(future)
+                future.result()
+                logger.info(
+                    "Converted %s: %.1f MB in %.2f s (%.1f MB/s)",
+                    conversion.table_name,
+                    conversion.size / 1e6,
+                    conversion.seconds,
+                    conversion.throughput,
+                )
+                if on_converted is not None:
+                    on_converted(conversion)
+
+    total_size = sum(c.size for c in conversions)
+    seconds = time.perf_counter() - start
+    logger.info(
+        "Converted all tables: %.1f MB in %.2f s (%.1f MB/s)",
+        total_size / 1e6,
+        seconds,
+        total_size / 1e6 / seconds,
+    )
+    return conversions
+
+
+def _tbl_size(base_path: pathlib.Path, table_name: str) -> int:
+    return sum(f.stat().st_size for f in base_path.glob(f"{table_name}.tbl*"))
+
+
+def _convert_table(
+    base_path: pathlib.Path,
+    conversion: TableConversion,
+    rows_per_file: int,
+    partitioned: bool,
+    iteration_offset: int,
 ) -> None:
-    for table_name, columns in table_columns.items():
-        path = base_path / f"{table_name}.tbl*"
+    table_name = conversion.table_name
+    columns = table_columns[table_name]
+    path = base_path / f"{table_name}.tbl*"
+
+    start = time.perf_counter()
+    lf = pl.scan_csv(
+        path,
+        has_header=False,
+        separator="|",
+        try_parse_dates=True,
+        new_columns=columns,
+    )
+
+    # Drop empty last column because CSV ends with a separator
+    lf = lf.select(columns)
 
-        lf = pl.scan_csv(
+    if partitioned:
+        (base_path / table_name).mkdir(parents=True, exist_ok=True)
+        lf.sink_parquet(
+            pl.PartitionMaxSize(
+                base_path / table_name,
+                file_path=lambda ctx: f"{iteration_offset}_{ctx.file_idx}.parquet",
+                max_size=rows_per_file,
+            )
+        )
+    else:
+        path = base_path / f"{table_name}.parquet"
+        lf.sink_parquet(path)
+    conversion.seconds = time.perf_counter() - start
+
+
+@dataclass(frozen=True)
+class ParquetLayout:
+    """Physical layout of Parquet files, see `pyarrow.parquet.ParquetWriter`."""
+
+    compression: str = "zstd"
+    compression_level: int | None = None
+    row_group_size: int = 1024 * 1024
+    use_dictionary: bool = True
+    write_statistics: bool = True
+    write_page_index: bool = False
+    # Columns to sort the rows of tables by, by table. Tables that are not listed
+    # keep the order of the generator, which is by their key.
+    sort_by: dict[str, tuple[str, ...]] = field(default_factory=dict)
+    # Sort by the position of the rows on the Z-order curve of the columns instead
+    # of by the columns in order, so that row groups span small ranges of all of them
+    zorder: bool = False
+    # Columns to partition tables by, by table, as Hive partitioned directories
+    # `<table>/<column>=<value>/` of the values of the expressions. The files of a
+    # partitioned table are written by Polars, which picks the dictionary encoding
+    # and writes no page index, and hold all columns but the partition columns.
+    partition_by: dict[str, dict[str, pl.Expr]] = field(default_factory=dict)
+
+
+# Partition columns of the date ranges the queries filter on
+HIVE_PARTITIONING = {
+    "lineitem": {
+        "l_shipyear": pl.col("l_shipdate").dt.year(),
+        "l_shipmonth": pl.col("l_shipdate").dt.month(),
+    },
+    "orders": {"o_orderyear": pl.col("o_orderdate").dt.year()},
+}
+
+# Variants of the layout of the Parquet tables, written to `scale-<sf>/<name>/`. Each
+# differs from the default layout in one aspect.
+PARQUET_LAYOUTS = {
+    "snappy": ParquetLayout(compression="snappy"),
+    "zstd-1": ParquetLayout(compression_level=1),
+    "zstd-3": ParquetLayout(compression_level=3),
+    "zstd-9": ParquetLayout(compression_level=9),
+    "lz4": ParquetLayout(compression="lz4"),
+    "uncompressed": ParquetLayout(compression="none"),
+    "rg-64k": ParquetLayout(row_group_size=64 * 1024),
+    "rg-256k": ParquetLayout(row_group_size=256 * 1024),
+    "rg-4m": ParquetLayout(row_group_size=4 * 1024 * 1024),
+    "no-dictionary": ParquetLayout(use_dictionary=False),
+    "no-statistics": ParquetLayout(write_statistics=False),
+    "page-index": ParquetLayout(write_page_index=True),
+    # Clustered by date, in smaller row groups so that date filters can skip many
+    "sorted": ParquetLayout(
+        row_group_size=128 * 1024,
+        sort_by={"lineitem": ("l_shipdate",), "orders": ("o_orderdate",)},
+    ),
+    "zorder": ParquetLayout(
+        row_group_size=128 * 1024,
+        sort_by={
+            "lineitem": ("l_shipdate", "l_discount", "l_quantity"),
+            "orders": ("o_orderdate",),
+        },
+        zorder=True,
+    ),
+    # Partitioned by date, so that date filters can skip whole directories
+    "hive": ParquetLayout(partition_by=HIVE_PARTITIONING),
+}
+
+
+# Variants of the tables as Arrow IPC (Feather) files, by the compression of their
+# buffers, written to `scale-<sf>/<name>/<table>.feather` and read with
+# `RUN_IO_TYPE=feather`. The solutions memory-map the files, so the uncompressed
+# variant is read without copying, while the others are decompressed into memory.
+FEATHER_LAYOUTS: dict[str, Literal["lz4", "zstd"] | None] = {
+    "feather": None,
+    "feather-lz4": "lz4",
+    "feather-zstd": "zstd",
+}
+
+
+# Layout of the tables as headered CSV files, with the types of their columns in
+# `schema.json`, written to `scale-<sf>/csv/` and read with `RUN_IO_TYPE=csv`
+CSV_LAYOUT = "csv"
+SCHEMA_FILE = "schema.json"
+
+
+def sorted_layout(
+    sort_by: dict[str, tuple[str, ...]], *, zorder: bool
+) -> ParquetLayout:
+    """Return the layout of the `sorted` layouts sorting by other columns."""
+    return replace(PARQUET_LAYOUTS["sorted"], sort_by=sort_by, zorder=zorder)
+
+
+def sorted_layout_name(sort_by: dict[str, tuple[str, ...]], *, zorder: bool) -> str:
+    """Return the name of a sorted layout by its columns, e.g. `sorted-l_shipdate`."""
+    columns = [c for table_columns in sort_by.values() for c in table_columns]
+    return "-".join(["zorder" if zorder else "sorted", *columns])
+
+
+def write_layout(
+    base_path: pathlib.Path,
+    layout_name: str,
+    layout: ParquetLayout | None = None,
+    *,
+    force: bool = False,
+) -> pathlib.Path:
+    """Rewrite the Parquet tables in the directory in a layout of `PARQUET_LAYOUTS`.
+
+    The tables are streamed from `<base_path>/<table>.parquet` to
+    `<base_path>/<layout_name>/<table>.parquet`, one row group at a time. Tables
+    that are sorted by the layout are sorted into a temporary file first, and
+    tables that are partitioned by it are written to `<base_path>/<layout_name>/
+    <table>/`. A layout that is not in `PARQUET_LAYOUTS` can be given by `layout`.
+
+    Tables that the manifest of the layout records with the same layout and source
+    table are skipped, unless `force` is set.
+    """
+    if layout is None:
+        if layout_name not in PARQUET_LAYOUTS:
+            msg = f"unknown Parquet layout {layout_name!r}, choose from {list(PARQUET_LAYOUTS)}"
+            raise ValueError(msg)
+        layout = PARQUET_LAYOUTS[layout_name]
+    layout_path = base_path / layout_name
+    layout_path.mkdir(parents=True, exist_ok=True)
+    manifest = Manifest(layout_path)
+    source_manifest = Manifest(base_path)
+
+    for table_name in table_columns:
+        params = {
+            "layout": _layout_params(layout, table_name),
+            "source": _source_params(source_manifest, table_name),
+        }
+        if not force and manifest.is_valid(table_name, params):
+            logger.info("Skipped %s in layout %s: up to date", table_name, layout_name)
+            continue
+
+        source_path = base_path / f"{table_name}.parquet"
+        path = layout_path / f"{table_name}.parquet"
+        start = time.perf_counter()
+        if partition_by := layout.partition_by.get(table_name):
+            _write_partitioned_table(
+                source_path, layout_path / table_name, layout, partition_by
+            )
+            files = (layout_path / table_name).rglob("*")
+            manifest.record(table_name, params, sorted(f for f in files if f.is_file()))
+            logger.info(
+                "Wrote %s in layout %s: %.1f MB in %.2f s",
+                table_name,
+                layout_name,
+                sum(f.stat().st_size for f in (layout_path / table_name).rglob("*"))
+                / 1e6,
+                time.perf_counter() - start,
+            )
+            continue
+        if sort_by := layout.sort_by.get(table_name):
+            lf = pl.scan_parquet(source_path)
+            if layout.zorder:
+                lf = _sort_by_zorder(lf, sort_by)
+            else:
+                lf = lf.sort(sort_by)
+            source_path = layout_path / f"{table_name}.sorted.parquet"
+            lf.sink_parquet(source_path)
+
+        source = pq.ParquetFile(source_path)
+        with pq.ParquetWriter(
             path,
-            has_header=False,
-            separator="|",
-            try_parse_dates=True,
-            new_columns=columns,
+            source.schema_arrow,
+            compression=layout.compression,
+            compression_level=layout.compression_level,
+            use_dictionary=layout.use_dictionary,
+            write_statistics=layout.write_statistics,
+            write_page_index=layout.write_page_index,
+        ) as writer:
+            for row_group in _iter_row_groups(source, layout.row_group_size):
+                writer.write_table(row_group, row_group_size=layout.row_group_size)
+        if sort_by:
+            source_path.unlink()
+        manifest.record(table_name, params, [path])
+        logger.info(
+            "Wrote %s in layout %s: %.1f MB in %.2f s",
+            table_name,
+            layout_name,
+            path.stat().st_size / 1e6,
+            time.perf_counter() - start,
+        )
+    return layout_path
+
+
+def write_feather_layout(
+    base_path: pathlib.Path, layout_name: str, *, force: bool = False
+) -> pathlib.Path:
+    """Rewrite the Parquet tables in the directory in a layout of `FEATHER_LAYOUTS`.
+
+    The tables are streamed from `<base_path>/<table>.parquet` to
+    `<base_path>/<layout_name>/<table>.feather`, in record batches of as many rows
+    as the row groups of the default Parquet layout. Tables that are up to date in
+    the manifest of the layout are skipped, unless `force` is set.
+    """
+    if layout_name not in FEATHER_LAYOUTS:
+        msg = f"unknown Feather layout {layout_name!r}, choose from {list(FEATHER_LAYOUTS)}"
+        raise ValueError(msg)
+    options = pa.ipc.IpcWriteOptions(compression=FEATHER_LAYOUTS[layout_name])
+    rows = ParquetLayout().row_group_size
+    layout_path = base_path / layout_name
+    layout_path.mkdir(parents=True, exist_ok=True)
+    manifest = Manifest(layout_path)
+    source_manifest = Manifest(base_path)
+
+    for table_name in table_columns:
+        params = {
+            "layout": {"compression": FEATHER_LAYOUTS[layout_name], "batch_rows": rows},
+            "source": _source_params(source_manifest, table_name),
+        }
+        if not force and manifest.is_valid(table_name, params):
+            logger.info("Skipped %s in layout %s: up to date", table_name, layout_name)
+            continue
+
+        path = layout_path / f"{table_name}.feather"
+        start = time.perf_counter()
+        source = pq.ParquetFile(base_path / f"{table_name}.parquet")
+        with pa.ipc.new_file(path, source.schema_arrow, options=options) as writer:
+            for batch in _iter_row_groups(source, rows):
+                writer.write_table(batch, max_chunksize=rows)
+        manifest.record(table_name, params, [path])
+        logger.info(
+            "Wrote %s in layout %s: %.1f MB in %.2f s",
+            table_name,
+            layout_name,
+            path.stat().st_size / 1e6,
+            time.perf_counter() - start,
+        )
+    return layout_path
+
+
+def write_csv_layout(base_path: pathlib.Path, *, force: bool = False) -> pathlib.Path:
+    """Rewrite the Parquet tables in the directory as headered CSV files.
+
+    The tables are streamed from `<base_path>/<table>.parquet` to
+    `<base_path>/csv/<table>.csv`, and the types of their columns to
+    `<base_path>/csv/schema.json`, so that the solutions read the files with
+    explicit types instead of inferring them. Tables that are up to date in the
+    manifest of the layout are skipped, unless `force` is set.
+    """
+    layout_path = base_path / CSV_LAYOUT
+    layout_path.mkdir(parents=True, exist_ok=True)
+    manifest = Manifest(layout_path)
+    source_manifest = Manifest(base_path)
+
+    for table_name, columns in table_schemas.items():
+        params = {
+            "layout": {"columns": columns},
+            "source": _source_params(source_manifest, table_name),
+        }
+        if not force and manifest.is_valid(table_name, params):
+            logger.info("Skipped %s in layout %s: up to date", table_name, CSV_LAYOUT)
+            continue
+
+        path = layout_path / f"{table_name}.csv"
+        start = time.perf_counter()
+        schema = pa.schema([(c, get_arrow_type(t)) for c, t in columns.items()])
+        source = pq.ParquetFile(base_path / f"{table_name}.parquet")
+        with pcsv.CSVWriter(path, schema) as writer:
+            for batch in _iter_row_groups(source, 64 * 1024):
+                writer.write_table(batch.cast(schema))
+        manifest.record(table_name, params, [path])
+        logger.info(
+            "Wrote %s in layout %s: %.1f MB in %.2f s",
+            table_name,
+            CSV_LAYOUT,
+            path.stat().st_size / 1e6,
+            time.perf_counter() - start,
+        )
+    (layout_path / SCHEMA_FILE).write_text(json.dumps(table_schemas, indent=2))
+    return layout_path
+
+
+def _layout_params(layout: ParquetLayout, table_name: str) -> dict[str, Any]:
+    """Return the options of the layout that apply to the table, for its manifest."""
+    params: dict[str, Any] = {
+        f.name: getattr(layout, f.name)
+        for f in fields(layout)
+        if f.name not in {"sort_by", "zorder", "partition_by"}
+    }
+    sort_by = layout.sort_by.get(table_name, ())
+    params["sort_by"] = list(sort_by)
+    params["zorder"] = layout.zorder and bool(sort_by)
+    params["partition_by"] = {
+        column: str(expr)
+        for column, expr in layout.partition_by.get(table_name, {}).items()
+    }
+    return params
+
+
+def _source_params(source_manifest: Manifest, table_name: str) -> dict[str, Any]:
+    """Return the rows and checksum of the table that a layout is written from."""
+    if table_name not in source_manifest.tables:
+        msg = (
+            f"table {table_name!r} is not in the manifest of {source_manifest.path}, "
+            "generate the tables with `scripts.prepare_data` first"
+        )
+        raise ValueError(msg)
+    return {
+        "rows": source_manifest.tables[table_name]["rows"],
+        "sha256": source_manifest.digest(table_name),
+    }
+
+
+def _write_partitioned_table(
+    source_path: pathlib.Path,
+    path: pathlib.Path,
+    layout: ParquetLayout,
+    partition_by: dict[str, pl.Expr],
+) -> None:
+    """Stream the table into Hive partitioned directories of the partition columns."""
+    # Files of an earlier run may belong to partitions that no longer exist
+    shutil.rmtree(path, ignore_errors=True)
+    lf = pl.scan_parquet(source_path)
+    if sort_by := layout.sort_by.get(path.name):
+        lf = _sort_by_zorder(lf, sort_by) if layout.zorder else lf.sort(sort_by)
+    lf.sink_parquet(
+        pl.PartitionByKey(path, by=partition_by, include_key=False),
+        compression="uncompressed"
+        if layout.compression == "none"
+        else layout.compression,  # type: ignore[arg-type]
+        compression_level=layout.compression_level,
+        statistics=layout.write_statistics,
+        row_group_size=layout.row_group_size,
+        mkdir=True,
+    )
+
+
+def _sort_by_zorder(lf: pl.LazyFrame, columns: tuple[str, ...]) -> pl.LazyFrame:
+    """Sort the rows by their position on the Z-order curve of the columns.
+
+    Every column is mapped to its dense rank, scaled to the same number of bits, and
+    the bits of all columns are interleaved, from the most significant bit down.
+    """
+    bits = min(63 // len(columns), 32)
+    names = [f"__zorder_{i}" for i in range(len(columns))]
+    scaled = []
+    for column, name in zip(columns, names, strict=True):
+        rank = pl.col(column).rank("dense") - 1
+        scale = ((1 << bits) - 1) / pl.max_horizontal(rank.max(), 1)
+        scaled.append((rank * scale).cast(pl.UInt64).alias(name))
+
+    key = pl.lit(0, dtype=pl.UInt64)
+    for bit in range(bits - 1, -1, -1):
+        for name in names:
+            key = key * 2 + (pl.col(name) // (1 << bit)) % 2
+    # Materialize the scaled ranks, which every bit of the key refers to
+    return lf.with_columns(scaled).sort(key).drop(names)
+
+
+def _iter_row_groups(source: pq.ParquetFile, rows: int) -> Iterator[pa.Table]:
+    # Row groups cannot span batches, so collect batches into tables of `rows` rows
+    batches: list[pa.RecordBatch] = []
+    n_rows = 0
+    for batch in source.iter_batches(batch_size=min(rows, 64 * 1024)):
+        batches.append(batch)
+        n_rows += batch.num_rows
+        if n_rows >= rows:
+            table = pa.Table.from_batches(batches)
+            yield table.slice(0, rows)
+            remainder = table.slice(rows)
+            batches = remainder.to_batches()
+            n_rows = remainder.num_rows
+    if n_rows:
+        yield pa.Table.from_batches(batches, schema=source.schema_arrow)
+
+
+def generate_tables(
+    base_path: pathlib.Path,
+    scale_factor: float,
+    generator: Generator = "tpchgen-cli",
+    *,
+    file_format: dbgen.FileFormat = "parquet",
+    parallelism: int | None = None,
+    memory_budget: int | None = None,
+    force: bool = False,
+) -> list[str]:
+    """Generate the tables of the directory that are not valid in its manifest.
+
+    Every table is written to a single file and recorded in the manifest once it is
+    complete, so an interrupted generation resumes with the tables it did not
+    finish. With `force`, all tables are generated.
+
+    Tables of `tpchgen-cli` are converted from the `.tbl` files in the directory,
+    and their `.tbl` files are generated first if there are none.
+
+    Returns the generated tables.
+    """
+    base_path.mkdir(parents=True, exist_ok=True)
+    if generator != "native":
+        # The `.tbl` files are only converted to Parquet
+        file_format = "parquet"
+    params = {
+        "generator": generator,
+        "scale_factor": scale_factor,
+        "format": file_format,
+    }
+    suffix = "parquet" if file_format == "parquet" else "feather"
+    manifest = Manifest(base_path)
+    if not manifest.exists() and not force:
+        _adopt_tables(manifest, params, suffix)
+    tables = [t for t in table_columns if force or not manifest.is_valid(t, params)]
+    if not tables:
+        logger.info("All tables in %s are valid, see %s", base_path, MANIFEST_FILE)
+        return tables
+
+    logger.info(
+        "Generating %s of scale factor %s in %s", tables, scale_factor, base_path
+    )
+    if generator == "native":
+        dbgen.generate_tables(
+            scale_factor,
+            base_path,
+            file_format=file_format,
+            processes=parallelism,
+            tables=tables,
+            on_written=lambda table_name, path: manifest.record(
+                table_name, params, [path]
+            ),
         )
+        return tables
+
+    generated = [t for t in tables if not _tbl_size(base_path, t)]
+    if generated:
+        _generate_tbl_files(base_path, scale_factor, generated)
+    gen_parquet(
+        base_path,
+        parallelism=parallelism,
+        memory_budget=memory_budget,
+        tables=tables,
+        on_converted=lambda c: manifest.record(
+            c.table_name, params, [base_path / f"{c.table_name}.parquet"]
+        ),
+    )
+    for table_name in generated:
+        (base_path / f"{table_name}.tbl").unlink()
+    return tables
 
-        # Drop empty last column because CSV ends with a separator
-        lf = lf.select(columns)
 
-        if partitioned:
-            (base_path / table_name).mkdir(parents=True, exist_ok=True)
-            path = base_path / table_name / f"{iteration_offset}_{{part}}.parquet"
-            lf.sink_parquet(pl.PartitionMaxSize(path, max_size=rows_per_file))
+def _adopt_tables(
+    manifest: Manifest, params: dict[str, Any], suffix: str = "parquet"
+) -> None:
+    """Record the complete tables of a directory that was written without manifest.
+
+    Tables whose file has no readable footer, e.g. as it was interrupted, are not
+    recorded, and are thus generated again.
+    """
+    for table_name in table_columns:
+        path = manifest.path / f"{table_name}.{suffix}"
+        if not path.exists():
+            continue
+        try:
+            manifest.record(table_name, params, [path])
+        except (OSError, pa.ArrowInvalid):
+            logger.warning("Generating %s again, %s is incomplete", table_name, path)
         else:
-            path = base_path / f"{table_name}.parquet"
-            lf.sink_parquet(path)
+            logger.info("Recorded %s, written without manifest", path)
+
+
+def _generate_tbl_files(
+    base_path: pathlib.Path, scale_factor: float, tables: list[str]
+) -> None:
+    """Generate the `.tbl` files of the tables with `tpchgen-cli`.
+
+    The files are generated into a temporary directory and only moved to the
+    directory once all of them are complete.
+    """
+    tmp_path = base_path / ".tbl-tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    subprocess.check_output(
+        [
+            "tpchgen-cli",
+            f"--output-dir={tmp_path}",
+            "--format=tbl",
+            f"--scale-factor={scale_factor}",
+            f"--tables={','.join(tables)}",
+        ]
+    )
+    for path in tmp_path.glob("*.tbl"):
+        path.replace(base_path / path.name)
+    tmp_path.rmdir()
+
+
+def generate_dataset(
+    scale_factor: float,
+    tables_dir: pathlib.Path,
+    generator: Generator = "tpchgen-cli",
+) -> pathlib.Path:
+    """Generate the Parquet tables for the given scale factor with the generator.
+
+    Only the tables that are not valid in the manifest of the dataset are
+    generated, see `generate_tables`.
+    """
+    base_path = tables_dir / f"scale-{scale_factor}"
+    generate_tables(base_path, scale_factor, generator)
+    return base_path
 
 
 if __name__ == "__main__":
@@ -266,33 +996,102 @@ if __name__ == "__main__":
         type=int,
         help="How many processes to use to generate the data",
     )
+    parser.add_argument(
+        "--memory-budget",
+        default=None,
+        type=int,
+        help="Memory in MiB that concurrent conversions of tables to Parquet may "
+        "use (default: half of the available memory)",
+    )
+    parser.add_argument(
+        "--generator",
+        choices=GENERATORS,
+        default="tpchgen-cli",
+        help="Convert the .tbl files of dbgen or tpchgen-cli, or generate the tables "
+        "natively without them",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["parquet", "ipc"],
+        default="parquet",
+        help="File format of the natively generated tables",
+    )
+    parser.add_argument(
+        "--layouts",
+        default=[],
+        type=lambda value: value if value == "all" else value.split(","),
+        help="Comma-separated layouts of PARQUET_LAYOUTS and FEATHER_LAYOUTS, or "
+        "'csv', or 'all', to write the Parquet tables in, into subdirectories of the "
+        "data folder",
+    )
+    parser.add_argument(
+        "--sort-by",
+        action="append",
+        default=[],
+        metavar="TABLE=COLUMN[,COLUMN...]",
+        help="Also write a layout sorting the table by the columns, which can be "
+        "given for several tables, into a subdirectory named after the columns",
+    )
+    parser.add_argument(
+        "--zorder",
+        action="store_true",
+        help="Sort the tables of --sort-by by the Z-order curve of their columns",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help=f"Generate and write all tables, also those that are valid in the "
+        f"{MANIFEST_FILE} of their folder",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    verify_parser = subparsers.add_parser(
+        "verify",
+        help=f"Check the tables of the data folder and of its layouts against their "
+        f"{MANIFEST_FILE}, by the sizes and row counts of their files",
+    )
+    verify_parser.add_argument(
+        "folder",
+        nargs="?",
+        help="Data folder to verify (default: --tpch_gen_folder)",
+    )
+    verify_parser.add_argument(
+        "--checksums",
+        action="store_true",
+        help="Also compare the checksums of the files, which reads them completely",
+    )
     args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
 
-    # Ensure the input data folder exists
-    if not os.path.isdir(args.tpch_gen_folder):
-        print(
-            f"Error: data folder '{args.tpch_gen_folder}' not found. "
-            "Please generate data tables with the Makefile first.",
-            file=sys.stderr,
+    if args.command == "verify":
+        problems = verify(
+            pathlib.Path(args.folder or args.tpch_gen_folder), checksums=args.checksums
         )
-        sys.exit(1)
-
-    if args.num_parts == 1:
-        # Single-part pipeline: use existing .tbl files generated by Makefile
-        tbl_files = list(pathlib.Path(args.tpch_gen_folder).glob("*.tbl"))
-        if not tbl_files:
-            print(
-                f"Error: no .tbl files found in '{args.tpch_gen_folder}'. "
-                "Please run 'make gen-tbl' before preparing data.",
-                file=sys.stderr,
-            )
+        if problems:
+            print(f"{len(problems)} problems found", file=sys.stderr)
             sys.exit(1)
-        gen_parquet(
-            pathlib.Path(args.tpch_gen_folder),
-            rows_per_file=args.rows_per_file,
-            partitioned=False,
+        sys.exit(0)
+
+    memory_budget = (
+        args.memory_budget * 1024**2 if args.memory_budget is not None else None
+    )
+
+    all_layouts = [*PARQUET_LAYOUTS, *FEATHER_LAYOUTS, CSV_LAYOUT]
+    layouts = all_layouts if args.layouts == "all" else args.layouts
+    if unknown := set(layouts) - set(all_layouts):
+        parser.error(f"unknown layouts {sorted(unknown)}, choose from {all_layouts}")
+    sort_by: dict[str, tuple[str, ...]] = {}
+    for spec in args.sort_by:
+        table_name, _, columns = spec.partition("=")
+        sort_by[table_name] = tuple(columns.split(","))
+        if unknown := set(sort_by[table_name]) - set(table_columns.get(table_name, [])):
+            parser.error(f"unknown columns {sorted(unknown)} of table {table_name!r}")
+    partitioned = args.generator != "native" and args.num_parts != 1
+    if (layouts or sort_by) and (partitioned or args.format != "parquet"):
+        parser.error(
+            "layouts can only be written for single-file Parquet tables (--num-parts 1)"
         )
-    else:
+
+    if partitioned:
         pipelined_data_generation(
             args.tpch_gen_folder,
             args.scale_factor,
@@ -300,4 +1099,37 @@ if __name__ == "__main__":
             args.aws_s3_sync_location,
             parallelism=args.parallelism,
             rows_per_file=args.rows_per_file,
+            memory_budget=memory_budget,
+            force=args.force,
+        )
+    else:
+        # Single-part pipeline: convert the .tbl files in the data folder, e.g. of
+        # `make gen-tbl`, or generate them, for the tables that are not yet valid
+        generate_tables(
+            pathlib.Path(args.tpch_gen_folder),
+            args.scale_factor,
+            args.generator,
+            file_format=args.format,
+            parallelism=args.parallelism,
+            memory_budget=memory_budget,
+            force=args.force,
+        )
+
+    for layout_name in layouts:
+        if layout_name in FEATHER_LAYOUTS:
+            write_feather_layout(
+                pathlib.Path(args.tpch_gen_folder), layout_name, force=args.force
+            )
+        elif layout_name == CSV_LAYOUT:
+            write_csv_layout(pathlib.Path(args.tpch_gen_folder), force=args.force)
+        else:
+            write_layout(
+                pathlib.Path(args.tpch_gen_folder), layout_name, force=args.force
+            )
+    if sort_by:
+        write_layout(
+            pathlib.Path(args.tpch_gen_folder),
+            sorted_layout_name(sort_by, zorder=args.zorder),
+            sorted_layout(sort_by, zorder=args.zorder),
+            force=args.force,
         )
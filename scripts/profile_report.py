@@ -0,0 +1,111 @@
+"""Report where queries spend their time, from the operator profiles of a run.
+
+Operator profiles are logged to the results store when running the benchmarks with
+`RUN_LOG_TIMINGS=1`, and `RUN_POLARS_PROFILE=1` or `RUN_DUCKDB_PROFILE=1`.
+For every query, the time of all nodes of the query plan
+is summed up per operator, e.g. all joins, and reported as a share of the total
+time of all nodes.
+
+To use this script, run:
+
+```shell
+.venv/bin/python -m scripts.profile_report --run <run id>
+```
+
+To report the share of a single operator, e.g. of all joins, run:
+
+```shell
+.venv/bin/python -m scripts.profile_report --operator join
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+import polars as pl
+
+from queries.results import read_results
+
+KEYS = ["solution", "query_number"]
+
+
+def summarize_profiles(profiles: pl.DataFrame) -> pl.DataFrame:
+    """Sum up the time per operator of every query, as a share of the query.
+
+    Nodes of a query plan may run in parallel, so shares are relative to the total
+    time of all nodes rather than to the duration of the query.
+    """
+    # A query is profiled once in every suite iteration, average over those
+    runs = pl.col("suite_iteration").n_unique().over(KEYS).alias("runs")
+    return (
+        profiles.with_columns(runs)
+        .group_by(*KEYS, "operator")
+        .agg(
+            (pl.len() / pl.col("runs").first()).alias("nodes"),
+            (pl.col("duration").sum() / pl.col("runs").first()).alias("duration"),
+        )
+        .with_columns(
+            (pl.col("duration") / pl.col("duration").sum().over(KEYS)).alias("share")
+        )
+        .sort(*KEYS, "share", descending=[False, False, True])
+    )
+
+
+def _latest_profiled_run(profiles: pl.DataFrame) -> str:
+    return profiles.sort("timestamp").get_column("run_id")[-1]  # type: ignore[no-any-return]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Report where queries spend their time per operator.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--run",
+        help="Run identifier to report on (defaults to the latest profiled run)",
+    )
+    parser.add_argument(
+        "--operator",
+        help="Only report operators containing this name, e.g. join",
+    )
+    parser.add_argument(
+        "--results",
+        type=Path,
+        help="Results file or directory to read (defaults to the results store)",
+    )
+    parser.add_argument(
+        "--output", type=Path, help="Write the profile report to this CSV file"
+    )
+    args = parser.parse_args()
+
+    results = read_results(args.results)
+    if results.is_empty() or "operator" not in results.columns:
+        msg = "no operator profiles found in the results store"
+        raise ValueError(msg)
+    profiles = results.filter(pl.col("kind") == "profile")
+    run_id = args.run or _latest_profiled_run(profiles)
+
+    report = summarize_profiles(profiles.filter(pl.col("run_id") == run_id))
+    if args.operator is not None:
+        report = (
+            report.filter(pl.col("operator").str.contains(args.operator, literal=True))
+            .group_by(KEYS, maintain_order=True)
+            .agg(pl.col("nodes", "duration", "share").sum())
+        )
+        for solution, query_number, _, _, share in report.iter_rows():
+            print(
+                f"{args.operator} nodes account for {share:.1%} of "
+                f"{solution} q{query_number}"
+            )
+
+    print(f"Operator profile of run {run_id}")
+    with pl.Config(tbl_rows=-1, tbl_cols=-1, tbl_width_chars=250):
+        print(report)
+    if args.output is not None:
+        report.write_csv(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Report the row groups and files skipped by a candidate run, and the speedup.
+
+Sorting a table by the columns queries filter on narrows the range of values of
+every row group, so engines skip the row groups whose statistics rule out the
+filters. Partitioning a table by them lets engines skip whole directories. This
+script compares a baseline run, e.g. on an unsorted layout or without partition
+pruning, with a candidate run, e.g. on a sorted or Z-ordered layout or with
+partition pruning. For every solution and query, it reports the row groups the
+filtered scans of both runs read and skipped, and the table files they opened, as
+logged with `RUN_TRACK_IO=1`, and the speedup of the median query duration. Row
+groups are only reported by the engines that log them. DuckDB does not report the
+row groups it reads, its counts are estimated from the statistics of the row groups
+and marked in the `row_groups_estimated` column.
+
+To use this script, run both layouts with the scan statistics and timings logged:
+
+```shell
+RUN_TRACK_IO=1 RUN_LOG_TIMINGS=1 RUN_RUN_ID=unsorted make run-duckdb
+RUN_TRACK_IO=1 RUN_LOG_TIMINGS=1 RUN_RUN_ID=sorted RUN_LAYOUT=sorted make run-duckdb
+.venv/bin/python -m scripts.pruning_report --baseline unsorted --candidate sorted
+```
+
+and to measure partition pruning, run the `hive` layout with and without it:
+
+```shell
+export RUN_TRACK_IO=1 RUN_LOG_TIMINGS=1 RUN_LAYOUT=hive
+RUN_RUN_ID=full RUN_PARTITION_PRUNING=0 make run-duckdb
+RUN_RUN_ID=pruned make run-duckdb
+.venv/bin/python -m scripts.pruning_report --baseline full --candidate pruned
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+import polars as pl
+
+from queries.results import read_results
+
+KEYS = ["solution", "query_number", "scale_factor"]
+
+
+def pruning_report(
+    results: pl.DataFrame, baseline: str, candidate: str
+) -> pl.DataFrame:
+    """Compare the row groups and files read and the durations of the two runs.
+
+    Parameters
+    ----------
+    results
+        Records of the results store.
+    baseline
+        Run identifier of the run to compare to, e.g. on the unsorted layout.
+    candidate
+        Run identifier of the run that skips data, e.g. on the sorted layout.
+    """
+    base = _collect_run(results, baseline)
+    cand = _collect_run(results, candidate)
+
+    return (
+        base.join(cand, on=KEYS, suffix="_candidate", nulls_equal=True)
+        .rename(
+            {
+                "layout": "layout_baseline",
+                "row_groups_read": "row_groups_read_baseline",
+                "row_groups_total": "row_groups_total_baseline",
+                "files_scanned": "files_scanned_baseline",
+                "files_opened": "files_opened_baseline",
+                "median": "median_baseline",
+            }
+        )
+        .with_columns(
+            (
+                pl.col("row_groups_total_baseline") - pl.col("row_groups_read_baseline")
+            ).alias("skipped_baseline"),
+            (
+                pl.col("row_groups_total_candidate")
+                - pl.col("row_groups_read_candidate")
+            ).alias("skipped_candidate"),
+            (pl.col("files_opened_baseline") - pl.col("files_opened_candidate")).alias(
+                "files_skipped_candidate"
+            ),
+            # > 1 means the candidate is faster
+            (pl.col("median_baseline") / pl.col("median_candidate")).alias("speedup"),
+            (pl.col("estimated") | pl.col("estimated_candidate")).alias(
+                "row_groups_estimated"
+            ),
+        )
+        .with_columns(
+            (pl.col("skipped_candidate") / pl.col("row_groups_total_candidate"))
+            .fill_nan(None)
+            .alias("skipped_fraction_candidate")
+        )
+        .select(
+            *KEYS,
+            "layout_baseline",
+            "layout_candidate",
+            "row_groups_estimated",
+            "row_groups_total_baseline",
+            "skipped_baseline",
+            "row_groups_total_candidate",
+            "skipped_candidate",
+            "skipped_fraction_candidate",
+            "files_scanned_baseline",
+            "files_scanned_candidate",
+            "files_opened_baseline",
+            "files_opened_candidate",
+            "files_skipped_candidate",
+            "median_baseline",
+            "median_candidate",
+            "speedup",
+        )
+        .sort(KEYS)
+    )
+
+
+def _collect_run(results: pl.DataFrame, run_id: str) -> pl.DataFrame:
+    run = results.filter(pl.col("run_id") == run_id)
+    if "layout" not in run.columns:
+        # Older results, written before layouts were recorded
+        run = run.with_columns(pl.lit(None, dtype=pl.String).alias("layout"))
+    for column in (
+        "row_groups_read",
+        "row_groups_estimated",
+        "row_groups_total",
+        "files",
+        "files_opened",
+    ):
+        if column not in run.columns:
+            # Runs without engines that report row groups, or without I/O tracking
+            run = run.with_columns(pl.lit(None, dtype=pl.Int64).alias(column))
+    scans = run.filter(pl.col("kind") == "scan_stats")
+    timings = run.filter(pl.col("kind") == "query", pl.col("success"))
+    if timings.is_empty():
+        msg = f"no successful query timings found for run {run_id!r}"
+        raise ValueError(msg)
+    if scans.is_empty() and timings["files_opened"].null_count() == timings.height:
+        msg = f"no I/O statistics found for run {run_id!r}, run with RUN_TRACK_IO=1"
+        raise ValueError(msg)
+
+    # Every repetition of a query reads the same row groups. The files the scans
+    # read are only reported by some engines, the files opened are sampled.
+    row_groups = scans.group_by(KEYS).agg(
+        pl.coalesce("row_groups_read", "row_groups_estimated")
+        .first()
+        .alias("row_groups_read"),
+        pl.col("row_groups_estimated").is_not_null().first().alias("estimated"),
+        pl.col("row_groups_total").first(),
+        pl.col("files").first().alias("files_scanned"),
+    )
+    durations = timings.group_by(KEYS).agg(
+        pl.col("layout").first(),
+        pl.col("files_opened").median(),
+        pl.col("duration").median().alias("median"),
+    )
+    return durations.join(row_groups, on=KEYS, how="left", nulls_equal=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Report the row groups and files skipped by a candidate run.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--baseline",
+        required=True,
+        help="Run identifier of the run to compare to, e.g. on the unsorted layout",
+    )
+    parser.add_argument(
+        "--candidate",
+        required=True,
+        help="Run identifier of the run that skips data, e.g. on the sorted layout",
+    )
+    parser.add_argument(
+        "--results",
+        type=Path,
+        help="Results file or directory to read (defaults to the results store)",
+    )
+    parser.add_argument(
+        "--output", type=Path, help="Write the pruning report to this CSV file"
+    )
+    args = parser.parse_args()
+
+    report = pruning_report(read_results(args.results), args.baseline, args.candidate)
+
+    print(f"Data skipped by run {args.candidate} and baseline {args.baseline}")
+    with pl.Config(tbl_rows=-1, tbl_cols=-1, tbl_width_chars=250):
+        print(report)
+    if report["row_groups_estimated"].any():
+        print(
+            "Row groups marked as row_groups_estimated are estimated from the row "
+            "group statistics, not reported by the engine"
+        )
+    if args.output is not None:
+        report.write_csv(args.output)
+
+
+if __name__ == "__main__":
+    main()
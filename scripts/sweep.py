@@ -0,0 +1,285 @@
+"""Run the benchmarks of a library over a range of settings and analyze the results.
+
+Every point of a sweep runs the benchmark suite of the library in a fresh process,
+with all results logged to the results store under the same run identifier.
+
+To sweep over scale factors, generating missing datasets on demand, run:
+
+```shell
+.venv/bin/python -m scripts.sweep scale-factor polars --scale-factors 1,10,100
+```
+
+To sweep over the number of threads every engine may use (`RUN_THREADS`), run:
+
+```shell
+.venv/bin/python -m scripts.sweep threads polars --threads 1,2,4,8,16
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import subprocess
+import sys
+from datetime import UTC, datetime
+from pathlib import Path
+from uuid import uuid4
+
+import polars as pl
+
+from queries.results import read_results
+from scripts.prepare_data import generate_dataset
+from settings import Settings
+
+settings = Settings()
+
+
+def run_benchmark(library_name: str, run_id: str, env: dict[str, str]) -> None:
+    """Run the benchmark suite of the library in a fresh process."""
+    env = {
+        **os.environ,
+        **env,
+        "RUN_RUN_ID": run_id,
+        "RUN_LOG_TIMINGS": "1",
+    }
+    subprocess.run(
+        [sys.executable, "-m", f"queries.{library_name}"], env=env, check=True
+    )
+
+
+def _new_run_id(kind: str) -> str:
+    return f"{datetime.now(UTC):%Y%m%dT%H%M%S}-{kind}-{uuid4().hex[:8]}"
+
+
+def sweep_scale_factors(library_name: str, scale_factors: list[float]) -> str:
+    """Run the benchmarks at every scale factor and return the run identifier."""
+    run_id = _new_run_id("scale")
+    for scale_factor in scale_factors:
+        base_path = settings.paths.tables / f"scale-{scale_factor}"
+        if not (base_path / "lineitem.parquet").exists():
+            generate_dataset(scale_factor, settings.paths.tables)
+        run_benchmark(library_name, run_id, {"SCALE_FACTOR": str(scale_factor)})
+    return run_id
+
+
+def sweep_threads(library_name: str, threads: list[int]) -> str:
+    """Run the benchmarks with every thread count and return the run identifier."""
+    run_id = _new_run_id("threads")
+    for n_threads in threads:
+        run_benchmark(library_name, run_id, {"RUN_THREADS": str(n_threads)})
+    return run_id
+
+
+def fit_power_law(x: list[float], y: list[float]) -> tuple[float, float]:
+    """Fit y = a * x^b by least squares in log-log space.
+
+    Returns the exponent b and the coefficient of determination of the fit.
+    """
+    lx = [math.log(v) for v in x]
+    ly = [math.log(v) for v in y]
+    mean_x = sum(lx) / len(lx)
+    mean_y = sum(ly) / len(ly)
+    sxx = sum((v - mean_x) ** 2 for v in lx)
+    sxy = sum((u - mean_x) * (v - mean_y) for u, v in zip(lx, ly, strict=True))
+    if sxx == 0:
+        return math.nan, math.nan
+
+    b = sxy / sxx
+    a = mean_y - b * mean_x
+    ss_res = sum((v - (a + b * u)) ** 2 for u, v in zip(lx, ly, strict=True))
+    ss_tot = sum((v - mean_y) ** 2 for v in ly)
+    r2 = 1 - ss_res / ss_tot if ss_tot > 0 else 1.0
+    return b, r2
+
+
+def analyze_scaling(results: pl.DataFrame, tolerance: float) -> pl.DataFrame:
+    """Fit scaling curves of the duration and peak memory of every query.
+
+    The size of a dataset is the number of rows of its `lineitem` table. Queries
+    with a scaling exponent above `1 + tolerance` are flagged as super-linear.
+    """
+    timings = results.filter(pl.col("kind") == "query", pl.col("success"))
+    if "delta_rss" not in timings.columns:
+        timings = timings.with_columns(pl.lit(None, dtype=pl.Int64).alias("delta_rss"))
+
+    rows = {
+        sf: _count_rows(settings.paths.tables / f"scale-{sf}" / "lineitem.parquet")
+        for sf in timings.get_column("scale_factor").unique()
+    }
+    points = (
+        timings.group_by("solution", "query_number", "scale_factor")
+        .agg(pl.col("duration").median(), pl.col("delta_rss").median())
+        .with_columns(pl.col("scale_factor").replace_strict(rows).alias("rows"))
+        .sort("solution", "query_number", "rows")
+    )
+
+    fits = []
+    for (solution, query_number), group in points.group_by(
+        "solution", "query_number", maintain_order=True
+    ):
+        n_rows = group.get_column("rows").to_list()
+        time_exp, time_r2 = fit_power_law(
+            n_rows, group.get_column("duration").to_list()
+        )
+
+        memory = group.filter(pl.col("delta_rss") > 0)
+        mem_exp = mem_r2 = None
+        if memory.height > 1:
+            mem_exp, mem_r2 = fit_power_law(
+                memory.get_column("rows").to_list(),
+                memory.get_column("delta_rss").to_list(),
+            )
+
+        fits.append(
+            {
+                "solution": solution,
+                "query_number": query_number,
+                "scale_factors": group.height,
+                "time_exponent": time_exp,
+                "time_r2": time_r2,
+                "memory_exponent": mem_exp,
+                "memory_r2": mem_r2,
+                "super_linear": time_exp > 1 + tolerance
+                or (mem_exp is not None and mem_exp > 1 + tolerance),
+            }
+        )
+
+    return pl.DataFrame(
+        fits,
+        schema_overrides={"memory_exponent": pl.Float64, "memory_r2": pl.Float64},
+    )
+
+
+def analyze_parallel_scaling(results: pl.DataFrame) -> pl.DataFrame:
+    """Compute the speedup and parallel efficiency of every query per thread count.
+
+    Both are relative to the smallest thread count of the sweep, which is ideally 1.
+    An efficiency of 1 means the query scales perfectly from that thread count.
+    """
+    timings = results.filter(pl.col("kind") == "query", pl.col("success"))
+    base = pl.col("duration").first().over("solution", "query_number")
+    base_threads = pl.col("threads").first().over("solution", "query_number")
+    return (
+        timings.group_by(
+            "solution", "query_number", pl.col("settings.run.threads").alias("threads")
+        )
+        .agg(pl.col("duration").median())
+        .sort("solution", "query_number", "threads")
+        .with_columns((base / pl.col("duration")).alias("speedup"))
+        .with_columns(
+            (pl.col("speedup") * base_threads / pl.col("threads")).alias("efficiency")
+        )
+    )
+
+
+def summarize_parallel_scaling(
+    curves: pl.DataFrame, min_efficiency: float
+) -> pl.DataFrame:
+    """Find the thread count at which every query stops scaling.
+
+    That is the largest thread count up to which the parallel efficiency stays at
+    or above `min_efficiency`.
+    """
+    scaling = pl.col("efficiency") >= min_efficiency
+    return (
+        curves.group_by("solution", "query_number", maintain_order=True)
+        .agg(
+            pl.col("speedup").max().alias("max_speedup"),
+            pl.col("threads").get(pl.col("speedup").arg_max()).alias("fastest_threads"),
+            # Thread counts before the first one that falls below the efficiency
+            pl.col("threads")
+            .filter(scaling.cum_min())
+            .max()
+            .alias("scales_up_to_threads"),
+        )
+        .sort("solution", "query_number")
+    )
+
+
+def _count_rows(path: Path) -> int:
+    return pl.scan_parquet(path).select(pl.len()).collect().item()  # type: ignore[no-any-return]
+
+
+def _parse_floats(s: str) -> list[float]:
+    return [float(v) for v in s.split(",")]
+
+
+def _parse_ints(s: str) -> list[int]:
+    return [int(v) for v in s.split(",")]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Run the benchmarks of a library over a range of settings.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    subparsers = parser.add_subparsers(dest="sweep", required=True)
+
+    scale = subparsers.add_parser(
+        "scale-factor",
+        help="Sweep over scale factors and fit scaling curves",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    scale.add_argument("library", help="Library to benchmark, e.g. polars")
+    scale.add_argument(
+        "--scale-factors",
+        type=_parse_floats,
+        default=[1.0, 10.0],
+        help="Comma-separated scale factors",
+    )
+    scale.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="Flag queries whose scaling exponent exceeds 1 + tolerance",
+    )
+    scale.add_argument(
+        "--output", type=Path, help="Write the scaling report to this CSV file"
+    )
+
+    threads = subparsers.add_parser(
+        "threads",
+        help="Sweep over thread counts and compute speedup and parallel efficiency",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    threads.add_argument("library", help="Library to benchmark, e.g. polars")
+    threads.add_argument(
+        "--threads",
+        type=_parse_ints,
+        default=[1, 2, 4, 8],
+        help="Comma-separated thread counts",
+    )
+    threads.add_argument(
+        "--min-efficiency",
+        type=float,
+        default=0.5,
+        help="Parallel efficiency below which a query is considered to stop scaling",
+    )
+    threads.add_argument(
+        "--output", type=Path, help="Write the speedup curves to this CSV file"
+    )
+
+    args = parser.parse_args()
+
+    if args.sweep == "scale-factor":
+        run_id = sweep_scale_factors(args.library, args.scale_factors)
+        results = read_results().filter(pl.col("run_id") == run_id)
+        report = analyze_scaling(results, args.tolerance)
+    elif args.sweep == "threads":
+        run_id = sweep_threads(args.library, sorted(args.threads))
+        results = read_results().filter(pl.col("run_id") == run_id)
+        report = analyze_parallel_scaling(results)
+        with pl.Config(tbl_rows=-1, tbl_cols=-1, tbl_width_chars=250):
+            print(summarize_parallel_scaling(report, args.min_efficiency))
+
+    print(f"Sweep results are stored under run {run_id}")
+    with pl.Config(tbl_rows=-1, tbl_cols=-1, tbl_width_chars=250):
+        print(report)
+    if args.output is not None:
+        report.write_csv(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,7 +13,7 @@ class Paths(BaseSettings):
     tables: Path = Path("data/tables")
 
     timings: Path = Path("output/run")
-    timings_filename: str = "timings.csv"
+    results_dirname: str = "results"  # results store, below `timings`
 
     plots: Path = Path("output/plot")
 
@@ -25,15 +25,68 @@ class Paths(BaseSettings):
 # Set via RUN_<NAME>
 class Run(BaseSettings):
     io_type: IoType = "parquet"
-
-    iterations: int = 1
+    # Files the tables are loaded into memory from with `io_type` skip. Uncompressed
+    # Feather files are memory-mapped, so loading them copies no data.
+    skip_format: Literal["parquet", "feather"] = "parquet"
+    # Read the tables of a layout variant from `scale-<sf>/<layout>/` instead of
+    # `scale-<sf>/`, see `PARQUET_LAYOUTS` in `scripts/prepare_data.py`. The tables
+    # partitioned into `--num-parts <n>` parts are read with the layout `<n>`.
+    layout: str | None = None
+    # Filter the partition columns of Hive partitioned tables (e.g. of the `hive`
+    # layout) by the date ranges of the queries, so engines can skip partitions
+    partition_pruning: bool = True
+
+    iterations: int = 1  # minimum number of timed runs of each query
+    warmup_iterations: int = 0  # untimed runs of each query before the timed runs
+    # Keep timing a query until the confidence interval of its median is narrower
+    # than this fraction of the median, or `max_iterations` is reached (0 disables)
+    target_ci_width: float = 0.0
+    max_iterations: int = 30
+    confidence_level: float = 0.95
+
+    # Sample the RSS of the process and its children (e.g. Spark JVM, Ray workers)
+    # on a background thread while each query runs
+    track_memory: bool = False
+    memory_sample_interval: float = 0.01  # seconds between two RSS samples
+    memory_timeline: bool = False  # also log every RSS sample, not only the peak
+    # Count the bytes read by the process and its children while each query runs,
+    # sample the table files they open concurrently, and report the row groups and
+    # columns read by the engines that report them
+    track_io: bool = False
+    # Seconds between two samples of the open table files, every sample walks the
+    # file descriptors and memory maps of the process and its children in /proc
+    files_sample_interval: float = 0.1
     suite_iterations: int = 1  # how many times to run the full query suite for cache/warm-up testing
     suite_iteration: int = 1    # one-based index of the current suite run (set by execute_all)
+    isolate_queries: bool = False  # run every query in a fresh interpreter instead of one worker
+    launched_at: float | None = None  # wall-clock time the query was dispatched (set by execute_all)
+    run_id: str = ""  # identifies all results of one benchmark run (set on first use)
+    throughput_streams: int = 0  # number of concurrent query streams, 0 runs the single-stream power test
+    # Run throughput streams as separate processes or as threads of one process.
+    # Threads share loaded data but require an engine that is safe to call
+    # concurrently (e.g. Polars); libraries caching data via `on_second_call` are not.
+    throughput_executor: Literal["process", "thread"] = "process"
+    # Control the OS page cache before every timed run of a query: leave it to the OS
+    # ("os"), evict the table files ("cold"), load them ("warm"), or time the query
+    # in both states ("both")
+    page_cache: Literal["os", "cold", "warm", "both"] = "os"
+    # Time interpreter start, imports, engine initialization and the first query of
+    # fresh interpreters instead of running the queries
+    startup_benchmark: bool = False
+    # Number of threads every engine may use for a query, all cores if not set
+    threads: int | None = None
     log_timings: bool = False
     show_results: bool = False
-    check_results: bool = False  # Only available for SCALE_FACTOR=1
+    # Check results against the answers of the scale factor, see `answers_dir`
+    check_results: bool = False
+    # Write the results as the answers of the scale factor instead of checking them,
+    # only supported by the reference engines Polars and DuckDB
+    write_answers: bool = False
 
     polars_show_plan: bool = False
+    # Profile every query once more after timing it, logging the time spent in
+    # every node of the query plan
+    polars_profile: bool = False
     polars_eager: bool = False
     polars_old_streaming: bool = False
     polars_streaming: bool = False
@@ -51,11 +104,17 @@ class Run(BaseSettings):
         "cuda", "cuda-pool", "managed", "managed-pool", "cuda-async"
     ] = "cuda-async"
 
+    # Profile every query once more after timing it, logging the operator tree
+    duckdb_profile: bool = False
+
     modin_memory: int = 8_000_000_000  # Tune as needed for optimal performance
 
     spark_driver_memory: str = "2g"  # Tune as needed for optimal performance
     spark_executor_memory: str = "1g"  # Tune as needed for optimal performance
     spark_log_level: str = "ERROR"
+    # Collect stage, task, shuffle, spill and GC metrics of every query run from the
+    # Spark UI
+    spark_metrics: bool = False
 
     @computed_field  # type: ignore[prop-decorator]
     @property
@@ -109,4 +168,17 @@ class Settings(BaseSettings):
     def dataset_base_dir(self) -> Path:
         return self.paths.tables / f"scale-{self.scale_factor}"
 
+    # Directory of the tables read by the queries, in the layout of the run
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def dataset_dir(self) -> Path:
+        if self.run.layout:
+            return self.dataset_base_dir / self.run.layout
+        return self.dataset_base_dir
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def answers_dir(self) -> Path:
+        return self.paths.answers / f"scale-{self.scale_factor}"
+
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from typing import Any
+
+import polars as pl
+import pytest
+
+from scripts.compare_runs import _latest_run_id, compare_runs
+
+FAST = [1.00, 1.01, 1.02, 1.03, 1.04, 1.05]
+SLOW = [1.50, 1.51, 1.52, 1.53, 1.54, 1.55]
+
+
+def _timings(
+    run_id: str, query_number: int, durations: list[float], *, failed: int = 0
+) -> list[dict[str, Any]]:
+    runs = [(d, True) for d in durations] + [(None, False)] * failed
+    return [
+        {
+            "kind": "query",
+            "run_id": run_id,
+            "timestamp": f"2024-01-0{1 if run_id == 'base' else 2}T00:00:00",
+            "solution": "polars",
+            "version": "1.0.0" if run_id == "base" else "1.1.0",
+            "query_number": query_number,
+            "io_type": "parquet",
+            "scale_factor": 1.0,
+            "duration": duration,
+            "success": success,
+        }
+        for duration, success in runs
+    ]
+
+
+@pytest.fixture
+def results() -> pl.DataFrame:
+    records = [
+        *_timings("base", 1, FAST),
+        *_timings("cand", 1, SLOW),
+        *_timings("base", 2, SLOW),
+        *_timings("cand", 2, FAST),
+        *_timings("base", 3, FAST),
+        *_timings("cand", 3, [d + 0.005 for d in FAST]),
+        *_timings("base", 4, FAST),
+        *_timings("cand", 4, FAST[:3], failed=1),
+        *_timings("base", 5, FAST),
+        *_timings("cand", 6, FAST),
+        *_timings("base", 7, [], failed=1),
+        *_timings("cand", 7, FAST),
+    ]
+    return pl.DataFrame(records)
+
+
+def test_compare_runs(results: pl.DataFrame) -> None:
+    report = compare_runs(results, "base", "cand", threshold=0.05, alpha=0.05)
+
+    assert dict(zip(report["query_number"], report["status"], strict=True)) == {
+        1: "regression",
+        2: "improvement",
+        3: "unchanged",
+        4: "failed",
+        5: "missing",
+        6: "missing_in_baseline",
+        7: "failed_in_baseline",
+    }
+    q1 = report.row(0, named=True)
+    assert (q1["n_baseline"], q1["n_candidate"]) == (6, 6)
+    assert (q1["version_baseline"], q1["version_candidate"]) == ("1.0.0", "1.1.0")
+    assert q1["speedup"] == pytest.approx(1.025 / 1.525)
+    # Exact test, 2 of the 924 orderings of the durations are as extreme
+    assert q1["p_value"] == pytest.approx(2 / 924)
+
+    q4 = report.row(3, named=True)
+    assert (q4["n_candidate"], q4["n_failed_candidate"]) == (3, 1)
+    # Queries without successful runs in both runs are not tested
+    assert report.filter(pl.col("query_number") >= 5)["p_value"].is_null().all()
+
+
+def test_compare_runs_threshold(results: pl.DataFrame) -> None:
+    # A slowdown of 49% is significant, but not above a threshold of 50%
+    report = compare_runs(results, "base", "cand", threshold=0.5, alpha=0.05)
+
+    assert report.filter(pl.col("query_number") == 1)["status"].item() == "unchanged"
+
+
+def test_compare_runs_unknown_run(results: pl.DataFrame) -> None:
+    with pytest.raises(ValueError, match="no query timings found for run 'other'"):
+        compare_runs(results, "base", "other", threshold=0.05, alpha=0.05)
+
+
+def test_latest_run_id(results: pl.DataFrame) -> None:
+    assert _latest_run_id(results, exclude="base") == "cand"
+    assert _latest_run_id(results, exclude="cand") == "base"
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+
+import pandas as pd
+import polars as pl
+import pytest
+
+from queries.fingerprint import result_fingerprint
+
+RESULT = pl.DataFrame(
+    {
+        "l_returnflag": ["A", "N", "R"],
+        "sum_qty": [37734107, 991417, 74476040],
+        "avg_disc": [0.05000657, 0.05009405, 0.04999658],
+        "o_orderdate": [date(1995, 3, 5), date(1995, 3, 6), date(1995, 3, 7)],
+    }
+)
+
+
+def test_equal_results() -> None:
+    assert result_fingerprint(RESULT) == result_fingerprint(RESULT.clone())
+    # pandas turns dates into datetimes, which only lenient fingerprints truncate
+    numbers = RESULT.drop("o_orderdate")
+    assert result_fingerprint(numbers.to_pandas()) == result_fingerprint(numbers)
+    assert result_fingerprint(RESULT.to_pandas(), lenient=True) == result_fingerprint(
+        RESULT, lenient=True
+    )
+
+
+def test_numeric_normalization() -> None:
+    result = RESULT.with_columns(
+        # Integral floats, e.g. sums of decimals, and values within the rounding
+        pl.col("sum_qty").cast(pl.Float64),
+        pl.col("avg_disc") + 1e-12,
+    )
+    assert result_fingerprint(result) == result_fingerprint(RESULT)
+
+    nan = pl.DataFrame({"a": [1.5, float("nan")]})
+    null = pl.DataFrame({"a": [1.5, None]})
+    assert result_fingerprint(nan) == result_fingerprint(null)
+
+
+def test_different_values() -> None:
+    result = RESULT.with_columns(pl.col("avg_disc") * 1.001)
+
+    fingerprint = result_fingerprint(result)
+    assert fingerprint != result_fingerprint(RESULT)
+    assert fingerprint.diff(result_fingerprint(RESULT)) == ["column 'avg_disc' differs"]
+
+
+def test_different_shapes() -> None:
+    expected = result_fingerprint(RESULT)
+
+    assert result_fingerprint(RESULT.head(2)).diff(expected) == ["2 rows instead of 3"]
+    assert result_fingerprint(RESULT.drop("sum_qty")).diff(expected) == [
+        "columns ['l_returnflag', 'avg_disc', 'o_orderdate'] instead of "
+        "['l_returnflag', 'sum_qty', 'avg_disc', 'o_orderdate']"
+    ]
+
+
+@pytest.mark.parametrize(
+    "result",
+    [
+        RESULT.rename({"l_returnflag": "L_RETURNFLAG"}),
+        RESULT.with_columns(pl.col("l_returnflag") + " "),
+        RESULT.with_columns(pl.col("o_orderdate").cast(pl.Datetime)),
+    ],
+    ids=["names", "strings", "datetimes"],
+)
+def test_leniency(result: pl.DataFrame) -> None:
+    # Only the comparison of pandas results normalizes names, strings and dates
+    assert result_fingerprint(result) != result_fingerprint(RESULT)
+    assert result_fingerprint(result, lenient=True) == result_fingerprint(
+        RESULT, lenient=True
+    )
+
+
+def test_lenient_pandas_result() -> None:
+    result = pd.DataFrame(
+        {
+            "L_RETURNFLAG": ["A ", "N", "R"],
+            "SUM_QTY": [37734107.0, 991417.0, 74476040.0],
+            "AVG_DISC": [0.05000657, 0.05009405, 0.04999658],
+            "O_ORDERDATE": [datetime(1995, 3, d) for d in (5, 6, 7)],
+        }
+    )
+    assert result_fingerprint(result, lenient=True) == result_fingerprint(
+        RESULT, lenient=True
+    )
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pyarrow as pa
+import pyarrow.csv as pcsv
+import pyarrow.parquet as pq
+import pytest
+
+from scripts.manifest import MANIFEST_FILE, Manifest, verify
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+PARAMS = {"generator": "tpchgen-cli", "scale_factor": 0.01, "format": "parquet"}
+
+
+def _write_region(path: Path, rows: int = 5) -> Path:
+    table = pa.table({"r_regionkey": range(rows), "r_name": ["AFRICA"] * rows})
+    file = path / "region.parquet"
+    pq.write_table(table, file)
+    return file
+
+
+@pytest.fixture
+def manifest(tmp_path: Path) -> Manifest:
+    manifest = Manifest(tmp_path)
+    manifest.record("region", PARAMS, [_write_region(tmp_path)])
+    return manifest
+
+
+def test_record(manifest: Manifest, tmp_path: Path) -> None:
+    entry = Manifest(tmp_path).tables["region"]
+
+    assert (entry["params"], entry["rows"]) == (PARAMS, 5)
+    assert entry["bytes"] == (tmp_path / "region.parquet").stat().st_size
+    assert list(entry["files"]) == ["region.parquet"]
+    assert not (tmp_path / f"{MANIFEST_FILE}.tmp").exists()
+
+
+def test_record_csv(tmp_path: Path) -> None:
+    path = tmp_path / "csv" / "region.csv"
+    path.parent.mkdir()
+    pcsv.write_csv(pa.table({"r_regionkey": range(5)}), path)
+
+    manifest = Manifest(path.parent)
+    manifest.record("region", {"layout": "csv"}, [path])
+
+    # CSV files have a header line
+    assert manifest.tables["region"]["rows"] == 5
+
+
+def test_is_valid(manifest: Manifest) -> None:
+    assert manifest.is_valid("region", PARAMS)
+    assert manifest.is_valid("region", PARAMS, checksums=True)
+    assert not manifest.is_valid("region", {**PARAMS, "scale_factor": 1.0})
+    assert not manifest.is_valid("nation", PARAMS)
+
+
+def test_problems(manifest: Manifest, tmp_path: Path) -> None:
+    path = tmp_path / "region.parquet"
+    assert manifest.problems("region") == []
+
+    _write_region(tmp_path, rows=4)
+    assert manifest.problems("region")[0].startswith("region.parquet has ")
+    assert not manifest.is_valid("region", PARAMS)
+
+    path.unlink()
+    assert manifest.problems("region") == ["region.parquet is missing"]
+
+
+def test_unreadable_footer(manifest: Manifest, tmp_path: Path) -> None:
+    path = tmp_path / "region.parquet"
+    data = path.read_bytes()
+    # Overwrite the footer, keeping the size of the file
+    path.write_bytes(data[:-64] + b"\xff" * 64)
+
+    assert manifest.problems("region") == ["region.parquet has no readable footer"]
+
+
+def test_changed_checksum(manifest: Manifest, tmp_path: Path) -> None:
+    path = tmp_path / "region.parquet"
+    data = bytearray(path.read_bytes())
+    # Change a byte of the first page, which keeps the size and the metadata
+    data[4] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    assert manifest.problems("region") == []
+    assert manifest.problems("region", checksums=True) == [
+        "region.parquet has a different checksum"
+    ]
+
+
+def test_parts(tmp_path: Path) -> None:
+    manifest = Manifest(tmp_path)
+    params = {**PARAMS, "num_parts": 2}
+    for part in (1, 2):
+        path = tmp_path / "region" / f"{part}.parquet"
+        path.parent.mkdir(exist_ok=True)
+        pq.write_table(pa.table({"r_regionkey": [part]}), path)
+        manifest.record("region", params, [path], part=part, parts=2)
+
+    entry = manifest.tables["region"]
+    assert (entry["parts"], entry["num_parts"], entry["rows"]) == ([1, 2], 2, 2)
+    assert manifest.is_valid("region", params, part=2)
+
+    # Parts of a table with other parameters replace the earlier parts
+    manifest.record("region", PARAMS, [tmp_path / "region" / "1.parquet"], part=1)
+    assert manifest.tables["region"]["parts"] == [1]
+    assert not manifest.is_valid("region", PARAMS, part=2)
+
+
+def test_digest(manifest: Manifest, tmp_path: Path) -> None:
+    digest = manifest.digest("region")
+
+    assert digest is not None
+    assert manifest.digest("nation") is None
+    _write_region(tmp_path, rows=4)
+    manifest.record("region", PARAMS, [tmp_path / "region.parquet"])
+    assert manifest.digest("region") != digest
+
+
+def test_verify(manifest: Manifest, tmp_path: Path) -> None:
+    assert verify(tmp_path) == []
+
+    _write_region(tmp_path, rows=4)
+    manifest.record("region", PARAMS, [tmp_path / "region.parquet"])
+    assert verify(tmp_path) == [f"{tmp_path}: region: 4 rows, expected 5 rows"]
+
+
+def test_verify_incomplete_parts(tmp_path: Path) -> None:
+    manifest = Manifest(tmp_path)
+    manifest.record("region", PARAMS, [_write_region(tmp_path)], part=1, parts=2)
+
+    assert verify(tmp_path) == [f"{tmp_path}: region: 1 of 2 parts written"]
+
+
+def test_verify_without_manifest(tmp_path: Path) -> None:
+    assert verify(tmp_path) == [f"{tmp_path}: no {MANIFEST_FILE} found"]
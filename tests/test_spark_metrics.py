@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from queries import common_utils
+from queries.common_utils import TimedRun
+from queries.pyspark.metrics import SparkMetricsCollector, sum_stage_metrics
+
+if TYPE_CHECKING:
+    import pytest
+
+# Trimmed responses of the `jobs` and `stages/<id>` endpoints of the Spark UI, stage 2
+# was reused from an earlier job and stage 3 failed once and was retried
+JOBS = [
+    {"jobId": 7, "jobGroup": "q9-s1-cold-1", "status": "SUCCEEDED", "stageIds": [1, 2]},
+    {"jobId": 8, "jobGroup": "q9-s1-cold-1", "status": "SUCCEEDED", "stageIds": [3]},
+    {"jobId": 9, "jobGroup": "q9-s1-warm-1", "status": "SUCCEEDED", "stageIds": [4]},
+]
+
+
+def _stage(stage_id: int, attempt: int, status: str, **metrics: Any) -> dict[str, Any]:
+    return {
+        "stageId": stage_id,
+        "attemptId": attempt,
+        "status": status,
+        "numCompleteTasks": 0,
+        "numFailedTasks": 0,
+        "executorRunTime": 0,
+        "executorCpuTime": 0,
+        "inputBytes": 0,
+        "shuffleReadBytes": 0,
+        "shuffleWriteBytes": 0,
+        "memoryBytesSpilled": 0,
+        "diskBytesSpilled": 0,
+        **metrics,
+    }
+
+
+STAGES = {
+    1: [
+        _stage(
+            1,
+            0,
+            "COMPLETE",
+            numCompleteTasks=8,
+            executorRunTime=4_000,
+            executorCpuTime=3_000_000_000,
+            jvmGcTime=250,
+            inputBytes=1_000,
+            shuffleWriteBytes=300,
+            peakExecutionMemory=2_048,
+        )
+    ],
+    2: [_stage(2, 0, "SKIPPED", numCompleteTasks=8, executorRunTime=9_000)],
+    3: [
+        _stage(
+            3,
+            0,
+            "FAILED",
+            numCompleteTasks=1,
+            numFailedTasks=2,
+            executorRunTime=500,
+            shuffleReadBytes=100,
+            peakExecutionMemory=4_096,
+        ),
+        _stage(
+            3,
+            1,
+            "COMPLETE",
+            numCompleteTasks=3,
+            executorRunTime=1_500,
+            executorCpuTime=1_000_000_000,
+            shuffleReadBytes=300,
+            memoryBytesSpilled=64,
+            diskBytesSpilled=32,
+            peakExecutionMemory=1_024,
+        ),
+    ],
+    4: [_stage(4, 0, "COMPLETE", numCompleteTasks=1, executorRunTime=100)],
+}
+
+
+class FakeSparkContext:
+    uiWebUrl = "http://localhost:4040"
+    applicationId = "local-1"
+
+    def __init__(self) -> None:
+        self.job_groups: list[str | None] = []
+
+    def setJobGroup(self, group_id: str, description: str) -> None:
+        self.job_groups.append(group_id)
+
+    def setLocalProperty(self, key: str, value: str | None) -> None:
+        self.job_groups.append(value)
+
+
+class FakeSparkSession:
+    def __init__(self) -> None:
+        self.sparkContext = FakeSparkContext()
+
+
+def test_sum_stage_metrics() -> None:
+    jobs = JOBS[:2]
+    stages = [stage for i in (1, 2, 3) for stage in STAGES[i]]
+
+    assert sum_stage_metrics(jobs, stages) == {
+        "jobs": 2,
+        "stages": 3,
+        "tasks": 12,
+        "failed_tasks": 2,
+        "task_time": 6.0,
+        "cpu_time": 4.0,
+        "gc_time": 0.25,
+        "input_bytes": 1_000,
+        "shuffle_read_bytes": 400,
+        "shuffle_write_bytes": 300,
+        "memory_spilled_bytes": 64,
+        "disk_spilled_bytes": 32,
+        "peak_execution_memory": 4_096,
+    }
+
+
+def test_collect(monkeypatch: pytest.MonkeyPatch) -> None:
+    def get(endpoint: str) -> Any:
+        if endpoint == "jobs":
+            return JOBS
+        return STAGES[int(endpoint.removeprefix("stages/"))]
+
+    collector = SparkMetricsCollector(FakeSparkSession(), 9)  # type: ignore[arg-type]
+    monkeypatch.setattr(collector, "_get", get)
+
+    cold = collector.collect("q9-s1-cold-1")
+    assert (cold["jobs"], cold["stages"], cold["tasks"]) == (2, 3, 12)
+    warm = collector.collect("q9-s1-warm-1")
+    assert (warm["jobs"], warm["stages"], warm["task_time"]) == (1, 1, 0.1)
+
+
+def test_job_groups_of_timed_runs(monkeypatch: pytest.MonkeyPatch) -> None:
+    spark = FakeSparkSession()
+    collector = SparkMetricsCollector(spark, 9)  # type: ignore[arg-type]
+    query = collector.wrap(lambda: None)
+
+    # A warmup run, then two runs with a cold and a warm page cache
+    query()
+    for run in (TimedRun("cold", 1), TimedRun("warm", 1)):
+        monkeypatch.setattr(common_utils, "_timed_run", run)
+        query()
+
+    assert collector.timed_runs == [
+        ("q9-s1-cold-1", TimedRun("cold", 1)),
+        ("q9-s1-warm-1", TimedRun("warm", 1)),
+    ]
+    assert spark.sparkContext.job_groups == [
+        "q9-s1-warmup-1",
+        None,
+        "q9-s1-cold-1",
+        None,
+        "q9-s1-warm-1",
+        None,
+    ]
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import pytest
+
+from queries.throughput import (
+    PROCESS_STREAM_LIBRARIES,
+    _run_streams_in_threads,
+    get_stream_order,
+    load_stream_permutations,
+)
+
+ALL_QUERIES = list(range(1, 23))
+
+
+def test_load_stream_permutations() -> None:
+    permutations = load_stream_permutations()
+
+    assert len(permutations) == 41
+    assert all(sorted(p) == ALL_QUERIES for p in permutations)
+    # The power test stream of TPC-H
+    assert permutations[0][:5] == [14, 2, 9, 20, 6]
+
+
+def test_get_stream_order() -> None:
+    assert get_stream_order(1, ALL_QUERIES)[:5] == [21, 3, 18, 5, 11]
+    # Queries that are not implemented are skipped, the order of the others is kept
+    assert get_stream_order(1, [1, 3, 5, 21]) == [21, 3, 5, 1]
+    # Streams beyond the last permutation wrap around
+    assert get_stream_order(42, ALL_QUERIES) == get_stream_order(1, ALL_QUERIES)
+
+
+@pytest.mark.parametrize("library_name", PROCESS_STREAM_LIBRARIES)
+def test_thread_streams_of_shared_state_libraries(library_name: str) -> None:
+    with pytest.raises(ValueError, match="use RUN_THROUGHPUT_EXECUTOR=process"):
+        _run_streams_in_threads(library_name, {1: [1], 2: [1]}, None)
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import math
+
+import pytest
+
+from queries.timing import (
+    mann_whitney_u,
+    median_confidence_interval,
+    percentile,
+    summarize_timings,
+)
+
+
+def test_median_confidence_interval_too_few_values() -> None:
+    # P(Binomial(5, 0.5) < 1) = 1/32 exceeds 2.5%
+    assert median_confidence_interval([1.0, 2.0, 3.0, 4.0, 5.0], 0.95) == (None, None)
+
+
+@pytest.mark.parametrize(
+    ("n", "expected"),
+    [
+        # P(Binomial(6, 0.5) < 1) = 1/64, the extremes bound the interval
+        (6, (1.0, 6.0)),
+        # P(Binomial(10, 0.5) < 2) = 11/1024, the second smallest and largest values
+        (10, (2.0, 9.0)),
+    ],
+)
+def test_median_confidence_interval(n: int, expected: tuple[float, float]) -> None:
+    values = [float(v) for v in range(n, 0, -1)]
+    assert median_confidence_interval(values, 0.95) == expected
+
+
+def test_median_confidence_interval_lower_confidence() -> None:
+    # P(Binomial(5, 0.5) < 1) = 1/32 is below 5%
+    assert median_confidence_interval([5.0, 1.0, 4.0, 2.0, 3.0], 0.9) == (1.0, 5.0)
+
+
+def test_summarize_timings() -> None:
+    stats = summarize_timings([1.0, 2.0, 3.0, 4.0, 5.0, 6.0], 0.95)
+
+    assert (stats.n, stats.min, stats.median) == (6, 1.0, 3.5)
+    assert stats.p95 == pytest.approx(5.75)
+    assert stats.stddev == pytest.approx(1.870829)
+    assert (stats.ci_low, stats.ci_high) == (1.0, 6.0)
+    assert stats.ci_width == pytest.approx(5 / 3.5)
+
+
+def test_summarize_single_timing() -> None:
+    stats = summarize_timings([2.5], 0.95)
+
+    assert (stats.median, stats.p95, stats.stddev) == (2.5, 2.5, 0.0)
+    assert math.isinf(stats.ci_width)
+
+
+def test_percentile() -> None:
+    assert percentile([4.0], 95) == 4.0
+    assert percentile([1.0, 2.0, 3.0, 4.0, 5.0], 50) == 3.0
+
+
+@pytest.mark.parametrize(
+    ("x", "y", "expected"),
+    [
+        # Exact distribution, without ties: 1 of 20 orderings is as extreme
+        ([1.0, 2.0, 3.0], [4.0, 5.0, 6.0], 0.1),
+        ([4.0, 5.0, 6.0], [1.0, 2.0, 3.0], 0.1),
+        # Normal approximation with tie and continuity corrections, as computed by
+        # scipy.stats.mannwhitneyu
+        ([1.0, 2.0, 2.0, 3.0, 5.0], [2.0, 4.0, 4.0, 6.0, 7.0, 8.0], 0.0793437),
+        (
+            [3.0, 1.0, 4.0, 1.0, 5.0, 9.0, 2.0, 6.0],
+            [5.0, 3.0, 5.0, 8.0, 9.0, 7.0, 9.0, 3.0]
+            + [2.0, 3.0, 8.0, 4.0, 6.0, 2.0, 6.0, 4.0],
+            0.2174434,
+        ),
+    ],
+)
+def test_mann_whitney_u(x: list[float], y: list[float], expected: float) -> None:
+    assert mann_whitney_u(x, y) == pytest.approx(expected, rel=1e-6)
+
+
+def test_mann_whitney_u_identical_samples() -> None:
+    assert mann_whitney_u([1.0, 1.0, 1.0], [1.0, 1.0, 1.0]) == 1.0